@@ -0,0 +1,303 @@
+# Command line entry point, runs the thread & coil geometry without Fusion 360.
+# It reads the same DialogInput_V9.txt, EDialogInput_V9.txt & Coil_DialogInput_V10.txt files
+# the dialog saves (or the defaults the dialog uses when there is no file), any option given
+# on the command line overrides the file. Every command prints one JSON object with the
+# parameters used, the results & how long each step took, so it can be checked in CI.
+#
+# Run from the folder P_ThreadTune is in:
+#   python -m P_ThreadTune.cli profile --dialog DialogInput_V9.txt
+#   python -m P_ThreadTune.cli helix --diameter 8 --pitch 1.25 --height 20 --spline-tol 0.001
+#   python -m P_ThreadTune.cli export --diameter 8 --pitch 1.25 --height 500 -o rod.stl
+#   python -m P_ThreadTune.cli coil --coil-dialog Coil_DialogInput_V10.txt -o coil.3mf
+#   python -m P_ThreadTune.cli history --recent 3 --threshold 25
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+from . import config
+from .lib import perf
+from .lib import threadgeom
+
+# Column of each dialog value in DialogInput_V9.txt & EDialogInput_V9.txt, with the dialog defaults
+THREAD_COLUMNS = {
+    'diameter': (0, '6'),
+    'pitch': (1, '1'),
+    'pitHelix': (2, '1'),
+    'height': (3, '10'),
+    'angleTop': (4, '30'),
+    'angleBot': (5, '30'),
+    'splinePts': (6, '18'),
+    'RightLeft': (8, 'R'),
+    'Starts': (9, '1'),
+    'MF_Gap': (17, '0.3'),
+    'splineTol': (24, '0'),
+}
+ENGLISH_DEFAULTS = {'diameter': '0.25', 'pitch': '20', 'pitHelix': '20', 'height': '1.0'}
+# Column of each value in Coil_DialogInput_V10.txt, with the dialog defaults
+COIL_COLUMNS = {
+    'CoilType': (0, '2'),
+    'Cdiameter': (1, '24.0'),
+    'Crevs': (2, '3'),
+    'Cheight': (3, '10'),
+    'Cpitch': (4, '1'),
+    'Cangle': (5, '0'),
+    'CsplinePts': (6, '20'),
+    'CSec_Type': (8, '1'),
+    'Cposition': (9, '2'),
+    'Cdia_Sect': (10, '2.0'),
+    'CpolySides': (11, '6'),
+    'CvertPos': (12, '1'),
+    'CellipseX': (13, '1.0'),
+    'CellipseY': (14, '2.0'),
+    'Crect_Wid': (15, '3'),
+    'Crect_Ht': (16, '6'),
+    'CPosRect': (17, '2'),
+    'CStarOut_Rad': (18, '5'),
+    'CStarIn_Rad': (19, '2.5'),
+    'CStar_Num': (20, '6'),
+    'CsplineTol': (21, '0'),
+}
+
+
+class Timer:
+    """Collects how long each named step takes, in ms."""
+    def __init__(self):
+        self.steps = {}
+        self.start = time.perf_counter()
+
+    def step(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.steps[name] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    def stats(self):
+        return dict(self.steps, total=round((time.perf_counter() - self.start) * 1000, 3))
+
+
+def read_dialog(path, columns, defaults=None):
+    """Values from the last line of a dialog file, missing files & short lines fall back to the defaults."""
+    values = {name: default for name, (col, default) in columns.items()}
+    values.update(defaults or {})
+    if path:
+        with open(path, newline='') as file:
+            rows = [row for row in csv.reader(file) if row]
+        if rows:
+            for name, (col, default) in columns.items():
+                if col < len(rows[-1]):
+                    values[name] = rows[-1][col]
+    return values
+
+
+def thread_values(args):
+    values = read_dialog(args.dialog, THREAD_COLUMNS, ENGLISH_DEFAULTS if args.english else None)
+    for name in THREAD_COLUMNS:
+        if getattr(args, name, None) is not None:
+            values[name] = getattr(args, name)
+    return values
+
+
+def thread_mm(values, english):
+    """OD, pitch, helix pitch & height in mm, English values are inches & threads per inch like the dialog."""
+    if english:
+        return (float(values['diameter']) * 25.4, 25.4 / float(values['pitch']),
+                25.4 / float(values['pitHelix']), float(values['height']) * 25.4)
+    return float(values['diameter']), float(values['pitch']), float(values['pitHelix']), float(values['height'])
+
+
+def thread_spec(values, english):
+    od, pit, pit_hlx, ht = thread_mm(values, english)
+    starts = int(values['Starts'])
+    if starts > 1:
+        pit_hlx = pit * starts                  # Same as ReCalcHelixPitch in the dialog
+    return threadgeom.ThreadSpec(od, pit, pit_hlx, float(values['angleTop']), float(values['angleBot'])), ht
+
+
+def spline_points(od, values):
+    """Spline points per revolution, from the tolerance when one is set like command_execute does."""
+    if float(values['splineTol']) > 0:
+        return threadgeom.points_for_tolerance(od / 2.0 + abs(float(values['MF_Gap'])), float(values['splineTol']))
+    return int(values['splinePts'])
+
+
+def rounded(points, places=6):
+    return [[round(float(v), places) for v in point] for point in points]
+
+
+def cmd_profile(args, timer):
+    values = thread_values(args)
+    spec, ht = thread_spec(values, args.english)
+    prof = timer.step('profile', threadgeom.thread_profile, spec)
+    result = {
+        'vertices': rounded(prof.vertices),
+        'x0': round(prof.x0, 6),
+        'r_min': round(prof.r_min, 6),
+        'yb_b': round(prof.yb_b, 6),
+        'yb_t': round(prof.yb_t, 6),
+    }
+    gap = float(values['MF_Gap'])
+    if gap:
+        result['real_offset'] = rounded(timer.step('real_offset', threadgeom.offset_profile, prof, gap))
+    return values, result
+
+
+def cmd_helix(args, timer):
+    values = thread_values(args)
+    spec, ht = thread_spec(values, args.english)
+    prof = timer.step('profile', threadgeom.thread_profile, spec)
+    pts = spline_points(spec.od, values)
+    pitch1 = spec.helix_pitch * .1
+    revs = 1
+    if args.long:
+        revs = int(ht / spec.helix_pitch) + 1
+    direction = -1 if values['RightLeft'] == 'L' else 1
+    samples = timer.step('sample', threadgeom.sample_curve, prof.r_min, pts, revs, z_pitch=pitch1,
+                         rail_radius=spec.od / 2.0 * .1, direction=direction)
+    result = {
+        'spline_points': pts,
+        'revolutions': revs,
+        'count': len(samples.path),
+        'deviation': round(threadgeom.spline_deviation(spec.od / 2.0, pts), 6),
+    }
+    if not args.summary:
+        result['path'] = rounded(samples.path)
+        result['rail'] = rounded(samples.rail)
+    return values, result
+
+
+def cmd_export(args, timer):
+    values = thread_values(args)
+    spec, ht = thread_spec(values, args.english)
+    direction = -1 if values['RightLeft'] == 'L' else 1
+    chunks = threadgeom.thread_triangles(spec, ht * .1, args.columns, int(values['Starts']), direction)
+    count = timer.step('export', write_mesh, args.output, chunks)
+    return values, {'output': args.output, 'triangles': count, 'bytes': os.path.getsize(args.output)}
+
+
+def coil_values(args):
+    values = read_dialog(args.coil_dialog, COIL_COLUMNS)
+    for name in COIL_COLUMNS:
+        if getattr(args, name, None) is not None:
+            values[name] = getattr(args, name)
+    return values
+
+
+def cmd_coil(args, timer):
+    values = coil_values(args)
+    direction = -1 if args.RightLeft == 'L' else 1
+    coil_type = values['CoilType']
+    revs = int(values['Crevs'])
+    rad1 = float(values['Cdiameter']) / 2.0 * .1
+    pitch1 = float(values['Cpitch']) * .1
+    ht1 = float(values['Cheight']) * .1
+    pts = int(values['CsplinePts'])
+    if float(values['CsplineTol']) > 0:
+        max_rad = threadgeom.coil_max_radius(coil_type, values['Cdiameter'], values['CSec_Type'], values['Cdia_Sect'],
+                                             values['CellipseX'], values['Crect_Wid'], values['CStarOut_Rad'],
+                                             values['Cpitch'], values['Crevs'], values['Cheight'], values['Cangle'])
+        pts = threadgeom.points_for_tolerance(max_rad, float(values['CsplineTol']), multiple=4)
+    stations = threadgeom.coil_stations(coil_type, pts, revs, pitch1, ht1, float(values['Cangle']), direction)
+    result = {'spline_points': pts, 'revolutions': revs, 'count': len(stations)}
+    if not args.summary:
+        result['path'] = rounded([(rad1 + dr) * math.cos(ang), (rad1 + dr) * math.sin(ang), dz] for ang, dr, dz in stations)
+    if args.output:
+        section = timer.step('section', threadgeom.coil_section, values['CSec_Type'], rad1, values['Cposition'],
+                             values['CvertPos'], float(values['Cdia_Sect']) * .1, int(values['CpolySides']),
+                             float(values['CellipseX']) * .1, float(values['CellipseY']) * .1,
+                             float(values['Crect_Wid']) * .1, float(values['Crect_Ht']) * .1, values['CPosRect'],
+                             float(values['CStarOut_Rad']) * .1, float(values['CStarIn_Rad']) * .1, int(values['CStar_Num']))
+        mesh = timer.step('mesh', threadgeom.sweep_mesh, [(x, -y) for x, y in section], stations)
+        result['triangles'] = timer.step('export', write_mesh, args.output, threadgeom.mesh_triangles(mesh))
+        result['output'] = args.output
+        result['bytes'] = os.path.getsize(args.output)
+    return values, result
+
+
+def cmd_history(args, timer):
+    values = {'db': args.db, 'recent': args.recent, 'threshold': args.threshold, 'min_ms': args.min_ms}
+    if not os.path.exists(args.db):
+        raise OSError(f'no build history at {args.db}')
+    changes = timer.step('report', perf.regression_report, args.db, args.recent, args.threshold, None, args.min_ms)
+    if not args.all:
+        changes = [change for change in changes if change.regressed]
+    result = {'regressions': sum(change.regressed for change in changes), 'stages': [change.as_dict() for change in changes]}
+    return values, result
+
+
+def write_mesh(path, chunks):
+    if path.lower().endswith('.3mf'):
+        return threadgeom.write_3mf(path, chunks)
+    return threadgeom.write_stl(path, chunks)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m P_ThreadTune.cli',
+                                     description='P_ThreadTune thread & coil geometry without Fusion 360.')
+    thread = argparse.ArgumentParser(add_help=False)
+    thread.add_argument('--dialog', help='DialogInput_V9.txt or EDialogInput_V9.txt to read the values from')
+    thread.add_argument('--english', action='store_true', help='Inches & threads per inch, like EDialogInput_V9.txt')
+    thread.add_argument('--diameter', help='Outside diameter, mm or inches')
+    thread.add_argument('--pitch', help='Pitch in mm or threads per inch')
+    thread.add_argument('--helix-pitch', dest='pitHelix', help='Helix pitch in mm or threads per inch')
+    thread.add_argument('--height', help='Length of the threads, mm or inches')
+    thread.add_argument('--angle-top', dest='angleTop', help='Top thread angle in degrees')
+    thread.add_argument('--angle-bot', dest='angleBot', help='Bottom thread angle in degrees')
+    thread.add_argument('--spline-pts', dest='splinePts', help='Spline points per revolution')
+    thread.add_argument('--spline-tol', dest='splineTol', help='Spline tolerance in mm, 0 uses --spline-pts')
+    thread.add_argument('--starts', dest='Starts', help='Number of thread starts, 1 to 6')
+    thread.add_argument('--gap', dest='MF_Gap', help='Gap between Male & Female threads in mm')
+    thread.add_argument('--hand', dest='RightLeft', choices=('R', 'L'), help='Right or Left hand threads')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('profile', parents=[thread], help='Thread profile points (cm, sketch coordinates)')
+    helix = sub.add_parser('helix', parents=[thread], help='Helix & guide rail spline points (cm)')
+    helix.add_argument('--long', action='store_true', help='Helix for the whole length like LongHelix, not one revolution')
+    helix.add_argument('--summary', action='store_true', help='Leave the points out of the output')
+    export = sub.add_parser('export', parents=[thread], help='STL or 3MF mesh of the threaded rod')
+    export.add_argument('-o', '--output', required=True, help='File to write, .stl or .3mf')
+    export.add_argument('--columns', type=int, default=config.EXPORT_COLUMNS, help='Points around each revolution')
+    coil = sub.add_parser('coil', help='Coil or spiral path points & an optional STL or 3MF mesh')
+    coil.add_argument('--coil-dialog', help='Coil_DialogInput_V10.txt to read the values from')
+    coil.add_argument('--coil-type', dest='CoilType', choices=('1', '2', '3', '4'),
+                      help='1 Revolutions & Height, 2 Revolutions & Pitch, 3 Height & Pitch, 4 Spiral')
+    coil.add_argument('--diameter', dest='Cdiameter', help='Coil diameter in mm')
+    coil.add_argument('--revs', dest='Crevs', help='Number of revolutions')
+    coil.add_argument('--height', dest='Cheight', help='Coil height in mm')
+    coil.add_argument('--pitch', dest='Cpitch', help='Coil pitch in mm')
+    coil.add_argument('--angle', dest='Cangle', help='Coil angle in degrees')
+    coil.add_argument('--spline-pts', dest='CsplinePts', help='Spline points per revolution')
+    coil.add_argument('--spline-tol', dest='CsplineTol', help='Spline tolerance in mm, 0 uses --spline-pts')
+    coil.add_argument('--hand', dest='RightLeft', choices=('R', 'L'), default='R', help='Right or Left hand spiral')
+    coil.add_argument('-o', '--output', help='File to write, .stl or .3mf')
+    coil.add_argument('--summary', action='store_true', help='Leave the points out of the output')
+    history = sub.add_parser('history', help='Stages of the builds in the history that got slower')
+    history.add_argument('--db', default=config.HISTORY_DB, help='Build history database')
+    history.add_argument('--recent', type=int, default=config.HISTORY_RECENT, help='Newest builds of each part to compare')
+    history.add_argument('--threshold', type=float, default=config.HISTORY_REGRESSION, help='Percent slower that is a regression')
+    history.add_argument('--min-ms', dest='min_ms', type=float, default=config.HISTORY_MIN_MS, help='Least ms slower that is a regression')
+    history.add_argument('--all', action='store_true', help='List every stage, not only the slower ones')
+    return parser
+
+
+COMMANDS = {'profile': cmd_profile, 'helix': cmd_helix, 'export': cmd_export, 'coil': cmd_coil, 'history': cmd_history}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    timer = Timer()
+    try:
+        values, result = COMMANDS[args.command](args, timer)
+    except (ValueError, ZeroDivisionError, IndexError, OSError) as e:
+        print(f'{args.command}: {e}', file=sys.stderr)
+        return 1
+    json.dump({'command': args.command, 'values': values, 'result': result, 'timing_ms': timer.stats()}, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+# Build context used by command_execute while it draws the threads, bolt head, nut & chamfers.
+# Every sketch made through add_sketch has its compute deferred, so Fusion does not re-solve
+# the sketch after each line or spline point is added. A sketch has to be computed before its
+# profiles or curves are used by a feature, call compute() for that.
+# The Fusion API has no switch to hold off the timeline recompute itself, the features still
+# compute as they are added, so deferring the sketches is as far as the API lets us go.
+# On the way out, even when the build fails, every sketch is computed again & the general
+# precision the pattern code changes is put back to what the user had.
+
+import adsk.core, adsk.fusion
+from ...lib import fusion360utils as futil
+
+
+class BuildContext:
+    def __init__(self, preferences: adsk.core.Preferences):
+        self.preferences = preferences
+        self.sketches = []
+        self.general_precision = None
+
+    def __enter__(self):
+        self.general_precision = self.preferences.unitAndValuePreferences.generalPrecision
+        self.sketches = []
+        return self
+
+    def add_sketch(self, sketches: adsk.fusion.Sketches, plane) -> adsk.fusion.Sketch:
+        """Adds a sketch on plane with its compute deferred."""
+        sketch = sketches.add(plane)
+        sketch.isComputeDeferred = True
+        self.sketches.append(sketch)
+        return sketch
+
+    def compute(self, sketch: adsk.fusion.Sketch) -> adsk.fusion.Sketch:
+        """Turns the deferred compute off so the profiles & curves are up to date."""
+        if sketch.isValid and sketch.isComputeDeferred:
+            sketch.isComputeDeferred = False
+        return sketch
+
+    def __exit__(self, exc_type, exc_value, tb):
+        for sketch in self.sketches:
+            try:
+                self.compute(sketch)
+            except:
+                futil.handle_error('BuildContext compute sketch')
+        self.sketches = []
+        if exc_type is not None:
+            self.preferences.unitAndValuePreferences.generalPrecision = self.general_precision
+        return False
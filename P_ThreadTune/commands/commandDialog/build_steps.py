@@ -0,0 +1,77 @@
+# Runs a build one stage at a time, so Fusion 360 stays responsive while long bolts & coils are drawn.
+# command_execute hands over a generator that yields the name of each stage just before it draws it
+# (profile sketch, helix splines, sweep, each pattern or join block ...). Every stage is drawn by one
+# custom event, which fires the event again for the next stage, so in between Fusion gets to redraw
+# & to handle the Cancel button of the progress dialog.
+# Cancel closes the generator, which unwinds the BuildContext the same as a failed build, & takes
+# the design back to where it was before the build, the timeline is rolled back to Tstart & whatever
+# was drawn after it is deleted. Direct modeling has no timeline, the new components are deleted.
+# A stage that raises is rolled back the same way before the error is passed on.
+# roll_back does the same for anything else that only draws for a while, like the template pre-warm.
+
+import time
+import adsk.core, adsk.fusion
+
+
+def roll_back(design: adsk.fusion.Design, tstart: int, occurrences: int):
+    """Deletes everything after timeline position tstart, or the root occurrences after the 1st occurrences in direct modeling."""
+    if design.designType == adsk.fusion.DesignTypes.ParametricDesignType:
+        timeline = design.timeline
+        timeline.markerPosition = tstart
+        timeline.deleteAllAfterMarker()
+    else:
+        rootOccurrences = design.rootComponent.occurrences
+        for i in range(rootOccurrences.count - 1, occurrences - 1, -1):
+            rootOccurrences.item(i).deleteMe()
+
+
+class StepRunner:
+    def __init__(self, app: adsk.core.Application, stages, tstart: int, seconds: float, title: str):
+        self.app = app
+        self.design = app.activeProduct
+        self.stages = stages
+        self.tstart = tstart
+        self.occurrences = self.design.rootComponent.occurrences.count
+        self.seconds = max(seconds, 1.0)
+        self.title = title
+        self.event_id = None
+        self.progress = None
+        self.start_time = None
+
+    def start(self, event_id: str):
+        """Shows the progress dialog & fires the custom event for the 1st stage."""
+        self.event_id = event_id
+        self.start_time = time.time()
+        self.progress = self.app.userInterface.createProgressDialog()
+        self.progress.isCancelButtonShown = True
+        self.progress.show(self.title, 'Starting %p%', 0, 100, 0)
+        self.app.fireCustomEvent(self.event_id)
+
+    def step(self) -> bool:
+        """Draws the next stage, False once the build is finished or cancelled."""
+        if self.progress.wasCancelled:
+            self.cancel()
+            return False
+        try:
+            stage = next(self.stages)
+        except StopIteration:
+            self.progress.hide()
+            return False
+        except:
+# A stage that fails leaves the build half drawn, take it away the same as Cancel does
+            self.progress.hide()
+            roll_back(self.design, self.tstart, self.occurrences)
+            raise
+# The stages are far from equal, so the percent is the time so far against the estimated build time
+        percent = int(100 * (time.time() - self.start_time) / self.seconds)
+        self.progress.message = f'{stage} %p%'
+        self.progress.progressValue = min(percent, 99)
+        self.app.fireCustomEvent(self.event_id)
+        return True
+
+    def cancel(self):
+        """Stops the build & removes everything it drew."""
+        self.stages.close()
+        if self.progress is not None:
+            self.progress.hide()
+        roll_back(self.design, self.tstart, self.occurrences)
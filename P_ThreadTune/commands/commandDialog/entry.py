@@ -5,10 +5,17 @@ import adsk.core, adsk.fusion, traceback
 import math
 import os
 import csv
-import time
+import contextlib
+import functools
+import hashlib
 
 from ...lib import fusion360utils as futil
+from ...lib import threadgeom
+from ...lib import perf
+from ...lib import templates
 from ... import config
+from .build_context import BuildContext
+from .build_steps import StepRunner, roll_back
 app = adsk.core.Application.get()
 design = app.activeProduct
 rootComp = design.rootComponent
@@ -33,6 +40,84 @@ ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resource
 # Local list of event handlers used to maintain a reference so
 # they are not released and garbage collected.
 local_handlers = []
+Build = None            # BuildContext while command_execute is drawing, sketches are deferred through it
+Preview_Group = None    # Custom graphics of the live preview
+Spans = None            # perf.SpanRecorder timing the stages while command_execute is drawing
+Cost_Model = None       # perf.CostModel fitted from the build history when the dialog opens
+Step_Event = None       # Custom event that draws the next stage of a build, registered by start()
+Running = None          # StepRunner of the build being drawn a stage at a time
+Build_Profile = None    # perf.ProfileSession of that build with config.PROFILE on, saved once it is done
+Build_Values = None     # Dialog text the drawing routines read, kept for the build as the inputs go when the dialog closes
+Thread_Seed = None      # TemporaryBRepManager copy of the bolt's one revolution, the nut threads are offset from it
+STEP_EVENT_ID = f'{CMD_ID}_build_step'
+CACHE_GROUP = CMD_NAME  # Attribute group of the dialog values hash each built component is tagged with
+OTHER_HAND = {'R': 'L', 'L': 'R', 'Right': 'Left', 'Left': 'Right'}
+# 2nd command, builds the thread template of every size in the catalogs with the last dialog values
+PREWARM_ID = f'{CMD_ID}_prewarm'
+PREWARM_NAME = 'P_ThreadTune Templates'
+PREWARM_Description = 'Pre-warm the thread template library for every size in metric_V3.csv & English_V3.csv'
+# Add a sketch, with its compute deferred when there is a BuildContext
+def AddSketch(sketches, plane):
+    if Build:
+        return Build.add_sketch(sketches, plane)
+    return sketches.add(plane)
+# Compute a deferred sketch before its profiles or curves are used
+def ComputeSketch(sketch):
+    if Build:
+        Build.compute(sketch)
+    return sketch
+# Time a stage of the build when command_execute is recording spans
+def Span(stage):
+    if Spans is None:
+        return contextlib.nullcontext()
+    return Spans.span(stage)
+# Text of a dialog input, from Build_Values while a build is being drawn
+def DialogText(name, input):
+    if Build_Values is not None:
+        return Build_Values[name]
+    return input.text
+# Arcs per revolution of the NurbsHelix & BRepHelix helices of Pitch mm, enough to keep them within the Helix Tolerance if it is set
+def NurbsSpans(Pitch):
+    tolerance = float(DialogText('splineTol', _splineTol))
+    if tolerance > 0:
+        return threadgeom.spans_for_tolerance(Pitch, tolerance)
+    return config.NURBS_SPANS_PER_TURN
+# Draw every stage of a build generator straight through, when there is no custom event to step it
+def RunStages(stages):
+    for stage in stages:
+        pass
+# Run the Spans clock only while a stage draws, not while the build waits for the custom event of the next one
+def SpanStages(stages):
+    try:
+        while True:
+            if Spans is not None:
+                Spans.resume()
+            try:
+                stage = next(stages)
+            except StopIteration:
+                return
+            if Spans is not None:
+                Spans.pause()
+            yield stage
+    finally:
+        stages.close()                      # Cancel closes this one, the build has to unwind too
+# With config.PROFILE on, run the event handler under cProfile, keep a .prof of it & log the slowest functions.
+# A build drawn a stage at a time is profiled on through its build_step events, it is saved once it is done
+def Profiled(handler):
+    @functools.wraps(handler)
+    def wrapper(args):
+        global Build_Profile
+        if not config.PROFILE:
+            return handler(args)
+        session = Build_Profile or perf.ProfileSession(lambda: handler.__name__ + '_' + globals().get('Body_Name', CMD_NAME))
+        try:
+            return session.call(handler, args)
+        finally:
+            Build_Profile = session if Running is not None else None
+            if Build_Profile is None:
+                run = session.save(config.PROFILE_FOLDER, config.PROFILE_HISTORY, config.PROFILE_TOP_N)
+                futil.log(f'{run.summary}\nSaved to {run.path}', force_console=True)
+    return wrapper
 # Create a new occurrence (component).
 def CreateNewComponent(Body_Name):
     allOccs = rootComp.occurrences
@@ -41,65 +126,61 @@ def CreateNewComponent(Body_Name):
     subComp1 = occ1.component
     subComp1.name = Body_Name
     return(subComp1)
+# Convert a list of (x, y) tuples from the threadgeom routines into sketch points
+def to_Point3D(pts):
+    return [adsk.core.Point3D.create(x, y, 0) for x, y in pts]
+# Convert the sampled (x, y, z) coordinates into the points collection used for a spline
+def to_ObjectCollection(coords):
+    if hasattr(coords, 'tolist'):
+        coords = coords.tolist()                    # NumPy array from threadgeom
+    points = adsk.core.ObjectCollection.create()
+    for x, y, z in coords:
+        points.add(adsk.core.Point3D.create(x, y, z))
+    return points
+# Fit the sampled coordinates as a chain of splines of at most config.SPLINE_SEGMENT_PTS points, fitting
+# & sweeping get much slower as one spline gets more points. Each segment starts on the end point of the
+# one before it & a smooth constraint keeps the joint curvature continuous. Returns the splines for createPath
+def AddSplinePath(sketch, coords):
+    if hasattr(coords, 'tolist'):
+        coords = coords.tolist()                    # NumPy array from threadgeom
+    sketchSplines = sketch.sketchCurves.sketchFittedSplines
+    splines = adsk.core.ObjectCollection.create()
+    spline = None
+    for start, stop in threadgeom.spline_segments(len(coords), config.SPLINE_SEGMENT_PTS):
+        points = adsk.core.ObjectCollection.create()
+        if spline is not None:
+            points.add(spline.endSketchPoint)       # Share the joint point so the segments are connected
+            start += 1
+        for x, y, z in coords[start:stop]:
+            points.add(adsk.core.Point3D.create(x, y, z))
+        last = spline
+        spline = sketchSplines.add(points)
+        if last is not None:
+            sketch.geometricConstraints.addSmooth(last, spline)
+        splines.add(spline)
+    return splines
+# Convert a threadgeom.NurbsCurve into the curve used for a fixed spline
+def to_NurbsCurve3D(curve):
+    controlPoints = [adsk.core.Point3D.create(x, y, z) for x, y, z in curve.control_points]
+    return adsk.core.NurbsCurve3D.createRational(controlPoints, curve.degree, curve.knots, curve.weights, False)
+# Convert a threadgeom.NurbsSurface into a surface for a BRep face
+def to_NurbsSurface(surface):
+    controlPoints = []
+    weights = []
+    for row, row_w in zip(surface.control_points, surface.weights):
+        controlPoints += [adsk.core.Point3D.create(x, y, z) for x, y, z in row]
+        weights += row_w
+    return adsk.core.NurbsSurface.create(surface.degree_u, surface.degree_v, len(surface.control_points), len(surface.control_points[0]),
+                                         controlPoints, surface.knots_u, surface.knots_v, weights,
+                                         adsk.core.NurbsSurfaceProperties.OpenNurbsSurface, adsk.core.NurbsSurfaceProperties.OpenNurbsSurface)
+def Real_offset(pts):
+# Offset points for each line segment, the math is in threadgeom.real_offset
+    offset_distance = (abs(float(DialogText('MF_Gap', _MF_Gap))) * 0.1) * 1 
+    points = [(P.x, P.y) for P in pts]
+    return to_Point3D(threadgeom.real_offset(points, offset_distance))
 ###############################################################################################
 #############  Following routines below were generated from ChatGPT on 5/13/2024  #############
 ###############################################################################################
-# The generated code had to be adjusted some to work within the framework of my program
-def offset_point(px, py, ox, oy, distance):
-#Offset a point (px, py) in the direction (ox, oy) by a specified distance.
-    norm = math.sqrt(ox**2 + oy**2)
-    return (px + distance * ox / norm, py + distance * oy / norm)
-def det(a, b):
-    return a[0] * b[1] - a[1] * b[0]
-def line_intersection(l1, l2):
-#Find the intersection of two lines given by points l1 and l2.
-    xdiff = (l1[0].x - l1[1].x, l2[0].x - l2[1].x)
-    ydiff = (l1[0].y - l1[1].y, l2[0].y - l2[1].y)
-    div = det(xdiff, ydiff)
-    if div == 0:
-       raise Exception('Lines do not intersect')
-    d = (det((l1[0].x, l1[0].y), (l1[1].x, l1[1].y)), det((l2[0].x, l2[0].y), (l2[1].x, l2[1].y)))
-    x = det(d, xdiff) / div
-    y = det(d, ydiff) / div
-    return adsk.core.Point3D.create(x, y, 0)
-# Offsetting direction is perpendicular to the line segment direction
-def perpendicular_vector(px, py):
-    return -py, px
-def Real_offset(pts):
-# Offset points for each line segment
-    P1 = pts[0]
-    P2 = pts[1]
-    P3 = pts[2]
-    P4 = pts[3]
-    P5 = pts[4]
-    P6 = pts[5]
-    offset_distance = (abs(float(_MF_Gap.text)) * 0.1) * 1 
-    points = [
-        (P1.x, P1.y), 
-        (P2.x, P2.y), 
-        (P3.x, P3.y), 
-        (P4.x, P4.y), 
-        (P5.x, P5.y), 
-        (P6.x, P6.y)
-    ]
-# Offset points for each line segment
-    offsets = []
-    for i in range(len(points) - 1):
-        p_start = points[i]
-        p_end = points[i + 1]
-        direction = perpendicular_vector(p_end[0] - p_start[0], p_end[1] - p_start[1])
-        offset_start = offset_point(p_start[0], p_start[1], direction[0], direction[1], offset_distance)
-        offset_end = offset_point(p_end[0], p_end[1], direction[0], direction[1], offset_distance)
-        offsets.append((
-            adsk.core.Point3D.create(offset_start[0], offset_start[1], 0),
-            adsk.core.Point3D.create(offset_end[0], offset_end[1], 0)
-        ))
-# Find intersections of consecutive offset lines
-    vertex_points = []
-    for i in range(len(offsets) - 1):
-        vertex_point = line_intersection(offsets[i], offsets[i + 1])
-        vertex_points.append(vertex_point)
-    return vertex_points
 ##########################################################################
 def draw_regular_polygon(sketch, num_sides, rad):
 # Calculate the coordinates of the polygon's vertices
@@ -131,16 +212,6 @@ def create_offset_plane_from_xy(subComp1, construction_plane, offset_distance):
     offset_plane = planes.add(offset_plane_input)
     return offset_plane
 ##########################################################################
-def create_circle_sketch_on_plane(subComp1, plane, radius):
-# Get the sketches collection of the root component.
-    sketches = subComp1.sketches
-# Create a sketch on the given plane.
-    sketch = sketches.add(plane)
-# Draw a circle at the origin with the given radius.
-    center_point = adsk.core.Point3D.create(0, 0, 0)
-    sketch.sketchCurves.sketchCircles.addByCenterRadius(center_point, radius)
-    return sketch
-##########################################################################
 def DrawBoltHead(subComp1, BoltFlat_Dia, num_sides, BoltHd_Ht):
     Flat_OD = BoltFlat_Dia * .1         # Diameter between Flats
     Flat_Rad = Flat_OD / 2              # Rad of Flat Diamter
@@ -151,12 +222,12 @@ def DrawBoltHead(subComp1, BoltFlat_Dia, num_sides, BoltHd_Ht):
 
     sketches = subComp1.sketches
     xyPlane = subComp1.xYConstructionPlane
-    sketch_Head = sketches.add(xyPlane)
+    sketch_Head = AddSketch(sketches, xyPlane)
     sketch_Head.name = "sketch_Head"
 # Draw the regular polygon
     draw_regular_polygon(sketch_Head, num_sides, Rad)
 # Get the profile defined by the Polygon.
-    profPoly = sketch_Head.profiles.item(0)
+    profPoly = ComputeSketch(sketch_Head).profiles.item(0)
     Ht2 = adsk.core.ValueInput.createByReal(-BoltHd_Ht * .1)
     extrudes = subComp1.features.extrudeFeatures
     extrudes.addSimple(profPoly, Ht2, adsk.fusion.FeatureOperations.JoinFeatureOperation)
@@ -172,12 +243,12 @@ def DrawNut(subComp1, NutFlat_Dia, num_sides, NutHd_Ht, Pitch):
 # Get the XY construction plane.
     xy_plane = create_offset_plane_from_xy
     offset_plane = create_offset_plane_from_xy(subComp1, xy_plane, float(Pitch * .1))
-    sketch_Nut = sketches.add(offset_plane)
+    sketch_Nut = AddSketch(sketches, offset_plane)
     sketch_Nut.name = "sketch_Nut"
 # Draw the regular polygon
     draw_regular_polygon(sketch_Nut, num_sides, Rad)
 # Get the profile defined by the Polygon.
-    profPoly = sketch_Nut.profiles.item(0)
+    profPoly = ComputeSketch(sketch_Nut).profiles.item(0)
     Ht2 = adsk.core.ValueInput.createByReal(NutHd_Ht * .1)
     extrudes = subComp1.features.extrudeFeatures
     extrudes.addSimple(profPoly, Ht2, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
@@ -195,7 +266,7 @@ def ChamferTopThreads(subComp1, Rad, Ht, Ch_Wid):
     P2 = adsk.core.Point3D.create(Rd1, -Y2, 0)
     P3 = adsk.core.Point3D.create(Rd1, -Ht1, 0)
     sketches = subComp1.sketches
-    sketch_Chamfer = sketches.add(subComp1.xZConstructionPlane)
+    sketch_Chamfer = AddSketch(sketches, subComp1.xZConstructionPlane)
     sketch_Chamfer.name = "Chamfer_Thread"
     sketch_Rev = sketch_Chamfer.sketchCurves.sketchLines
 # Draw a line to use as the axis of revolution.
@@ -204,7 +275,7 @@ def ChamferTopThreads(subComp1, Rad, Ht, Ch_Wid):
     sketch_Rev.addByTwoPoints(P2,P3)
     sketch_Rev.addByTwoPoints(P3,P1)
 # Get the profile defined by the Chamfer.
-    prof = sketch_Chamfer.profiles.item(0)
+    prof = ComputeSketch(sketch_Chamfer).profiles.item(0)
 # Create an revolution input to be able to define the input needed for a revolution
 # while specifying the profile and that a new component is to be created
     revolves = subComp1.features.revolveFeatures
@@ -240,7 +311,7 @@ def ChamferNut(subComp1, OD1, Pit, PitHlx, Ht, Ch_Wid, iTY_Char):
         P15 = adsk.core.Point3D.create(0, -Ht1, 0)
 
         sketches = subComp1.sketches
-        sketch_Chamfer = sketches.add(subComp1.xZConstructionPlane)
+        sketch_Chamfer = AddSketch(sketches, subComp1.xZConstructionPlane)
         sketch_Chamfer.name = "Chamfer_Thread"
         sketch_Rev = sketch_Chamfer.sketchCurves.sketchLines
 # Draw a line to use as the axis of revolution.
@@ -262,7 +333,7 @@ def ChamferNut(subComp1, OD1, Pit, PitHlx, Ht, Ch_Wid, iTY_Char):
             sketch_Rev.addByTwoPoints(P13,P14)
             sketch_Rev.addByTwoPoints(P14,P15)
 # Get the profile defined by the Chamfer.
-        prof = sketch_Chamfer.profiles.item(0)
+        prof = ComputeSketch(sketch_Chamfer).profiles.item(0)
         profiles = adsk.core.ObjectCollection.create()
         profiles.add(prof)
 # Create an revolution input to be able to define the input needed for a revolution
@@ -281,19 +352,12 @@ def count_sketch_profiles(sketch):
             profile_count += 1
     return profile_count
 ##########################################################################
-def DrawCylinder(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, iflag, iTY_Char):
-    sketches = subComp1.sketches
-    xyPlane = subComp1.xYConstructionPlane
-    sketch_Cyl = sketches.add(xyPlane)
-    sketch_Cyl.name = "Sketch_Cylinder"
+def DrawCylinder(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, iflag, iTY_Char, Cham=None):
 # Draw a circle.
     circles = sketch_Helix.sketchCurves.sketchCircles
     circles.addByCenterRadius(adsk.core.Point3D.create(0, 0, 0), R_Min)
-    circles1 = sketch_Cyl.sketchCurves.sketchCircles
-    circles1.addByCenterRadius(adsk.core.Point3D.create(0, 0, 0), (Rad * .1) + .01)
 # Get the profile defined by the circle.
-    profCir = sketch_Helix.profiles.item(0)
-    profCir1 = sketch_Cyl.profiles.item(0)
+    profCir = ComputeSketch(sketch_Helix).profiles.item(0)
     Ht2 = adsk.core.ValueInput.createByReal(Ht1)
     extrudes = subComp1.features.extrudeFeatures
     try:
@@ -301,30 +365,37 @@ def DrawCylinder(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, iflag,
     except:
         extrudes.addSimple(profCir, Ht2, adsk.fusion.FeatureOperations.CutFeatureOperation)           # sometimes Joining does not work, so if it fails try cutting 1st
         extrudes.addSimple(profCir, Ht2, adsk.fusion.FeatureOperations.JoinFeatureOperation)          # Then join it & that worked for the problem I had with it
-# Cut the threads that are below origin
-    Ht3 = adsk.core.ValueInput.createByReal(-((YB_B * 2) + (PitHlx * 2 * .1)))
-    try:
-        extrudes.addSimple(profCir1, Ht3, adsk.fusion.FeatureOperations.CutFeatureOperation)
-    except:
-        msg = 'Last Cut Feature below origin in DrawCylinder failed for some reason, but might not be a problem'
-        ui.messageBox(msg,"Warning", adsk.core.MessageBoxButtonTypes.OKButtonType, adsk.core.MessageBoxIconTypes.WarningIconType)
-# Get the XY construction plane.
-    xy_plane = create_offset_plane_from_xy
-# Create the offset plane.
-    Ht4 = float(Ht1)
-    Ht5 = adsk.core.ValueInput.createByReal(YB_T * 2 + PitHlx * 2 * .1)
-    offset_plane = create_offset_plane_from_xy(subComp1, xy_plane,Ht4)
-# Create sketch on the offset plane and draw a circle.
-    sketchTop = create_circle_sketch_on_plane(subComp1, offset_plane, (Rad * .1) + .01)
-    profCir2 = sketchTop.profiles.item(0)
+# Cut the threads below the origin & above the top flush, with one revolve of 2 profiles on the XZ plane (Y is -Z there).
+# Cham is the (radius, width) in mm of a chamfer on the top of the threads, it is part of the top profile
+    R_Cut = (Rad * .1) + .01
+    Y_Bot = (YB_B * 2) + (PitHlx * 2 * .1)
+    Y_Top = Ht1 + (YB_T * 2) + (PitHlx * 2 * .1)
+    sketch_Trim = AddSketch(subComp1.sketches, subComp1.xZConstructionPlane)
+    sketch_Trim.name = "Trim_Threads"
+    axisLine = sketch_Trim.sketchCurves.sketchLines.addByTwoPoints(adsk.core.Point3D.create(0, Y_Bot, 0), adsk.core.Point3D.create(0, -Y_Top, 0))
+    bottom = [adsk.core.Point3D.create(0, 0, 0), adsk.core.Point3D.create(R_Cut, 0, 0), adsk.core.Point3D.create(R_Cut, Y_Bot, 0), adsk.core.Point3D.create(0, Y_Bot, 0)]
+    draw_lines_between_points(sketch_Trim, bottom, iflag)
+    top = [adsk.core.Point3D.create(0, -Ht1, 0)]
+    if Cham is not None:
+# Same 45 degree line as ChamferTopThreads, it starts a hair above the top so it is cut off where it crosses the top
+        CW = abs(Cham[1]) * .1
+        Ht_Cham = Ht1 + .001
+        P1 = adsk.core.Point3D.create(Cham[0] * .1 - CW, -Ht_Cham, 0)
+        P2 = adsk.core.Point3D.create(Cham[0] * .1 + .001, -(Ht_Cham - CW), 0)
+        top += [findIntersection(P1, P2, top[0], adsk.core.Point3D.create(R_Cut, -Ht1, 0)), P2, adsk.core.Point3D.create(P2.x, -Ht1, 0)]
+    top += [adsk.core.Point3D.create(R_Cut, -Ht1, 0), adsk.core.Point3D.create(R_Cut, -Y_Top, 0), adsk.core.Point3D.create(0, -Y_Top, 0)]
+    draw_lines_between_points(sketch_Trim, top, iflag)
+    profiles = adsk.core.ObjectCollection.create()
+    for prof in ComputeSketch(sketch_Trim).profiles:
+        profiles.add(prof)
+    revolves = subComp1.features.revolveFeatures
+    revInput = revolves.createInput(profiles, axisLine, adsk.fusion.FeatureOperations.CutFeatureOperation)
+    revInput.setAngleExtent(False, adsk.core.ValueInput.createByReal(math.pi * 2.0))
     try:
-        extrudes.addSimple(profCir2, Ht5, adsk.fusion.FeatureOperations.CutFeatureOperation)
+        revolves.add(revInput)
     except:
         msg = 'Last Cut Feature of DrawCylinder failed for some reason, but might not be a problem'
         ui.messageBox(msg,"Warning", adsk.core.MessageBoxButtonTypes.OKButtonType, adsk.core.MessageBoxIconTypes.WarningIconType)
-# For some reaason this sketch stays turned on when drawing the cylinder for the Nut threads
-    if sketch_Cyl.isVisible:
-        sketch_Cyl.isVisible = False
 ##########################################################################
 def DrawHelix(subComp1, sketch_Helix, C_Min, Rad, Pitch, Ht, Ht1, sPts, G_Rail, RL_thread, prof, iflag):
     global Vert_Line
@@ -332,43 +403,38 @@ def DrawHelix(subComp1, sketch_Helix, C_Min, Rad, Pitch, Ht, Ht1, sPts, G_Rail,
     rev = int(Ht / Pitch) + 1               # Number of revolutions, add one to it so we don't do a partial revolution
     Pitch2 = Pitch * 0.1
     Pitch1 = round(Pitch2, 6)
-# Create an object collection for the points.
-    sketchSplines = sketch_Helix.sketchCurves.sketchFittedSplines
     sketchCenter = sketch_Helix.sketchCurves.sketchLines    # used for Centerline Guide Rail, does not work as well as Helix
     P0 = adsk.core.Point3D.create(0,0,0)
     Vert_Line = sketchCenter.addByTwoPoints(P0,P10)         # Draw Center Vertical for Guide Rail with Sweeep
-    Z0 = 0.0
     Rad1 = Rad * .1
-    ang1 = 360.0 / sPts                             # Increment angle in degrees between horizontal spline points
-    ang_R = ang1 * math.pi / 180                    # Increment angle in radians between horizontal spline points
+    direction = 1
     if RL_thread == 'L':
-        ang_R = ang_R * -1                          # Left hand threads increment in the negative direction
-    Z_inc = Pitch1 / sPts                           # Z increment amount between spline points
-    sPts_Total = sPts                               # Number of spline points for 1 revolution of Helix
+        direction = -1                              # Left hand threads increment in the negative direction
+    revs = 1                                        # One revolution of Helix
     if G_Rail == 'L':
-        sPts_Total = sPts * rev                     # Number of spline points for Continuous Long Helix
-    Icount = 0                                      # Initalize Loop counter
-    ang = 0                                         # Set beginning angle of Helix spline poing
-    points = adsk.core.ObjectCollection.create()    # Create the points collection for the inner Helix Path
-    points1 = adsk.core.ObjectCollection.create()   # Create the points collection for the outer Helix Guide Rail
+        revs = rev                                  # Continuous Long Helix
     pts = calcPts(Rad * 2, Pitch, Pitch1)           # Run this to get R_Min
     R_Min1 = pts[7]
-    while (Icount <= sPts_Total):
-        x = R_Min1 * math.cos(ang)                  # Helix x, y points along inside Radius minus .1mm to connect multiple threads
-        y = R_Min1 * math.sin(ang)
-        z = Z0
-        Z0 = Z0 + Z_inc                             # Increment the Z to get to next spline Z coordinate
-        if G_Rail != 'C':
-            x1 = Rad1 * math.cos(ang)               # Helix x, y points along outside radius of thread
-            y1 = Rad1 * math.sin(ang)
-            points1.add(adsk.core.Point3D.create(x1, y1, z))     # Need 2nd spline for guide rail
-        points.add(adsk.core.Point3D.create(x, y, z))
-        ang = ang + ang_R                           # Increment angle for next coordiante in loop
-        Icount = Icount + 1                         # increment loop counter
-    spline = sketchSplines.add(points)              # Create the inner spline helix from points
+# Helix x, y points along inside Radius to connect multiple threads & along outside radius of thread for the guide rail
+    rail_Rad = None
     if G_Rail != 'C':
-        spline1 = sketchSplines.add(points1)        # Create the outer spline helix from points
-        guide = subComp1.features.createPath(spline1)        
+        rail_Rad = Rad1                             # Need 2nd spline for guide rail
+    yield 'helix splines'
+    with Span('helix splines'):
+        if G_Rail == 'N':
+# Rational NURBS helix, needs only a few arcs per revolution instead of sPts fitted points
+            spans = NurbsSpans(Pitch)
+            fixedSplines = sketch_Helix.sketchCurves.sketchFixedSplines
+            spline = fixedSplines.addByNurbsCurve(to_NurbsCurve3D(threadgeom.helix_nurbs(R_Min1, Pitch1, revs, direction, spans)))
+            spline1 = fixedSplines.addByNurbsCurve(to_NurbsCurve3D(threadgeom.helix_nurbs(Rad1, Pitch1, revs, direction, spans)))
+        else:
+            samples = threadgeom.sample_curve(R_Min1, sPts, revs, z_pitch=Pitch1, rail_radius=rail_Rad, direction=direction)
+            spline = AddSplinePath(sketch_Helix, samples.path)          # Create the inner spline helix from points
+            if G_Rail != 'C':
+                spline1 = AddSplinePath(sketch_Helix, samples.rail)    # Create the outer spline helix from points
+        ComputeSketch(sketch_Helix)                     # The helix has to be computed before making paths from it
+    if G_Rail != 'C':
+        guide = subComp1.features.createPath(spline1)
     path = subComp1.features.createPath(spline)
     guideLine = subComp1.features.createPath(Vert_Line)     # Guide for Centerline in case user wants that option
 # Create a sweep input
@@ -380,14 +446,15 @@ def DrawHelix(subComp1, sketch_Helix, C_Min, Rad, Pitch, Ht, Ht1, sPts, G_Rail,
         sweepInput.guideRail = guide            # Default guide rail is the outer Helix
     sweepInput.profileScaling = adsk.fusion.SweepProfileScalingOptions.SweepProfileScaleOption
 # Create the sweep.
-    sweeper = sweeps.add(sweepInput)              # This seems to be the slowest part of the code
+    yield 'sweep'
+    with Span('sweep'):
+        sweeper = sweeps.add(sweepInput)              # This seems to be the slowest part of the code
     if iflag < 1:
         body1 = sweeper.bodies.item(0)
         body1.name = Body_Name                  # rename body to most of input parameters from main routine
 ##########################################################################
 def ReCalcHelixPitch(idx):
-    idx_array = [1, 2, 4]                           # 1 start, 2 start, 4 start
-    x = idx_array[idx]
+    x = idx + 1                                     # Starts dropdown is 1 Start to 6 Start
     pit = _pitch.text         # ReCalcHelix does not access global variable pitch for some reason, so get it from dialog box
     _pitHelix.text = repr(float(pit) * x)    # Set the pitch of the helix
 def CalcThread(iTest):
@@ -440,83 +507,13 @@ def calcPts(OD, Pitch, PitHlx1):
     global YB_B                                 # These 2 are used for cutting bottom & top of threads flush
     global YB_T
     global AngT, AngB
-    PI1 = math.pi
-# We want to use the absolute value of largest angle to use with formulas to get R_Min
-    angleTop = _angleTop.text
-    angleBot = _angleBot.text
-    AngT = float(angleTop)
-    AngB = float(angleBot)
-    abs_angT = abs(AngT)
-    abs_angB = abs(AngB)
-    ang = abs_angB
-    if abs_angT < abs_angB:
-        ang = abs_angT
-    if ang == 0.0:
-        ang = 30.0
-    if AngT < 0 and AngB < 0:
-        if abs_angT > abs_angB:
-            ang = AngT
-        else:
-            ang = AngB
-    T_Ang = math.tan(float(AngT) * PI1/float(180.0))
-    B_Ang = math.tan(float(AngB) * PI1/float(180.0))
-    C_Ang = math.tan(float(ang) * PI1/float(180.0))
-    Rad = OD / 2.0
-    H_Thread = (1 / C_Ang) * (Pitch / 2)
-    H8 = H_Thread / 8
-    H_5H8 = (5 * H_Thread) / 8
-    H3 = ((H_5H8 + H8) * C_Ang) * 0.1
-    D_Min = (OD - (2 * abs(H_5H8))) * 0.1
-    R_Min = D_Min / 2
-    R_Min1 = D_Min / 2 - .01    # need just a little more inward to get one profile for multiple threads
-# To be less confusing, make sure we are dealing with positive numbers
-    YB_B = abs((H_5H8 + H8) * B_Ang * .1)       # Biggest Length closest to center
-    YS_B = abs(H8 * B_Ang * .1)
-    YB_T = abs((H_5H8 + H8) * T_Ang * .1)       # Smallest Length on Outside Diameter
-    YS_T = abs(H8 * T_Ang * .1)
-# Center of everthing is at Origin 0,0,0
-    X0 = R_Min1
-    X1 = R_Min
-    X2 = Rad * 0.1
-    X3 = X2
-    X4 = X1
-# For some reason Negative numbers are above X-axis & Positive numbers are below X-axis
-    if AngB > 0:
-        P1 = adsk.core.Point3D.create(X1, YB_B, 0)
-        P2 = adsk.core.Point3D.create(X2, YS_B, 0)
-    elif AngB == 0:
-        P1 = adsk.core.Point3D.create(X1, H3, 0)
-        P2 = adsk.core.Point3D.create(X2, H3, 0)
-    elif AngB < 0:
-        P1 = adsk.core.Point3D.create(X1, YS_B, 0)
-        P2 = adsk.core.Point3D.create(X2, YB_B, 0)
-# Points for Top Angle
-    if AngT > 0:
-        P3 = adsk.core.Point3D.create(X3, -YS_T, 0)
-        P4 = adsk.core.Point3D.create(X4, -YB_T, 0)
-    elif AngT == 0:
-        P3 = adsk.core.Point3D.create(X3, -H3, 0)
-        P4 = adsk.core.Point3D.create(X4,-H3, 0)
-    elif AngT < 0:
-        P3 = adsk.core.Point3D.create(X3, -YB_T, 0)
-        P4 = adsk.core.Point3D.create(X4, -YS_T, 0)
-# Special case of Negative top angle & Positive bottom angle
-    if AngT < 0 and AngB > 0:
-        P1 = adsk.core.Point3D.create(X1, YB_B, 0)
-        P2 = adsk.core.Point3D.create(X2, YS_B, 0)
-        P3 = adsk.core.Point3D.create(X3, -YB_T, 0)
-        P4 = adsk.core.Point3D.create(X4, -YS_T, 0)
-# Special case of Positive top angle & Negative bottom angle
-    if AngT > 0 and AngB < 0:
-        P1 = adsk.core.Point3D.create(X1, YS_B, 0)
-        P2 = adsk.core.Point3D.create(X2, YB_B, 0)
-        P3 = adsk.core.Point3D.create(X3, -YS_T, 0)
-        P4 = adsk.core.Point3D.create(X4, -YB_T, 0)
-    Y0 = P1.y
-    Y5 = Y0 - PitHlx1
-    P00 = adsk.core.Point3D.create(X0, Y0, 0)
-    P5 = adsk.core.Point3D.create(X1, Y5, 0)
-    points = [P00, P1, P2, P3, P4, P5, X0, R_Min]
+    AngT = float(DialogText('angleTop', _angleTop))
+    AngB = float(DialogText('angleBot', _angleBot))
+# The profile math itself is in threadgeom so it can be used without Fusion, only the points are created here
+    profile = threadgeom.thread_profile(threadgeom.ThreadSpec(OD, Pitch, PitHlx1 * 10.0, AngT, AngB))
+    YB_B = profile.yb_b
+    YB_T = profile.yb_t
+    points = to_Point3D(profile.vertices) + [profile.x0, profile.r_min]
     return(points)
 ##########################################################################
     # global CoilType         # Type of Coil to Draw
@@ -558,79 +555,81 @@ def DrawCoil(subComp1, CoilType, Cdiameter, CSec_Type, CpolySides, CellipseX, Ce
     R_Max1 = (F_Rad + F_ID_Rad) * .1
     #ui.messageBox(f'CoilType = {CoilType}\n CellipseX = {CellipseX}\nCellipseY = {CellipseY}')
 # Create a new 3D sketch.
-    sketches = subComp1.sketches
-    sketch_Profile = sketches.add(subComp1.xZConstructionPlane)
-    sketch_Profile.name = "Coil_Profile"
-    F_Pos = F_Rad1
-    S_Type = 'Circle_'
-    S_Pos = 'CtrPos_'
+    yield 'profile sketch'
+    with Span('profile sketch'):
+        sketches = subComp1.sketches
+        sketch_Profile = sketches.add(subComp1.xZConstructionPlane)
+        sketch_Profile.name = "Coil_Profile"
+        F_Pos = F_Rad1
+        S_Type = 'Circle_'
+        S_Pos = 'CtrPos_'
 # Inside position moves the section inward & outside position moves the section outward, backwards from what I originally thought
-    if Cposition == '1':
-        S_Pos = 'InPos_'
-        F_Pos = F_Rad1 - F_ID_Rad1
-    elif Cposition == '3':
-        S_Pos = 'OutPos_'
-        F_Pos = F_Rad1 + F_ID_Rad1
+        if Cposition == '1':
+            S_Pos = 'InPos_'
+            F_Pos = F_Rad1 - F_ID_Rad1
+        elif Cposition == '3':
+            S_Pos = 'OutPos_'
+            F_Pos = F_Rad1 + F_ID_Rad1
 # Profile Section type, 1 (Circle), 2 (Polygon), 3 (Ellipse), 4 (Rectangle) or 5 (Star)
-    if CSec_Type == '1':
-        DrawCircle(sketch_Profile, F_Pos, F_ID_Rad1)
-    if CSec_Type == '2':
-        S_Type = "Poly_" + CpolySides + "_Sides_"
+        if CSec_Type == '1':
+            DrawCircle(sketch_Profile, F_Pos, F_ID_Rad1)
+        if CSec_Type == '2':
+            S_Type = "Poly_" + CpolySides + "_Sides_"
 # Only run through this code if we are not locating the polygon on the center point
-        if Cposition != '2':
+            if Cposition != '2':
 # 1st pass through DrawPolygon we calculate the Left & Right intersection points of X-axis & polygon
-            X_Pts = DrawPolygon(sketch_Profile, F_Rad1, numSides, F_ID_Rad1, CvertPos, 0) # Returns 2 intersection points of polygon with X-axis
+                X_Pts = DrawPolygon(sketch_Profile, F_Rad1, numSides, F_ID_Rad1, CvertPos, 0) # Returns 2 intersection points of polygon with X-axis
+                if X_Pts:
+                    X_Min = X_Pts[0]
+                    R_Max1 = X_Pts[1]
+                    X_LtDist = F_Rad1 - X_Min
+                    X_RtDist = R_Max1 - F_Rad1
+        # ReCompute the Left side & Right side offset for polygon location
+                    if Cposition == '1':
+                        F_Pos = F_Rad1 - X_RtDist
+                    elif Cposition == '3':
+                        F_Pos = F_Rad1 + X_LtDist
+            X_Pts = DrawPolygon(sketch_Profile, F_Pos, numSides, F_ID_Rad1, CvertPos, 1)
             if X_Pts:
-                X_Min = X_Pts[0]
+                F_Rad1 = X_Pts[0]           # This is to keep R_Max1 & F_Rad1 being the same number when Cposition = '3'
                 R_Max1 = X_Pts[1]
-                X_LtDist = F_Rad1 - X_Min
-                X_RtDist = R_Max1 - F_Rad1
-    # ReCompute the Left side & Right side offset for polygon location
-                if Cposition == '1':
-                    F_Pos = F_Rad1 - X_RtDist
-                elif Cposition == '3':
-                    F_Pos = F_Rad1 + X_LtDist
-        X_Pts = DrawPolygon(sketch_Profile, F_Pos, numSides, F_ID_Rad1, CvertPos, 1)
-        if X_Pts:
-            F_Rad1 = X_Pts[0]           # This is to keep R_Max1 & F_Rad1 being the same number when Cposition = '3'
+        elif CSec_Type == '3':
+            S_Type = 'Ellipse_'
+            X_Dist1 = float(CellipseX) * .1
+            Y_Dist1 = float(CellipseY) * .1
+            F_Pos = F_Rad1
+            if Cposition == '1':
+                F_Pos = F_Rad1 - (X_Dist1 / 2)
+            elif Cposition == '3':
+                F_Pos = F_Rad1 + (X_Dist1 / 2)
+            DrawEllipse(sketch_Profile, F_Pos, X_Dist1, Y_Dist1)
+        elif CSec_Type == '4':
+            S_Type = "Rect_" + Crect_Wid + "mm_Wid_" + Crect_Ht + "mm_Ht_"
+            X_Pts = DrawRectangle(sketch_Profile, F_Rad1, Crect_Wid, Crect_Ht, Cposition, CPosRect)
+            F_Rad1 = X_Pts[0]
             R_Max1 = X_Pts[1]
-    elif CSec_Type == '3':
-        S_Type = 'Ellipse_'
-        X_Dist1 = float(CellipseX) * .1
-        Y_Dist1 = float(CellipseY) * .1
-        F_Pos = F_Rad1
-        if Cposition == '1':
-            F_Pos = F_Rad1 - (X_Dist1 / 2)
-        elif Cposition == '3':
-            F_Pos = F_Rad1 + (X_Dist1 / 2)
-        DrawEllipse(sketch_Profile, F_Pos, X_Dist1, Y_Dist1)
-    elif CSec_Type == '4':
-        S_Type = "Rect_" + Crect_Wid + "mm_Wid_" + Crect_Ht + "mm_Ht_"
-        X_Pts = DrawRectangle(sketch_Profile, F_Rad1, Crect_Wid, Crect_Ht, Cposition, CPosRect)
-        F_Rad1 = X_Pts[0]
-        R_Max1 = X_Pts[1]
-    elif CSec_Type == '5':
-        S_Type = "Star_"
-        F_OutRad = float(CStarOut_Rad) * .1
-        F_InRad = float(CStarIn_Rad) * .1
-        F_Pos = F_Rad1
-        if Cposition == '1':
-            F_Pos = F_Rad1 - F_InRad
-        elif Cposition == '3':
-            F_Pos = F_Rad1 + F_InRad
-        DrawStar(sketch_Profile, F_Pos, F_OutRad, F_InRad, I_num_points, CvertPos)
-        R_Max1 = F_Rad1 + F_InRad
-    prof = sketch_Profile.profiles.item(0)
+        elif CSec_Type == '5':
+            S_Type = "Star_"
+            F_OutRad = float(CStarOut_Rad) * .1
+            F_InRad = float(CStarIn_Rad) * .1
+            F_Pos = F_Rad1
+            if Cposition == '1':
+                F_Pos = F_Rad1 - F_InRad
+            elif Cposition == '3':
+                F_Pos = F_Rad1 + F_InRad
+            DrawStar(sketch_Profile, F_Pos, F_OutRad, F_InRad, I_num_points, CvertPos)
+            R_Max1 = F_Rad1 + F_InRad
+        prof = sketch_Profile.profiles.item(0)
 # Get the profiles in the sketch
     xyPlane = subComp1.xYConstructionPlane
     sketch_Helix = sketches.add(xyPlane)
     sketch_Helix.name = "Sketch_Helix"
     if CoilType == '4':
         subComp1.name = "Spiral_" + S_Pos + S_Type + Cdiameter
-        DrawSpiral(subComp1, sketch_Helix, F_Rad1, F_pitch, I_revs, sPts, RL_thread, prof)
+        yield from DrawSpiral(subComp1, sketch_Helix, F_Rad1, F_pitch, I_revs, sPts, RL_thread, prof)
     else:
         subComp1.name = "Coil_" + S_Pos + S_Type + Cdiameter
-        DrawAngledCoil(subComp1, sketch_Helix, R_Max1, F_Rad1, F_pitch, I_revs, Ht, F_angle, sPts, prof, CoilType)
+        yield from DrawAngledCoil(subComp1, sketch_Helix, R_Max1, F_Rad1, F_pitch, I_revs, Ht, F_angle, sPts, prof, CoilType)
     b_name = subComp1.name
     bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
     numBodies = bsubComp1_bodies.count                  # Get a count of the bodies used, should be 3
@@ -645,29 +644,24 @@ def DrawCoil(subComp1, CoilType, Cdiameter, CSec_Type, CpolySides, CellipseX, Ce
 ##########################################################################
 def DrawSpiral(subComp1, sketch_Helix, Rad1, pitch, revolutions, num_points_per_revolution, RL_thread, prof):
     pitch1 = pitch * .1
-    points = adsk.core.ObjectCollection.create()
 # Determine the direction of rotation
     if RL_thread == 'L':
         direction = -1
     else:
         direction = 1
-# Create an object collection for the points.
-    sketchSplines = sketch_Helix.sketchCurves.sketchFittedSplines
-# Calculate points for the spiral
-    for i in range(num_points_per_revolution * revolutions + 1):
-        t = direction * i / num_points_per_revolution * 2 * math.pi
-        r = Rad1 + (pitch1 * abs(t)) / (2 * math.pi)
-        x = r * math.cos(t)
-        y = r * math.sin(t)
-        z = 0
-        points.add(adsk.core.Point3D.create(x, y, z))
+# Calculate points for the spiral, the radius grows by the pitch every revolution
+    samples = threadgeom.sample_curve(Rad1, num_points_per_revolution, revolutions, radial_pitch=pitch1, direction=direction)
 # Create the spline
-    spline = sketchSplines.add(points)              # Create the inner spline helix from points 
-    path = subComp1.features.createPath(spline)
+    yield 'helix splines'
+    with Span('helix splines'):
+        spline = AddSplinePath(sketch_Helix, samples.path)      # Create the inner spline helix from points 
+        path = subComp1.features.createPath(spline)
 # Create the sweep feature
     sweeps = subComp1.features.sweepFeatures
     sweep_input = sweeps.createInput(prof, path, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
-    sweeps.add(sweep_input)
+    yield 'sweep'
+    with Span('sweep'):
+        sweeps.add(sweep_input)
 ##########################################################################
 # 1 (done) Revolution and Height (also has optional angle)
 # 2 Revolution and Pitch (also has optional angle)
@@ -687,91 +681,45 @@ def DrawAngledCoil(subComp1, sketch_Helix, R_Max1, F_Rad1, F_pitch, I_revs, Ht,
         pitch = Ht1 / I_revs
     elif CoilType == '2':
         Ht1 = I_revs * pitch
-# Calculate the radius and total points
-    total_points = sPts * I_revs
-# Create an object collection for the points.
-    sketchSplines = sketch_Helix.sketchCurves.sketchFittedSplines
-# Calculate the points for the coil
-    points = adsk.core.ObjectCollection.create()
-    points1 = adsk.core.ObjectCollection.create()
-    for i in range(total_points + 1):
-        t = i / sPts * 2 * math.pi  # angle in radians
-        r = rad0 + (pitch * i / sPts) * math.tan(angle)
-        r1 = rad1 + (pitch * i / sPts) * math.tan(angle)
-        x = r * math.cos(t)
-        y = r * math.sin(t)
-        x1 = r1 * math.cos(t)
-        y1 = r1 * math.sin(t)
-        z = (pitch / (2 * math.pi)) * t  # linear z increase with t
-        points.add(adsk.core.Point3D.create(x, y, z))       # for Path
-        points1.add(adsk.core.Point3D.create(x1, y1, z))    # for GuideRail
+# Calculate the points for the coil, the angle makes the radius grow linearly with z
+    samples = threadgeom.sample_curve(rad0, sPts, I_revs, z_pitch=pitch, radial_pitch=pitch * math.tan(angle), rail_radius=rad1)
 # Create the spline
-    spline = sketchSplines.add(points)              # Create the inner spline helix from points
-    spline1 = sketchSplines.add(points1)
-    guide = subComp1.features.createPath(spline1)
-    path = subComp1.features.createPath(spline)
+    yield 'helix splines'
+    with Span('helix splines'):
+        spline = AddSplinePath(sketch_Helix, samples.path)      # Create the inner spline helix from points for Path
+        spline1 = AddSplinePath(sketch_Helix, samples.rail)     # for GuideRail
+        guide = subComp1.features.createPath(spline1)
+        path = subComp1.features.createPath(spline)
 # Create the sweep feature
     sweeps = subComp1.features.sweepFeatures
     sweep_input = sweeps.createInput(prof, path, adsk.fusion.FeatureOperations.NewBodyFeatureOperation)
     sweep_input.guideRail = guide            # Default guide rail is the outer Helix
     sweep_input.profileScaling = adsk.fusion.SweepProfileScalingOptions.SweepProfileScaleOption
-    sweeps.add(sweep_input)
+    yield 'sweep'
+    with Span('sweep'):
+        sweeps.add(sweep_input)
 ##########################################################################
 def DrawCircle(sketch_Profile, F_Pos, F_ID_Rad1):
     center_point = adsk.core.Point3D.create(F_Pos, 0, 0)
     sketch_Profile.sketchCurves.sketchCircles.addByCenterRadius(center_point, F_ID_Rad1)
 ##########################################################################
 def SetStartAngle(CvertPos):
-    initialAngle = 0 # 0 degrees Right vertex
-    if CvertPos == '2':
-        initialAngle = - math.pi / 2 # -90 degrees Top vertex
-    elif CvertPos == '3':
-        initialAngle = math.pi # 180 degrees Left vertex
-    elif CvertPos == '4':
-        initialAngle = math.pi / 2 # 90 degreesBottom vertex
-    elif CvertPos == '5':
-        initialAngle = math.pi / 8 # 22.5 degrees for 8 sided
-    elif CvertPos == '6':
-        initialAngle = math.pi / 4 # 45.0 degrees for 12 sided
-    return (initialAngle)
+    return threadgeom.vertex_angle(CvertPos)
 ##########################################################################
 def DrawPolygon(sketch_Profile, F_Pos, numSides, radius, CvertPos, iflag):
-    centerX = F_Pos             # Center X coordinate of Polygon
-    centerY = 0
 # Define the initial angle to adjust the position of the vertices
     initialAngle = SetStartAngle(CvertPos)
-    angle = 2 * math.pi / numSides
-    points = []
-    for i in range(numSides):
-        x = centerX + radius * math.cos(i * angle + initialAngle)
-        y = centerY + radius * math.sin(i * angle + initialAngle)
-        points.append(adsk.core.Point3D.create(x, y, 0)) # Center point is (x, y) on the XY plane, z is constant
+    vertices = threadgeom.polygon_points(F_Pos, numSides, radius, initialAngle)
 # Create the lines between the points only on 2nd pass through this routine
     if iflag == 1:
+        points = to_Point3D(vertices)
         lines = sketch_Profile.sketchCurves.sketchLines
         for i in range(numSides):
             lines.addByTwoPoints(points[i], points[(i + 1) % numSides])
 # Find the intersection points with the X-axis (y=0)
-    X_Pts = []
-    for i in range(numSides):
-        p1 = points[i]
-        p2 = points[(i + 1) % numSides]
-# Calculate intersection with the X-axis (y=0)
-        if (p1.y >= 0 > p2.y) or (p1.y <= 0 < p2.y):
-            t = p1.y / (p1.y - p2.y)
-            xIntersect = p1.x + t * (p2.x - p1.x)
-            X_Pts.append(xIntersect)
-    # Display the intersection points
+    X_Pts = threadgeom.x_axis_crossings(vertices)
     if len(X_Pts) >= 2:
-        X10 = X_Pts[0]
-        X20 = X_Pts[1]
-        if X10 > X20:
-            X_Min = X20
-            X_Max = X10
-        else:
-            X_Min = X10
-            X_Max = X20
-        X_MinMax = [X_Min, X_Max]
+        X_MinMax = [X_Pts[0], X_Pts[-1]]
         return (X_MinMax)
     else:
         return (False)
@@ -788,52 +736,23 @@ def DrawEllipse(sketch_Profile, F_Pos, Major_X, Minor_Y):
 def DrawRectangle(sketch_Profile, F_Rad1, Crect_Wid, Crect_Ht, Cposition, CPosRect):
     F_Wid1 = float(Crect_Wid) * .1
     F_Ht1 = float(Crect_Ht) * .1
-    F_Wid12 = F_Wid1 / 2.0
-    F_Ht12 = F_Ht1 / 2.0
-    F_Pos = F_Rad1
-    X0 = F_Pos             # default 3 Horizontal position Outside edge
-    X1 = F_Pos + F_Wid1
-    if Cposition == '1':
-        X0 = F_Pos - F_Wid1
-    elif Cposition == '2':
-        X0 = F_Pos - F_Wid12
-    X1 = X0 + F_Wid1
-    Y0 = 0                          # default 3 vertical position Bottom
-    Y1 = -F_Ht1
 # 1 = Top, 2 = Middle 3, = Bottom
-    if CPosRect == '1':
-        Y0 = F_Ht1
-        Y1 = 0
-    elif CPosRect == '2':
-        Y0 = -F_Ht12
-        Y1 = F_Ht12
-    P1 = adsk.core.Point3D.create(X0, Y0, 0)
-    P2 = adsk.core.Point3D.create(X1, Y0, 0)
-    P3 = adsk.core.Point3D.create(X1, Y1, 0)
-    P4 = adsk.core.Point3D.create(X0, Y1, 0)
+    P1, P2, P3, P4 = to_Point3D(threadgeom.rectangle_points(F_Rad1, F_Wid1, F_Ht1, Cposition, CPosRect))
     points = [P1, P2, P3, P4, P1]              # Create a list of points for single thread profile
     draw_lines_between_points(sketch_Profile, points, 0)
-    X_Pts = [X0 + F_Wid12, X1]
+    X_Pts = [P1.x + F_Wid1 / 2.0, P2.x]
     return (X_Pts)
 ##########################################################################
 def DrawStar(sketch_Profile, F_Pos, outer_radius, inner_radius, num_points, CvertPos):
-    centerX = F_Pos             # Center X coordinate of Star
-    centerY = 0
-    points = []
     initialAngle = SetStartAngle(CvertPos)
 # Calculate the points of the star
-    angle = 2 * math.pi / (num_points * 2)
-    for i in range(num_points * 2):
-        radius = outer_radius if i % 2 == 0 else inner_radius
-        x = centerX + radius * math.cos(i * angle + initialAngle)
-        y = centerY + radius * math.sin(i * angle + initialAngle)
-        points.append(adsk.core.Point3D.create(x, y, 0))
+    points = to_Point3D(threadgeom.star_points(F_Pos, outer_radius, inner_radius, num_points, initialAngle))
 # Create the lines between the points
     lines = sketch_Profile.sketchCurves.sketchLines
     for i in range(num_points * 2):
         lines.addByTwoPoints(points[i], points[(i + 1) % (num_points * 2)])
 ##########################################################################
-def DrawThreads(subComp1, OD, Pitch, PitHlx, Ht, sPts, G_Rail, RL_thread, iST_Char, RL_Check, iflag, iTY_Char):
+def DrawThreads(subComp1, OD, Pitch, PitHlx, Ht, sPts, G_Rail, RL_thread, iST_Char, RL_Check, iflag, iTY_Char, Cham=None):
     try:
         Ht1 = Ht * .1
         PitHlx1 = PitHlx * .1
@@ -873,7 +792,7 @@ def DrawThreads(subComp1, OD, Pitch, PitHlx, Ht, sPts, G_Rail, RL_thread, iST_Ch
             P5_y = abs(P5.y)
 # We need to readjust P4 to the intersection point between line P4 to P5 & P5 to P2 extended by the Helix Pitch distance
             if P5_y < P4_y:
-                if G_Rail != 'L' and G_Rail != 'P':
+                if G_Rail != 'L' and G_Rail != 'P' and G_Rail != 'N' and G_Rail != 'B':
                     P22 = adsk.core.Point3D.create(P2.x, P22_y, 0)
 # Calculate direction vectors
                     P45 = findIntersection(P3, P4, P5, P22)
@@ -882,71 +801,188 @@ def DrawThreads(subComp1, OD, Pitch, PitHlx, Ht, sPts, G_Rail, RL_thread, iST_Ch
                     S_Dist = "{:.4f}".format(Err_Dist)
                     msg = f'Female Profiles will overlap with using Real Offsets<br>Try increasing Helix Pitch, decreasing M/F Thread Gap<br>or UNCHECK Use Real Offset of Threads<br><br>Overlap Distance = {S_Dist}mm<br>P45.x = {P45.x}    P45.y = {P45.y}'
                     ui.messageBox(msg,"Warning", adsk.core.MessageBoxButtonTypes.OKButtonType, adsk.core.MessageBoxIconTypes.WarningIconType)
+        if G_Rail == 'B':
+# BRep engine, the single thread section goes straight to a NURBS body without any sketches or sweep
+            P6 = adsk.core.Point3D.create(X0, P4.y, 0)
+            yield 'brep body'
+            with Span('brep body'):
+                DrawBRepThreads(subComp1, [P00, P1, P2, P3, P4, P6], Rad, R_Min, Ht1, PitHlx1, int(Ht / PitHlx) + 1, RL_thread, iflag)
+            if iST_Char > 1:
+                yield 'multi-start copy'
+                with Span('multi-start copy'):
+                    CircPat_Threads(subComp1, iST_Char)
+            if Cham is not None:
+                yield 'chamfer revolve'
+                with Span('chamfer revolve'):
+                    ChamferTopThreads(subComp1, Cham[0], Ht, Cham[1])
+            return
+# The bolt's one revolution with its faces offset by the M/F Thread Gap is the nut's, no need to sweep the Real Offset profile
+        if iflag == 1 and RL_Check == 'Y' and Thread_Seed is not None:
+            yield 'offset faces'
+            with Span('offset faces'):
+                sketch_Helix = InsertOffsetSeed(subComp1, Ht1)
+            yield from FinishThreads(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, int(Ht / PitHlx) + 1, G_Rail, iST_Char, iflag, iTY_Char, Cham)
+            return
+        Keep_Seed = iflag == 0 and OffsetNutThreads(G_Rail, iTY_Char, RL_Check)
+# Pattern & NurbsHelix threads are patterned from one revolution, load it from the template library if it was built before
+        Template_Key = None
+        if (G_Rail == 'P' or G_Rail == 'N') and config.TEMPLATE_FOLDER:
+            Template_Key = TemplateKey([P00, P1, P2, P3, P4], Rad, PitHlx, sPts, G_Rail, RL_thread)
+            template = Templates().get(Template_Key)
+            mirror = False
+            if template is None:
+# The other hand mirrored through the XZ plane is this hand, the profile is on that plane so it stays as it is
+                template = Templates().get(TemplateKey([P00, P1, P2, P3, P4], Rad, PitHlx, sPts, G_Rail, OTHER_HAND[RL_thread]))
+                mirror = template is not None
+            if template is not None:
+                yield 'template body'
+                with Span('template body'):
+                    sketch_Helix = InsertTemplate(subComp1, template, Ht1, iflag, mirror)
+                    if Keep_Seed:
+                        KeepSeed(subComp1)
+                yield from FinishThreads(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, int(Ht / PitHlx) + 1, G_Rail, iST_Char, iflag, iTY_Char, Cham)
+                return
 # Create a new 3D sketch.
-        sketches = subComp1.sketches
-        xyPlane = subComp1.xYConstructionPlane
-        sketch_Helix = sketches.add(xyPlane)
-        sketch_Helix.name = "Sketch_Helix"
+        yield 'profile sketch'
+        with Span('profile sketch'):
+            sketches = subComp1.sketches
+            xyPlane = subComp1.xYConstructionPlane
+            sketch_Helix = AddSketch(sketches, xyPlane)
+            sketch_Helix.name = "Sketch_Helix"
 # Create sketch for the profile to sweep
-        sketch_Profile = sketches.add(subComp1.xZConstructionPlane)
-        sketch_Profile.name = "Thread_Profile"
-        sketch_Profile.sketchCurves.sketchLines
-        rev = int(Ht / PitHlx) + 1                   # How many revolutions of helix
-        if G_Rail== 'L' or G_Rail == 'P':
-            points = [P00, P1, P2, P3, P4]              # Create a list of points for single thread profile
-            draw_lines_between_points(sketch_Profile, points, iflag)
-        else:
-            if i_Error == 1:
-                points = [P00, P1, P2, P3, P45]                             # Next profile overlaps, so use intersection P45 instead of P4, P5
-                draw_lines_between_points(sketch_Profile, points, iflag)    # Draw 1st thread profile before loop
-                P1 = adsk.core.Point3D.create(P45.x, P45.y + PitHlx1, 0)     # Change P1 to vertically below P45 intersection Point
-                points = [P1, P2, P3, P45]
+            sketch_Profile = AddSketch(sketches, subComp1.xZConstructionPlane)
+            sketch_Profile.name = "Thread_Profile"
+            sketch_Profile.sketchCurves.sketchLines
+            rev = int(Ht / PitHlx) + 1                   # How many revolutions of helix
+            if G_Rail== 'L' or G_Rail == 'P' or G_Rail == 'N':
+                points = [P00, P1, P2, P3, P4]              # Create a list of points for single thread profile
+                draw_lines_between_points(sketch_Profile, points, iflag)
             else:
-                points = [P00, P1, P2, P3, P4, P5]                          # Create a list of points to start multiple thread profiles
-                draw_lines_between_points(sketch_Profile, points, iflag)    # Draw 1st thread profile before loop
-                points = [P1, P2, P3, P4, P5]
+                if i_Error == 1:
+                    points = [P00, P1, P2, P3, P45]                             # Next profile overlaps, so use intersection P45 instead of P4, P5
+                    draw_lines_between_points(sketch_Profile, points, iflag)    # Draw 1st thread profile before loop
+                    P1 = adsk.core.Point3D.create(P45.x, P45.y + PitHlx1, 0)     # Change P1 to vertically below P45 intersection Point
+                    points = [P1, P2, P3, P45]
+                else:
+                    points = [P00, P1, P2, P3, P4, P5]                          # Create a list of points to start multiple thread profiles
+                    draw_lines_between_points(sketch_Profile, points, iflag)    # Draw 1st thread profile before loop
+                    points = [P1, P2, P3, P4, P5]
 # Loop to change the Y coordinate of points
-            for i in range(rev):
+                for i in range(rev):
 # on last iteration, we do not want to draw between point P4 & P5
-                if i == rev-1:
-                    points = [P1, P2, P3, P4]
-                for point in points:
-                    point.y -= PitHlx1
-                draw_lines_between_points(sketch_Profile, points, iflag)    # Draw the next thread
-                if i_Error == 1:
-                    P4.y -= PitHlx1
-        if i_Error == 1:
-            P4.y += PitHlx1             # simplest way to fix off by one, since we add 1 too many in the loop
-        P6 = adsk.core.Point3D.create(X0, P4.y, 0)                            # P6 is vertical to P00
-        sketch_Profile.sketchCurves.sketchLines.addByTwoPoints(P4, P6)      # Draw short horizontal line to be perpendicular to P00
-        sketch_Profile.sketchCurves.sketchLines.addByTwoPoints(P6, P00)     # close profile
-        largest_profile = sketch_Profile.profiles.item(0)
-        if i_Error == 1:
+                    if i == rev-1:
+                        points = [P1, P2, P3, P4]
+                    for point in points:
+                        point.y -= PitHlx1
+                    draw_lines_between_points(sketch_Profile, points, iflag)    # Draw the next thread
+                    if i_Error == 1:
+                        P4.y -= PitHlx1
+            if i_Error == 1:
+                P4.y += PitHlx1             # simplest way to fix off by one, since we add 1 too many in the loop
+            P6 = adsk.core.Point3D.create(X0, P4.y, 0)                            # P6 is vertical to P00
+            sketch_Profile.sketchCurves.sketchLines.addByTwoPoints(P4, P6)      # Draw short horizontal line to be perpendicular to P00
+            sketch_Profile.sketchCurves.sketchLines.addByTwoPoints(P6, P00)     # close profile
+            largest_profile = ComputeSketch(sketch_Profile).profiles.item(0)
+            if i_Error == 1:
 # Get the profiles in the sketch
-            profiles = sketch_Profile.profiles
-            #num_profiles = profiles.count
+                profiles = sketch_Profile.profiles
+                #num_profiles = profiles.count
 # Initialize variables to track the largest profile and its area
-            largest_profile = None
-            largest_area = 0
+                largest_profile = None
+                largest_area = 0
 # Iterate through each profile to find the one with the largest area
-            for prof in profiles:
+                for prof in profiles:
 # Calculate the area of the profile
-                area_properties = prof.areaProperties(adsk.fusion.CalculationAccuracy.HighCalculationAccuracy)
-                area = area_properties.area
+                    area_properties = prof.areaProperties(adsk.fusion.CalculationAccuracy.HighCalculationAccuracy)
+                    area = area_properties.area
 # Check if this profile has the largest area so far
-                if area > largest_area:
-                    largest_area = area
-                    largest_profile = prof
+                    if area > largest_area:
+                        largest_area = area
+                        largest_profile = prof
 # The 0.0 is a filler, because we need the minimum radius sent from Coil routine, but not for threads
-        DrawHelix(subComp1,sketch_Helix, 0.0, Rad, PitHlx, Ht, Ht1, sPts, G_Rail, RL_thread, largest_profile, iflag)
-# Now for the possible Single Rectangular pattern to create threads
-        if G_Rail == 'P':
-            DrawPatternThreads(subComp1, PitHlx, rev, 0)
-        DrawCylinder(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, iflag, iTY_Char) # Only extrude the length of 1 helix revolution
-        if iST_Char > 1:
-            CopRot_Threads(subComp1, iST_Char)
+        yield from DrawHelix(subComp1,sketch_Helix, 0.0, Rad, PitHlx, Ht, Ht1, sPts, G_Rail, RL_thread, largest_profile, iflag)
+        if Template_Key is not None:
+            SaveTemplate(subComp1, Template_Key)
+        if Keep_Seed:
+            KeepSeed(subComp1)
+        yield from FinishThreads(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, rev, G_Rail, iST_Char, iflag, iTY_Char, Cham)
     except Exception as e:
         ui.messageBox("Error: {}".format(traceback.format_exc()))
+        raise                               # So the build stops & the stages drawn so far are rolled back
+# Pattern the one revolution into the threads, then the core cylinder, the flush cuts & chamfer & the other starts
+def FinishThreads(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, rev, G_Rail, iST_Char, iflag, iTY_Char, Cham=None):
+# Now for the possible Single Rectangular pattern to create threads
+    if G_Rail == 'P' or G_Rail == 'N':
+        yield 'path pattern'
+        with Span('path pattern'):
+            if rev > config.PATTERN_DOUBLING_REVS:
+                yield from DrawDoublingThreads(subComp1, PitHlx, rev)      # Long threads, copy & join in doubling blocks instead
+            else:
+                DrawPatternThreads(subComp1, PitHlx, rev, 0)
+    yield 'cylinder extrude and cuts'
+    with Span('cylinder extrude and cuts'):
+        DrawCylinder(subComp1, sketch_Helix, Rad, R_Min, Ht1, Pitch, PitHlx, iflag, iTY_Char, Cham) # Only extrude the length of 1 helix revolution
+    if iST_Char > 1:
+        yield 'multi-start copy'
+        with Span('multi-start copy'):
+            CircPat_Threads(subComp1, iST_Char)
+# Library of the one revolution bodies the Pattern & NurbsHelix threads start from
+def Templates():
+    return templates.TemplateLibrary(config.TEMPLATE_FOLDER, config.TEMPLATE_MAX_MB * 1024 * 1024)
+# What the shape of the one revolution depends on, the profile points are in cm & Rad, PitHlx in mm
+def TemplateKey(points, Rad, PitHlx, sPts, G_Rail, RL_thread):
+    if G_Rail == 'N':
+        sPts = NurbsSpans(PitHlx)           # The NurbsHelix has no fitted points, its arcs per revolution shape it
+    return templates.template_key(profile=[(P.x, P.y) for P in points], angles=(AngT, AngB), rad=Rad, pitHelix=PitHlx,
+                                  splinePts=sPts, guide=G_Rail, hand=RL_thread)
+# Insert a template body, mirrored when it was saved for the other hand
+def InsertTemplate(subComp1, path, Ht1, iflag, mirror=False):
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+    tempBody = tempBRep.createFromFile(path).item(0)
+    if mirror:
+        tempBRep.transform(tempBody, MirrorXZ())
+    return InsertRevolution(subComp1, tempBody, Ht1, iflag)
+# Nut threads from the bolt's one revolution, every face but the flat ends of the sweep is offset out by the M/F Thread Gap,
+# so the gap is the same all around the thread instead of only in the plane of the profile
+def InsertOffsetSeed(subComp1, Ht1):
+    sketch_Helix = InsertRevolution(subComp1, Thread_Seed, Ht1, 1)
+    bodies = subComp1.bRepBodies
+    body = bodies.item(bodies.count - 1)
+    faces = adsk.core.ObjectCollection.create()
+    for face in body.faces:
+        if face.geometry.surfaceType != adsk.core.SurfaceTypes.PlaneSurfaceType:
+            faces.add(face)
+    offsetFaces = subComp1.features.offsetFacesFeatures
+    offsetInput = offsetFaces.createInput(faces, adsk.core.ValueInput.createByReal(abs(float(DialogText('MF_Gap', _MF_Gap))) * 0.1))
+    offsetFaces.add(offsetInput)
+    return sketch_Helix
+# Builds whose nut threads are offset from the bolt's one revolution, only Threads M/F & Bolt & Nut with Real Offsets
+# draw a bolt from one revolution before their nut threads
+def OffsetNutThreads(G_Rail, iTY_Char, RL_Check):
+    return config.OFFSET_NUT_THREADS and RL_Check == 'Y' and (G_Rail == 'P' or G_Rail == 'N') and (iTY_Char == 3 or iTY_Char == 5)
+# Keep a copy of the one revolution just drawn, for the nut threads of the same build
+def KeepSeed(subComp1):
+    global Thread_Seed
+    bodies = subComp1.bRepBodies
+    Thread_Seed = adsk.fusion.TemporaryBRepManager.get().copy(bodies.item(bodies.count - 1))
+# One revolution body in place of the profile sketch & sweep, with the helix sketch & center line the pattern & cylinder use
+def InsertRevolution(subComp1, tempBody, Ht1, iflag):
+    global Vert_Line
+    body = AddTempBody(subComp1, tempBody)
+    if iflag < 1:
+        body.name = Body_Name
+    sketch_Helix = AddSketch(subComp1.sketches, subComp1.xYConstructionPlane)
+    sketch_Helix.name = "Sketch_Helix"
+    Vert_Line = sketch_Helix.sketchCurves.sketchLines.addByTwoPoints(adsk.core.Point3D.create(0, 0, 0), adsk.core.Point3D.create(0, 0, Ht1))
+    return sketch_Helix
+# Keep the one revolution just swept in the template library, a template that cannot be saved must not spoil the build
+def SaveTemplate(subComp1, Template_Key):
+    bodies = subComp1.bRepBodies
+    body = bodies.item(bodies.count - 1)
+    try:
+        Templates().put(Template_Key, lambda path: adsk.fusion.TemporaryBRepManager.get().exportToFile([body], path))
+    except:
+        futil.handle_error('Save thread template')
 # Originally did the pattern this way until realizing  the pattern along path would be simpler
 # def Old_DrawPatternThreads(subComp1, PitHlx, rev):
 #     bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
@@ -1003,68 +1039,170 @@ def DrawPatternThreads(subComp1, PitHlx, rev, iflag):
         panel_comb_fea.add(comb_input)
     preferences.unitAndValuePreferences.generalPrecision = General_Precision        # Set precision back to what user had
 ###################################################################################################
+# Build the threads from the 1 revolution sweep by doubling a block of revolutions, 1, 2, 4, 8 ...
+# & joining on the blocks for the remainder, so it takes about 2 * log2(rev) copy/move/join steps
+# instead of patterning rev bodies that all have to be joined to the cylinder
+def DrawDoublingThreads(subComp1, PitHlx, rev):
+    PitHlx2 = PitHlx * .1
+    bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
+    numBodies = bsubComp1_bodies.count
+    blockBody = bsubComp1_bodies.item(numBodies-1)      # The 1 revolution sweep just drawn
+    threadBody = None
+    plan = threadgeom.doubling_plan(rev)
+    for i, step in enumerate(plan):
+        if i > 0:
+            yield f'path pattern {i + 1}/{len(plan)}'       # Each copy, move & join is a stage of its own
+        if step.op == 'final':
+            MoveBodyZ(subComp1, blockBody, step.shift * PitHlx2)
+            JoinBody(subComp1, threadBody, blockBody)
+            continue
+        copyBody = subComp1.features.copyPasteBodies.add(blockBody).bodies.item(0)
+        if step.shift != 0:
+            MoveBodyZ(subComp1, copyBody, step.shift * PitHlx2)
+        if step.op == 'double':
+            JoinBody(subComp1, blockBody, copyBody)
+        elif threadBody is None:
+            threadBody = copyBody
+        else:
+            JoinBody(subComp1, threadBody, copyBody)
+def MoveBodyZ(subComp1, body, dist):
+    inputEnts = adsk.core.ObjectCollection.create()
+    inputEnts.add(body)
+    transform = adsk.core.Matrix3D.create()
+    transform.translation = adsk.core.Vector3D.create(0, 0, dist)
+    moveFeats = subComp1.features.moveFeatures
+    moveFeats.add(moveFeats.createInput(inputEnts, transform))
+def JoinBody(subComp1, targetBody, toolBody):
+    combineFeats = subComp1.features.combineFeatures
+    tools = adsk.core.ObjectCollection.create()
+    tools.add(toolBody)
+    combineInput = combineFeats.createInput(targetBody, tools)
+    combineInput.isKeepToolBodies = False
+    combineInput.operation = adsk.fusion.FeatureOperations.JoinFeatureOperation
+    combineFeats.add(combineInput)
+###################################################################################################
+# BRepHelix guide, build the whole thread in memory with the TemporaryBRepManager & only add the finished body
+# One revolution is made from the NURBS flanks of threadgeom.helical_sweep, then it is doubled up
+# to rev revolutions, joined to the core cylinder & trimmed at the bottom & top like DrawCylinder does
+def DrawBRepThreads(subComp1, points, Rad, R_Min, Ht1, PitHlx1, rev, RL_thread, iflag):
+    direction = 1
+    if RL_thread == 'L':
+        direction = -1
+    section = [(P.x, -P.y) for P in points]                     # Sketch Y on the XZ plane is negative Z
+    sweep = threadgeom.helical_sweep(section, PitHlx1, 1, direction, NurbsSpans(PitHlx1 * 10.0))
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+    blockBody = HelicalSweepBody(sweep, PitHlx1, direction)
+    threadBody = None
+    for step in threadgeom.doubling_plan(rev):
+        if step.op == 'final':
+            tempBRep.transform(blockBody, MoveZ(step.shift * PitHlx1))
+            tempBRep.booleanOperation(threadBody, blockBody, adsk.fusion.BooleanTypes.UnionBooleanType)
+            continue
+        copyBody = tempBRep.copy(blockBody)
+        if step.shift != 0:
+            tempBRep.transform(copyBody, MoveZ(step.shift * PitHlx1))
+        if step.op == 'double':
+            tempBRep.booleanOperation(blockBody, copyBody, adsk.fusion.BooleanTypes.UnionBooleanType)
+        elif threadBody is None:
+            threadBody = copyBody
+        else:
+            tempBRep.booleanOperation(threadBody, copyBody, adsk.fusion.BooleanTypes.UnionBooleanType)
+    if threadBody is None:
+        threadBody = blockBody
+# Core cylinder, then cut off what is below the origin & above the height
+    P_Org = adsk.core.Point3D.create(0, 0, 0)
+    P_Top = adsk.core.Point3D.create(0, 0, Ht1)
+    R_Cut = (Rad * .1) + .01
+    core = tempBRep.createCylinderOrCone(P_Org, R_Min, P_Top, R_Min)
+    tempBRep.booleanOperation(threadBody, core, adsk.fusion.BooleanTypes.UnionBooleanType)
+    bottom = tempBRep.createCylinderOrCone(adsk.core.Point3D.create(0, 0, -((YB_B * 2) + (PitHlx1 * 2))), R_Cut, P_Org, R_Cut)
+    tempBRep.booleanOperation(threadBody, bottom, adsk.fusion.BooleanTypes.DifferenceBooleanType)
+    top = tempBRep.createCylinderOrCone(P_Top, R_Cut, adsk.core.Point3D.create(0, 0, Ht1 + YB_T * 2 + PitHlx1 * 2), R_Cut)
+    tempBRep.booleanOperation(threadBody, top, adsk.fusion.BooleanTypes.DifferenceBooleanType)
+    body = AddTempBody(subComp1, threadBody)
+    if iflag < 1:
+        body.name = Body_Name
+# Solid from a threadgeom.HelicalSweep, the flanks plus the section at the start & one pitch up at the end
+def HelicalSweepBody(sweep, PitHlx1, direction):
+    bodyDef = adsk.fusion.BRepBodyDefinition.create()
+    shellDef = bodyDef.lumpDefinitions.add().shellDefinitions.add()
+    n = len(sweep.section)
+    P_Start = [adsk.core.Point3D.create(r, 0, z) for r, z in sweep.section]
+    P_End = [adsk.core.Point3D.create(r, 0, z + PitHlx1) for r, z in sweep.section]
+    V_Start = [bodyDef.createVertexDefinition(P) for P in P_Start]
+    V_End = [bodyDef.createVertexDefinition(P) for P in P_End]
+    helixEdges = [bodyDef.createEdgeDefinitionByCurve(V_Start[i], V_End[i], to_NurbsCurve3D(sweep.helices[i])) for i in range(n)]
+    startEdges = []
+    endEdges = []
+    for i in range(n):
+        j = (i + 1) % n
+        startEdges.append(bodyDef.createEdgeDefinitionByCurve(V_Start[i], V_Start[j], adsk.core.Line3D.create(P_Start[i], P_Start[j])))
+        endEdges.append(bodyDef.createEdgeDefinitionByCurve(V_End[i], V_End[j], adsk.core.Line3D.create(P_End[i], P_End[j])))
+# Each flank goes along the start edge, up the next helix, back along the end edge & down its own helix
+    for i in range(n):
+        j = (i + 1) % n
+        faceDef = shellDef.faceDefinitions.add(to_NurbsSurface(sweep.flanks[i]), True)
+        coEdges = faceDef.loopDefinitions.add().bRepCoEdgeDefinitions
+        coEdges.add(startEdges[i], False)
+        coEdges.add(helixEdges[j], False)
+        coEdges.add(endEdges[i], True)
+        coEdges.add(helixEdges[i], True)
+# The start face looks back against the turn & the end face looks along it
+    startFace = shellDef.faceDefinitions.add(adsk.core.Plane.create(P_Start[0], adsk.core.Vector3D.create(0, -direction, 0)), False)
+    coEdges = startFace.loopDefinitions.add().bRepCoEdgeDefinitions
+    for i in reversed(range(n)):
+        coEdges.add(startEdges[i], True)
+    endFace = shellDef.faceDefinitions.add(adsk.core.Plane.create(P_End[0], adsk.core.Vector3D.create(0, direction, 0)), False)
+    coEdges = endFace.loopDefinitions.add().bRepCoEdgeDefinitions
+    for i in range(n):
+        coEdges.add(endEdges[i], False)
+    return bodyDef.createBody()
+def MoveZ(dist):
+    transform = adsk.core.Matrix3D.create()
+    transform.translation = adsk.core.Vector3D.create(0, 0, dist)
+    return transform
+# Add a TemporaryBRepManager body to the component, it has to go in a Base Feature if the design has history
+def AddTempBody(subComp1, tempBody):
+    if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return subComp1.bRepBodies.add(tempBody)
+    baseFeat = subComp1.features.baseFeatures.add()
+    baseFeat.startEdit()
+    subComp1.bRepBodies.add(tempBody, baseFeat)
+    baseFeat.finishEdit()
+    return baseFeat.bodies.item(0)
+###################################################################################################
 # find intersection point of Line P01, P02 and P03, P04
 def findIntersection(P01, P02, P03, P04):
-    x1 = P01.x
-    y1 = P01.y
-    x2 = P02.x
-    y2 = P02.y
-    x3 = P03.x
-    y3 = P03.y
-    x4 = P04.x
-    y4 = P04.y
-    px= ( (x1*y2-y1*x2)*(x3-x4)-(x1-x2)*(x3*y4-y3*x4) ) / ( (x1-x2)*(y3-y4)-(y1-y2)*(x3-x4) ) 
-    py= ( (x1*y2-y1*x2)*(y3-y4)-(y1-y2)*(x3*y4-y3*x4) ) / ( (x1-x2)*(y3-y4)-(y1-y2)*(x3-x4) )
+    px, py = threadgeom.find_intersection((P01.x, P01.y), (P02.x, P02.y), (P03.x, P03.y), (P04.x, P04.y))
     return(adsk.core.Point3D.create(px, py, 0))
 # Calculate the coefficients for the lines
 def calculate_intersection(P3, P4, P5, P22):
-    A1 = abs(P4.y) - abs(P3.y)
-    B1 = P3.x - P4.x
-    C1 = (A1 * P3.x) + (B1 * abs(P3.y))
-    A2 = abs(P22.y) - abs(P5.y)
-    B2 = P5.x - P22.x
-    C2 = (A2 * P5.x) + (B2 * abs(P5.y))  
-# Calculate the determinant
-    det = A1 * B2 - A2 * B1
-    if det == 0:
+    pt = threadgeom.calculate_intersection((P3.x, P3.y), (P4.x, P4.y), (P5.x, P5.y), (P22.x, P22.y))
+    if pt is None:
         return None  # Lines are parallel and do not intersect
-# Calculate the intersection point
-    x = (B2 * C1 - B1 * C2) / det
-    y = (A1 * C2 - A2 * C1) / det
-    return(adsk.core.Point3D.create(x, y, 0))
-def CopRot_Threads(subComp1, iST_Char):
-    rot_Array = [180, 90]
-    icount = 1                  # one time thru loop if iST_Char = 2
-    if iST_Char == 4:
-        icount = 2              # two times thru loop if 1St_Char = 4
-    i = 0
-    while i < icount:
-        bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
-        numBodies = bsubComp1_bodies.count                  # Get a count of the bodies used
-        baseBody = bsubComp1_bodies.item(numBodies-1)       # Use the last body in the collection
-# Copy/paste bodies
-        subComp1.features.copyPasteBodies.add(baseBody)     # Copy & paste the body
-        baseBodyCopy = bsubComp1_bodies.item(numBodies)     # Get the copied body
-        rot_Angle = rot_Array[i]
-        angle = math.radians(rot_Angle)
-        P_Org = adsk.core.Point3D.create(0, 0, 0)
-# Rotate the copied body 90 degrees around the Z-axis
-        moveFeats = subComp1.features.moveFeatures
-        inputEnts = adsk.core.ObjectCollection.create()
-        inputEnts.add(baseBodyCopy)
-        zAxis = subComp1.zConstructionAxis
-        transform = adsk.core.Matrix3D.create()
-        transform.setToRotation(angle, zAxis.geometry.direction, P_Org)
-        moveFeats = subComp1.features.moveFeatures
-        moveFeatureInput = moveFeats.createInput(inputEnts, transform)
-        moveFeats.add(moveFeatureInput)
-# Combine the original and copied bodies
-        combineFeats = subComp1.features.combineFeatures
-        combineInput = combineFeats.createInput(baseBody, adsk.core.ObjectCollection.create())
-        combineInput.toolBodies.add(baseBodyCopy)
-        combineInput.operation = adsk.fusion.FeatureOperations.JoinFeatureOperation
-        combineFeats.add(combineInput)
-        i = i + 1
+    return(adsk.core.Point3D.create(pt[0], pt[1], 0))
+# Multi-start threads, circular pattern the threads iST_Char times around the Z-axis & join them in one combine
+def CircPat_Threads(subComp1, iST_Char):
+    bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
+    numBodies = bsubComp1_bodies.count                  # Get a count of the bodies used
+    baseBody = bsubComp1_bodies.item(numBodies-1)       # Use the last body in the collection
+    inputEnts = adsk.core.ObjectCollection.create()
+    inputEnts.add(baseBody)
+    circPatterns = subComp1.features.circularPatternFeatures
+    circPatternInput = circPatterns.createInput(inputEnts, subComp1.zConstructionAxis)
+    circPatternInput.quantity = adsk.core.ValueInput.createByReal(iST_Char)
+    circPatternInput.totalAngle = adsk.core.ValueInput.createByString('360 deg')
+    circPatternInput.isSymmetric = False
+    circPatterns.add(circPatternInput)
+# The pattern adds iST_Char - 1 new bodies after the base body
+    tools = adsk.core.ObjectCollection.create()
+    for i in range(numBodies, bsubComp1_bodies.count):
+        tools.add(bsubComp1_bodies.item(i))
+    combineFeats = subComp1.features.combineFeatures
+    combineInput = combineFeats.createInput(baseBody, tools)
+    combineInput.isKeepToolBodies = False
+    combineInput.operation = adsk.fusion.FeatureOperations.JoinFeatureOperation
+    combineFeats.add(combineInput)
 def subtract_bodies(subComp1):
     try:
         bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
@@ -1084,6 +1222,7 @@ def subtract_bodies(subComp1):
     except:
         if ui:
             ui.messageBox('Failed:\n{}'.format(traceback.format_exc()))
+        raise                               # A nut without its threads cut must not be tagged or timed as a build
 ##########################################################################
 def draw_lines_between_points(sketch, points, iflag):
     for i in range(len(points)-1):
@@ -1121,6 +1260,14 @@ def start():
     control = panel.controls.addCommand(cmd_def, COMMAND_BESIDE_ID, False)
 # Specify if the command is promoted to the main toolbar. 
     control.isPromoted = IS_PROMOTED
+# Button for the template library pre-warm, next to the dialog's button
+    prewarm_def = ui.commandDefinitions.addButtonDefinition(PREWARM_ID, PREWARM_NAME, PREWARM_Description, ICON_FOLDER)
+    futil.add_handler(prewarm_def.commandCreated, prewarm_created)
+    panel.controls.addCommand(prewarm_def, CMD_ID, False)
+# Custom event that draws a build a stage at a time after command_execute hands it over
+    global Step_Event
+    Step_Event = app.registerCustomEvent(STEP_EVENT_ID)
+    futil.add_handler(Step_Event, build_step)
 # Executed when add-in is stopped.
 def stop():
 # Get the various UI elements for this command
@@ -1134,6 +1281,114 @@ def stop():
 # Delete the command definition
     if command_definition:
         command_definition.deleteMe()
+    prewarm_control = panel.controls.itemById(PREWARM_ID)
+    prewarm_definition = ui.commandDefinitions.itemById(PREWARM_ID)
+    if prewarm_control:
+        prewarm_control.deleteMe()
+    if prewarm_definition:
+        prewarm_definition.deleteMe()
+# Stop any build still being drawn & remove the custom event that draws it
+    global Step_Event
+    global Running
+    global Build_Profile
+    if Running is not None:
+        Running.cancel()
+        Running = None
+    Build_Profile = None
+    if Step_Event is not None:
+        app.unregisterCustomEvent(STEP_EVENT_ID)
+        Step_Event = None
+# Draws the next stage of the build command_execute handed to Running, Cancel in the progress dialog rolls it back
+@Profiled
+def build_step(args: adsk.core.CustomEventArgs):
+    global Running
+    if Running is None:
+        return
+    try:
+        if not Running.step():
+            Running = None
+    except:
+        Running = None
+        raise
+# The pre-warm button has no dialog, so its execute event comes straight after this
+def prewarm_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{PREWARM_NAME} Command Created Event')
+    futil.add_handler(args.command.execute, prewarm_execute, local_handlers=local_handlers)
+def prewarm_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{PREWARM_NAME} Command Execute Event')
+    if Running is not None:
+        ui.messageBox('The last build is still being drawn, wait for it to finish or Cancel it first.')
+        return
+    if not config.TEMPLATE_FOLDER:
+        ui.messageBox('The template library is turned off, TEMPLATE_FOLDER in config.py is None.')
+        return
+    Last = LastDialog()
+    G_Rail = Last['GR_Char']
+    if G_Rail != 'P' and G_Rail != 'N':
+        G_Rail = 'P'                        # Only the Pattern & NurbsHelix threads start from a template
+    rows = CatalogRows()
+    sPts = int(Last['splinePts'])
+    model = Cost_Model or perf.CostModel()
+    seconds = model.estimate(perf.BuildSpec(G_Rail, 1, 1, sPts)).seconds * len(rows) * 2
+    StartStages(PrewarmStages(rows, Last, G_Rail), design.timeline.markerPosition, seconds, PREWARM_NAME)
+# Values of the last metric dialog the templates are built with, the DialogInput_V9.txt defaults if there is none
+def LastDialog():
+    Last = dict(angleTop='30', angleBot='30', splinePts='18', GR_Char='P', RL_Char='R', MF_Gap='0.3', splineTol='0')
+    fname = os.path.join(get_current_folder(), 'DialogInput_V9.txt')
+    if file_exists(fname):
+        with open(fname, 'r') as f:
+            csvData = list(csv.reader(f))[0]
+        Last.update(angleTop=csvData[4], angleBot=csvData[5], splinePts=csvData[6], GR_Char=csvData[7], RL_Char=csvData[8], MF_Gap=csvData[17])
+        if len(csvData) > 24:
+            Last['splineTol'] = csvData[24]
+    return Last
+# (name, diameter, pitch) in mm of every size in metric_V3.csv & English_V3.csv
+def CatalogRows():
+    rows = []
+    with open(os.path.join(get_current_folder(), 'metric_V3.csv'), 'r') as file:
+        for row in list(csv.reader(file))[1:]:
+            rows.append((row[0] + row[1] + 'x' + row[2], float(row[1]), float(row[2])))
+    with open(os.path.join(get_current_folder(), 'English_V3.csv'), 'r') as file:
+        for row in list(csv.reader(file))[1:]:
+            rows.append((row[0], float(row[1]) * 25.4, 25.4 / float(row[2])))
+    return rows
+# Sweep & save the one revolution of the bolt & nut threads of every row that is not in the library yet, each is drawn
+# in a component of its own that is rolled back once it is saved. 1 start only, & the nut threads without Real Offset
+def PrewarmStages(rows, Last, G_Rail):
+    global Build
+    global Build_Values
+    library = Templates()
+    MF_Gap = Last['MF_Gap']
+    Build_Values = dict(angleTop=Last['angleTop'], angleBot=Last['angleBot'], MF_Gap=MF_Gap, splineTol=Last['splineTol'])
+    try:
+        for name, OD, Pit in rows:
+            sPts = int(Last['splinePts'])
+            if float(Last['splineTol']) > 0:
+                sPts = threadgeom.points_for_tolerance(OD / 2.0 + abs(float(MF_Gap)), float(Last['splineTol']))
+            for OD1, iflag in ((OD, 0), ((float(MF_Gap) * 2.0) + OD, 1)):
+                pts = calcPts(OD1, Pit, Pit * .1)
+                P00, P1, P2, P3, P4 = pts[0:5]
+                Template_Key = TemplateKey([P00, P1, P2, P3, P4], OD1 / 2.0, Pit, sPts, G_Rail, Last['RL_Char'])
+                if library.get(Template_Key) is not None:
+                    continue
+                yield f'{name} template'
+                Tstart = design.timeline.markerPosition
+                occurrences = rootComp.occurrences.count
+                try:
+                    with BuildContext(preferences) as Build:
+                        subComp1 = CreateNewComponent(f'{name} template')
+                        sketch_Helix = AddSketch(subComp1.sketches, subComp1.xYConstructionPlane)
+                        sketch_Profile = AddSketch(subComp1.sketches, subComp1.xZConstructionPlane)
+                        P6 = adsk.core.Point3D.create(pts[6], P4.y, 0)
+                        draw_lines_between_points(sketch_Profile, [P00, P1, P2, P3, P4, P6, P00], iflag)
+                        prof = ComputeSketch(sketch_Profile).profiles.item(0)
+                        yield from DrawHelix(subComp1, sketch_Helix, 0.0, OD1 / 2.0, Pit, Pit, Pit * .1, sPts, G_Rail, Last['RL_Char'], prof, 1)
+                        SaveTemplate(subComp1, Template_Key)
+                finally:
+                    Build = None
+                    roll_back(design, Tstart, occurrences)
+    finally:
+        Build_Values = None
 def is_valid_float(s):
     try:
         float(s)
@@ -1150,6 +1405,7 @@ def is_valid_int(s):
 # Function that is called when a user clicks the corresponding button in the UI.
 # This defines the contents of the command dialog and connects to the command related events.
 ### $$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$ ###
+@Profiled
 def command_created(args: adsk.core.CommandCreatedEventArgs):
 # General logging for debug.
     futil.log(f'{CMD_NAME} Command Created Event')
@@ -1188,6 +1444,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     global _Thread_Wid
     global _Thread_Ht
     global _MF_Gap
+    global _splineTol
     global _Cham_EWid
     global _Thread_EWid
     global _Thread_EHt
@@ -1200,6 +1457,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     global _BoltHd_EHt
     global _NutFlat_EDia
     global _NutHd_EHt
+    global Cost_Model
 
     #global CoilType         # Type of Coil to Draw
     #global Cdiameter        # Diameter of Coil
@@ -1208,7 +1466,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     #global Cpitch           # Pitch of Coil
     #global Cangle           # Coil Angle (0 = no angle)
     #global CsplinePts       # Number of Spline points per revolution for Coil
-    global GR_Char          # GuideRail Type Helix, LongHelix or Pattern
+    global GR_Char          # GuideRail Type Helix, LongHelix, Pattern or NurbsHelix
     global GRC_Char         # Coil GuideRail Type LongHelix or Pattern
                             # Pattern will not work with Spiral or angle used with other coil types
     global Cdia_Sect        # Diameter of Circle or Polygon Profile for Coil
@@ -1300,6 +1558,12 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
             Cham_Wid = csvData[21]
             Thread_Wid = csvData[22]
             Thread_Ht = csvData[23]
+            splineTol = '0'
+            if len(csvData) > 24:           # Files written before the tolerance option do not have it
+                splineTol = csvData[24]
+            FB_Check = 'N'
+            if len(csvData) > 25:
+                FB_Check = csvData[25]      # Fast build into a Base Feature
 # Metric File does not exist, so set the defaults to these
     else:
         diameter = '6'
@@ -1327,6 +1591,8 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         Cham_Wid = '1.015'
         Thread_Wid = '0.6766'
         Thread_Ht = '0.9375'
+        splineTol = '0'
+        FB_Check = 'N'
     if file_exists(EFname):
         DialogName = open(EFname, 'r')
 # Read variables from the text file if it exists
@@ -1351,6 +1617,12 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
                 CT_Check = csvData[18]          # Chamfer Top of Threads
                 CN_Check = csvData[19]          # Chamfer Both ends of Nut
                 RL_Check = csvData[20]
+                splineTol = '0'
+                if len(csvData) > 24:
+                    splineTol = csvData[24]
+                FB_Check = 'N'
+                if len(csvData) > 25:
+                    FB_Check = csvData[25]
             GRE_Char = csvData[7]
             TYE_Char = csvData[10]
             BoltFlat_EDia = csvData[12]
@@ -1381,6 +1653,8 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
             CT_Check = 'Y'
             CN_Check = 'Y'
             RL_Check = 'N'
+            splineTol = '0'
+            FB_Check = 'N'
         GRE_Char = 'P'
         TYE_Char = '5'
         BoltFlat_EDia = '.4375'
@@ -1419,6 +1693,9 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
             CStarOut_Rad = csvData[18]
             CStarIn_Rad = csvData[19]
             CStar_Num = csvData[20]
+            CsplineTol = '0'
+            if len(csvData) > 21:
+                CsplineTol = csvData[21]
     else:
         CoilType = '2'
         Cdiameter = '24.0'
@@ -1441,6 +1718,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         CStarOut_Rad = '5'
         CStarIn_Rad = '2.5'
         CStar_Num = '6'
+        CsplineTol = '0'
     in_err = 0
     if not is_valid_float(diameter):
         diameter = '6'
@@ -1463,16 +1741,16 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     if not is_valid_int(splinePts):
         splinePts = '18'
         in_err = 106
-    if GRM_Char != 'H' and GRM_Char != 'P' and GRM_Char != 'L':
+    if GRM_Char not in ('H', 'P', 'L', 'N', 'B'):
         GRM_Char = 'P'
         in_err = 107
-    if GRE_Char != 'H' and GRE_Char != 'P' and GRE_Char != 'L':
+    if GRE_Char not in ('H', 'P', 'L', 'N', 'B'):
         GRE_Char = 'P'
         in_err = 108
     if RL_Char != 'R' and RL_Char != 'L':
         RL_Char = 'R'
         in_err = 109
-    if ST_Char != '1' and ST_Char != '2' and ST_Char != '4':
+    if ST_Char not in ('1', '2', '3', '4', '5', '6'):
         ST_Char = '1'
         in_err = 110
     if CT_Check != 'Y' and CT_Check != 'N':
@@ -1528,6 +1806,14 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     if not is_valid_float(Thread_Ht):
         Thread_Ht = '0.9375'
         in_err = 127
+    if not is_valid_float(splineTol):
+        splineTol = '0'
+        in_err = 128
+    if FB_Check != 'Y' and FB_Check != 'N':
+        FB_Check = 'N'
+        in_err = 129
+    if not is_valid_float(CsplineTol):
+        CsplineTol = '0'
     if ME_Units == 'M':
         TY_Char = TYM_Char
         GR_Char = GRM_Char
@@ -1536,7 +1822,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         GR_Char = GRE_Char
 # If there was an error in the input data, write out the default values for that data
     if in_err > 0:
-        BoltNut = Bolt_Sides + "," + BoltFlat_Dia + "," + BoltHd_Ht + "," + Nut_Sides + "," + NutFlat_Dia + "," + NutHd_Ht + "," + MF_Gap + "," + CT_Check + "," + CN_Check + "," + RL_Check + "," + Cham_Wid + "," + Thread_Wid + "," + Thread_Ht
+        BoltNut = Bolt_Sides + "," + BoltFlat_Dia + "," + BoltHd_Ht + "," + Nut_Sides + "," + NutFlat_Dia + "," + NutHd_Ht + "," + MF_Gap + "," + CT_Check + "," + CN_Check + "," + RL_Check + "," + Cham_Wid + "," + Thread_Wid + "," + Thread_Ht + "," + splineTol + "," + FB_Check
         OutString = diameter +',' + pitch +',' + pitHelix + ',' + height +',' + angleTop +',' + angleBot +',' + splinePts +',' + GR_Char +',' + RL_Char + ',' + ST_Char + ',' + TYM_Char + ',' + BoltNut
         with open(Fname, 'w') as csvfile:
             csvfile.write(OutString)
@@ -1615,6 +1901,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     _angleTop = tab1ChildInputs.addTextBoxCommandInput('angleTop', 'Top Angle (deg): ', angleTop, 1, False)
     _angleBot = tab1ChildInputs.addTextBoxCommandInput('angleBot', 'Bottom Angle (deg): ', angleBot, 1, False)
     tab1ChildInputs.addTextBoxCommandInput('splinePts', 'Helix Spline Points: ', splinePts, 1, False)
+    _splineTol = tab1ChildInputs.addTextBoxCommandInput('splineTol', 'Helix Tolerance (mm, 0 = use Points): ', splineTol, 1, False)
     tab2ChildInputs.addTextBoxCommandInput('Bolt_Sides', '# of Bolt Head Sides: ', Bolt_Sides, 1, False)
     tab2ChildInputs.addTextBoxCommandInput('Nut_Sides', '# of Sides of Nut: ', Nut_Sides, 1, False)
 ########################  Metric Tab2 Section Below   ########################
@@ -1634,7 +1921,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     _NutFlat_EDia = childE2.addTextBoxCommandInput('NutFlat_EDia', 'Nut Flat Dia: ', NutFlat_EDia, 1, False)
     _NutHd_EHt = childE2.addTextBoxCommandInput('NutHd_EHt', 'Nut Height: ', NutHd_EHt, 1, False)
 # Create dropdown input with test list style.
-    dropdownInput1 = tab1ChildInputs.addDropDownCommandInput('GuideRail', 'Helix, Pattern or Long Helix Guide:', adsk.core.DropDownStyles.TextListDropDownStyle)
+    dropdownInput1 = tab1ChildInputs.addDropDownCommandInput('GuideRail', 'Helix, Pattern, Long, NURBS or BRep Guide:', adsk.core.DropDownStyles.TextListDropDownStyle)
     dropdown1Items = dropdownInput1.listItems
     if ME_Units == 'M':
         group_Minput.isExpanded = True
@@ -1647,15 +1934,23 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
 # C = Center line Guide Rail                                We are disabling this for now, since it does not work well
 # L = Long Helix complete length & Single thread profile
 # P = Pattern of Single Helix & Single Thread copied for longer threads
+# N = Pattern, but the single Helix is a rational NURBS curve instead of a fitted spline
+# B = Whole thread built in memory from NURBS flanks & added as a single body, no sweep
     dropdown1Items.add('Helix', False, '')
     dropdown1Items.add('Pattern', False, '')
     dropdown1Items.add('LongHelix', False, '')
+    dropdown1Items.add('NurbsHelix', False, '')
+    dropdown1Items.add('BRepHelix', False, '')
     if GR_Char == 'C' or GR_Char == 'H':
         dropdown1Items[0].isSelected = True
     elif GR_Char == 'P':
         dropdown1Items[1].isSelected = True
     elif GR_Char == 'L':
         dropdown1Items[2].isSelected = True
+    elif GR_Char == 'N':
+        dropdown1Items[3].isSelected = True
+    elif GR_Char == 'B':
+        dropdown1Items[4].isSelected = True
     dropdownInput2 = tab1ChildInputs.addDropDownCommandInput('RightLeft', 'Right or Left Threads', adsk.core.DropDownStyles.TextListDropDownStyle)
     dropdown2Items = dropdownInput2.listItems
 # Test what was used for the Thread direction on previous run
@@ -1667,9 +1962,8 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         dropdown2Items.add('Left', True, '')
     dropdownInput3 = tab1ChildInputs.addDropDownCommandInput('Starts', 'Number of Thread Starts', adsk.core.DropDownStyles.TextListDropDownStyle)
     dropdown3Items = dropdownInput3.listItems
-    dropdown3Items.add('1 Start', False, '')
-    dropdown3Items.add('2 Start', False, '')
-    dropdown3Items.add('4 Start', False, '')
+    for i in range(1, 7):
+        dropdown3Items.add(str(i) + ' Start', False, '')
     I_ST_Char = int(ST_Char) - 1
     dropdown3Items[I_ST_Char].isSelected = True
     if CT_Check == 'Y':
@@ -1685,6 +1979,14 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         tab1ChildInputs.addBoolValueInput('_RealOffset', 'Use Real Offset of Threads', True, '', True)
     else:
         tab1ChildInputs.addBoolValueInput('_RealOffset', 'Use Real Offset of Threads', True, '', False)
+# Fast build leaves plain bodies in one Base Feature instead of all the features used to make them
+    if FB_Check == 'Y':
+        tab1ChildInputs.addBoolValueInput('_FastBuild', 'Fast Build (Bodies only, no history)', True, '', True)
+    else:
+        tab1ChildInputs.addBoolValueInput('_FastBuild', 'Fast Build (Bodies only, no history)', True, '', False)
+# Not kept for next time, a rebuild is only wanted once
+    tab1ChildInputs.addBoolValueInput('_ForceRebuild', 'Force Rebuild (do not reuse a matching component)', True, '', False)
+    tab1ChildInputs.addTextBoxCommandInput('Estimate', 'Build Estimate: ', '', 1, True)
 ##### Tab3 ################################################################################################
 # 1 Revolution and Height (also has optional angle)
 # 2 Revolution and Pitch (also has optional angle)
@@ -1704,6 +2006,7 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     tab3ChildInputs.addTextBoxCommandInput('Cpitch', 'Coil Pitch (mm): ', Cpitch, 1, False)
     tab3ChildInputs.addTextBoxCommandInput('Cangle', 'Coil Angle: ', Cangle, 1, False)
     tab3ChildInputs.addTextBoxCommandInput('CsplinePts', 'Coil Helix Spline Points: ', CsplinePts, 1, False)
+    tab3ChildInputs.addTextBoxCommandInput('CsplineTol', 'Coil Tolerance (mm, 0 = use Points): ', CsplineTol, 1, False)
     GR_Char = 'L'
 # disabled for now, since for a lot of cases we have to use LongHelix
     # dropdownInput5 = tab3ChildInputs.addDropDownCommandInput('C_GuideRail', 'Pattern or Long Helix Coil Guide:', adsk.core.DropDownStyles.TextListDropDownStyle)
@@ -1790,6 +2093,13 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
         tabCmdInput3.activate()
 # Set tab3 active when coils if coils option was selected last time.
     CalcThread(0)
+# Fit the build time estimate to the builds made so far
+    try:
+        Cost_Model = perf.CostModel.from_history(config.HISTORY_DB, config.COST_FIT_BUILDS)
+    except:
+        futil.handle_error('Fit build estimate')
+        Cost_Model = perf.CostModel()
+    UpdateEstimate(inputs)
 # Connect to event handlers
     futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
     futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
@@ -1800,11 +2110,19 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
 # This event handler is called when the user clicks the OK button in the command dialog or 
 # is immediately called after the created event not command inputs were created for the dialog.
 ### !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!! ###                                                                                                      
+@Profiled
 def command_execute(args: adsk.core.CommandEventArgs):
 # General logging for debug.
     futil.log(f'{CMD_NAME} Command Execute Event')
+    ClearPreview()
     global Body_Name
     global BodyNut_Name
+    global Build
+    global Spans
+    global Running
+    if Running is not None:
+        ui.messageBox('The last build is still being drawn, wait for it to finish or Cancel it first.')
+        return
 # Get a reference to your command's inputs.
     inputs = args.command.commandInputs
     Eng_ID = dropdownInputEM.selectedItem.index         # See if user changed the default to Metric or English units
@@ -1815,6 +2133,7 @@ def command_execute(args: adsk.core.CommandEventArgs):
     angleTop: adsk.core.TextBoxCommandInput = inputs.itemById('angleTop')
     angleBot: adsk.core.TextBoxCommandInput = inputs.itemById('angleBot')
     splinePts: adsk.core.TextBoxCommandInput = inputs.itemById('splinePts')
+    splineTol: adsk.core.TextBoxCommandInput = inputs.itemById('splineTol')
     Bolt_Sides: adsk.core.TextBoxCommandInput = inputs.itemById('Bolt_Sides')
     Nut_Sides: adsk.core.TextBoxCommandInput = inputs.itemById('Nut_Sides')
     MF_Gap: adsk.core.TextBoxCommandInput = inputs.itemById('MF_Gap')                   # Making this mm for both English & Metric
@@ -1829,6 +2148,8 @@ def command_execute(args: adsk.core.CommandEventArgs):
     _ChamThread: adsk.core.BoolValueCommandInput = inputs.itemById('_ChamThread')
     _ChamNut: adsk.core.BoolValueCommandInput = inputs.itemById('_ChamNut')
     _RealOffset: adsk.core.BoolValueCommandInput = inputs.itemById('_RealOffset')
+    _FastBuild: adsk.core.BoolValueCommandInput = inputs.itemById('_FastBuild')
+    _ForceRebuild: adsk.core.BoolValueCommandInput = inputs.itemById('_ForceRebuild')
     CT_Check = 'N'
     CN_Check = 'N'
     RL_Check = 'N'
@@ -1839,6 +2160,7 @@ def command_execute(args: adsk.core.CommandEventArgs):
     Cpitch: adsk.core.TextBoxCommandInput = inputs.itemById('Cpitch')
     Cheight: adsk.core.TextBoxCommandInput = inputs.itemById('Cheight')
     CsplinePts: adsk.core.TextBoxCommandInput = inputs.itemById('CsplinePts')
+    CsplineTol: adsk.core.TextBoxCommandInput = inputs.itemById('CsplineTol')
     Crevs: adsk.core.TextBoxCommandInput = inputs.itemById('Crevs')
     Cangle: adsk.core.TextBoxCommandInput = inputs.itemById('Cangle')
     Crevs = Crevs.text
@@ -1847,6 +2169,7 @@ def command_execute(args: adsk.core.CommandEventArgs):
     Cpitch = Cpitch.text
     Cheight = Cheight.text
     CsplinePts = CsplinePts.text
+    CsplineTol = CsplineTol.text
 
     dropdownInput4 = inputs.itemById('CoilType')
     CoilType = dropdownInput4.selectedItem.name[0] 
@@ -1888,6 +2211,9 @@ def command_execute(args: adsk.core.CommandEventArgs):
         CN_Check = 'Y'
     if _RealOffset.value:
         RL_Check = 'Y'
+    FB_Check = 'N'
+    if _FastBuild.value:
+        FB_Check = 'Y'
     if ME_Units == "E":
         Ediameter: adsk.core.TextBoxCommandInput = inputs.itemById('Ediameter')
         Epitch: adsk.core.TextBoxCommandInput = inputs.itemById('Epitch')
@@ -1940,6 +2266,7 @@ def command_execute(args: adsk.core.CommandEventArgs):
     angleTop = angleTop.text
     angleBot = angleBot.text
     splinePts = splinePts.text
+    splineTol = splineTol.text
     Bolt_Sides = Bolt_Sides.text
     Nut_Sides = Nut_Sides.text
     MF_Gap = MF_Gap.text
@@ -1949,46 +2276,54 @@ def command_execute(args: adsk.core.CommandEventArgs):
         height = str(abs(Ht))
     GR_Char = 'C'
     RL_Char = 'R'
-    iST_Char = 1
     if GuideRail == 'Helix':
         GR_Char = 'H'
     elif GuideRail == 'Pattern':
         GR_Char = 'P'
     elif GuideRail =='LongHelix':
         GR_Char = 'L'               # This option can really bog down fusion if there are a lot of threads
+    elif GuideRail == 'NurbsHelix':
+        GR_Char = 'N'
+    elif GuideRail == 'BRepHelix':
+        GR_Char = 'B'
     if RtLt == 'Left':
         RL_Char = 'L'
-    if ST_Num == '2 Start':
-        iST_Char = 2
-    elif ST_Num == '4 Start':
-        iST_Char = 4      
+    iST_Char = int(ST_Num.split()[0])              # '3 Start' is 3 starts
     ST_Char = str (iST_Char)
     sPts = int(splinePts)
-    start = time.time()
+    if ME_Units == 'M':
+        OD = float(diameter)
+    else:
+        OD = float(Ediameter) * 25.4
+# Tolerance mode, work out the fewest spline points that keep the helix within the tolerance
+# The female threads are drawn MF_Gap further out, so size the points for those
+    if float(splineTol) > 0:
+        sPts = threadgeom.points_for_tolerance(OD / 2.0 + abs(float(MF_Gap)), float(splineTol))
+        splineName = str(sPts)
+    else:
+        splineName = splinePts
 # Write back user inputs as defaults for next time
 # Putting the code below in a subroutine does not use the global variables for some reason & it does not make any sense to me.
 # If I print pitHelix and MF_Gap before this & put the following 6 lines in a subroutine, the subroutine will use the values from when it 1st read the DialogInput_V9.txt file & not current values
 # so I have to duplicate the code to get it to work correctly.
     if ME_Units == 'M':
-        BoltNut = Bolt_Sides + "," + BoltFlat_Dia + "," + BoltHd_Ht + "," + Nut_Sides + "," + NutFlat_Dia + "," + NutHd_Ht + "," + MF_Gap + "," + CT_Check + "," + CN_Check + "," + RL_Check + "," + Cham_Wid + "," + Thread_Wid + "," + Thread_Ht
+        BoltNut = Bolt_Sides + "," + BoltFlat_Dia + "," + BoltHd_Ht + "," + Nut_Sides + "," + NutFlat_Dia + "," + NutHd_Ht + "," + MF_Gap + "," + CT_Check + "," + CN_Check + "," + RL_Check + "," + Cham_Wid + "," + Thread_Wid + "," + Thread_Ht + "," + splineTol + "," + FB_Check
         OutString = diameter +',' + pitch +',' + pitHelix + ',' + height +',' + angleTop +',' + angleBot +',' + splinePts +',' + GR_Char +',' + RL_Char + ',' + ST_Char + ',' + TY_Char + ',' + BoltNut
         with open(Fname, 'w') as csvfile:
             csvfile.write(OutString)
         csvfile.close
-        Body_Name = "M" + diameter + "_" + pitch + "TPx" + pitHelix + "HPx" + height + "mm" + "_" + RL_Char + "_" + angleTop + "D_" + angleBot + "D_" + splinePts + "spts_" + GR_Char + "_Guide"
-        OD = float(diameter)
+        Body_Name = "M" + diameter + "_" + pitch + "TPx" + pitHelix + "HPx" + height + "mm" + "_" + RL_Char + "_" + angleTop + "D_" + angleBot + "D_" + splineName + "spts_" + GR_Char + "_Guide"
         Pit = float(pitch)
         PitHlx = float(pitHelix)
         F_Height = float(height)
         F_Cham_Wid = float(Cham_Wid)
     else:
-        BoltNut = Bolt_Sides + "," + BoltFlat_EDia + "," + BoltHd_EHt + "," + Nut_Sides + "," + NutFlat_EDia + "," + NutHd_EHt + "," + MF_Gap + "," + CT_Check + "," + CN_Check + "," + RL_Check + "," + Cham_EWid + "," + Thread_EWid + "," + Thread_EHt
+        BoltNut = Bolt_Sides + "," + BoltFlat_EDia + "," + BoltHd_EHt + "," + Nut_Sides + "," + NutFlat_EDia + "," + NutHd_EHt + "," + MF_Gap + "," + CT_Check + "," + CN_Check + "," + RL_Check + "," + Cham_EWid + "," + Thread_EWid + "," + Thread_EHt + "," + splineTol + "," + FB_Check
         OutString = Ediameter +',' + Epitch +',' + EpitHelix + ',' + Eheight +',' + angleTop +',' + angleBot +',' + splinePts +',' + GR_Char +',' + RL_Char + ',' + ST_Char + ',' + TY_Char + ',' + BoltNut
         with open(EFname, 'w') as csvfile:
             csvfile.write(OutString)
         csvfile.close
-        Body_Name = Ediameter + "_" + Epitch + "TPIx" + EpitHelix + "HTPIx" + Eheight + '"' + "_" + RL_Char + "_" + angleTop + "D_" + angleBot + "D_" + splinePts + "spts_" + GR_Char + "_Guide"
-        OD = float(Ediameter) * 25.4
+        Body_Name = Ediameter + "_" + Epitch + "TPIx" + EpitHelix + "HTPIx" + Eheight + '"' + "_" + RL_Char + "_" + angleTop + "D_" + angleBot + "D_" + splineName + "spts_" + GR_Char + "_Guide"
         Pit = (1.0 / float(Epitch)) * 25.4
         PitHlx = (1.0 / float(EpitHelix)) * 25.4
         F_Height = float(Eheight) * 25.4
@@ -2003,67 +2338,237 @@ def command_execute(args: adsk.core.CommandEventArgs):
 # 5 - Bolt & Nut Threads
 # 6 - Coils
     iTY_Char = int(TY_Char)
+# Every span of the build is tagged with the whole dialog, in mm, so the times can be lined up against any of it
+    Params = dict(type=iTY_Char, units=ME_Units, diameter=diameter, pitch=pitch, pitHelix=pitHelix, height=height, angleTop=angleTop,
+                  angleBot=angleBot, splinePts=sPts, splineTol=splineTol, GuideRail=GuideRail, RightLeft=RtLt, starts=iST_Char,
+                  MF_Gap=MF_Gap, Bolt_Sides=Bolt_Sides, BoltFlat_Dia=BoltFlat_Dia, BoltHd_Ht=BoltHd_Ht, Nut_Sides=Nut_Sides,
+                  NutFlat_Dia=NutFlat_Dia, NutHd_Ht=NutHd_Ht, Cham_Wid=Cham_Wid, ChamThread=CT_Check, ChamNut=CN_Check,
+                  RealOffset=RL_Check, FastBuild=FB_Check)
+    if OffsetNutThreads(GR_Char, iTY_Char, RL_Check):
+        Params.update(OffsetNut='Y')
     if iTY_Char == 6:
-        OutString1 = Cposition + ',' + Cdia_Sect + ',' + CpolySides + ',' + CvertPos + ',' + CellipseX + ',' + CellipseY + ',' + Crect_Wid +',' + Crect_Ht + ',' + CPosRect + ',' +  CStarOut_Rad + ',' + CStarIn_Rad + ',' + CStar_Num
-        OutString = CoilType + ',' + Cdiameter +',' + Crevs + ',' + Cheight + ',' + Cpitch + ',' + Cangle + ',' + CsplinePts + ',' + GRC_Char + ',' + CSec_Type + ',' + OutString1
-        with open(CFname, 'w') as csvfile:
-            csvfile.write(OutString)
-        csvfile.close
-        Cspts = int(CsplinePts)
-        Coil_Name = "Coil_" + Cdiameter
-        subComp1 = CreateNewComponent(Coil_Name)
-        DrawCoil(subComp1, CoilType, Cdiameter, CSec_Type, CpolySides, CellipseX, CellipseY, Cposition, CPosRect, Crect_Wid, Crect_Ht, CStarOut_Rad, CStarIn_Rad, CStar_Num, Cpitch, Crevs, Cheight, Cspts, GRC_Char, RL_Char, Cangle, CvertPos)
-    else:
-        subComp1 = CreateNewComponent(Body_Name)
-        if iTY_Char != 4:
-            DrawThreads(subComp1, OD, Pit, PitHlx, F_Height, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 0, iTY_Char)
-            if CT_Check == 'Y':
-                ChamferTopThreads(subComp1, OD / 2, F_Height, F_Cham_Wid)
-        if iTY_Char == 2 or iTY_Char == 5:
-            DrawBoltHead(subComp1, float(BoltFlat_Dia),int(Bolt_Sides),float(BoltHd_Ht))
-        if iTY_Char > 2:
-            NH_Ht = float(NutHd_Ht)
-            Nt_Thread_Ht = NH_Ht + Pit + Pit
-            Subbodies = GetBodies(subComp1)
-            if Subbodies:
-                hide_body(Subbodies)                                # Hide the Bolt Threads
-            OD1 = (float(MF_Gap) * 2.0)  + OD                   # Used if not doing real offsets of threads
-            if ME_Units == 'M':
-                BodyNut_Name = "M" + diameter + "_" + MF_Gap + "_MF_Gap_Nut"
-            else:
-                BodyNut_Name = Ediameter + "_" + Epitch + "TPIx" + EpitHelix + "HTPIx" + "_" + MF_Gap + "mm_MF_Gap_Nut"
-            if RL_Check == 'Y':
-                if iTY_Char == 3:
-                    DrawThreads(subComp1, OD, Pit, PitHlx, F_Height, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char)
-                else:
-                    DrawThreads(subComp1, OD, Pit, PitHlx, Nt_Thread_Ht, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char)
-            else:
-                if iTY_Char == 3:
-                    DrawThreads(subComp1, OD1, Pit, PitHlx, F_Height, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char)
-                else:
-                    DrawThreads(subComp1, OD1, Pit, PitHlx, Nt_Thread_Ht, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char)
-            if iTY_Char > 3:
-                DrawNut(subComp1, float(NutFlat_Dia), int(Nut_Sides), float(NutHd_Ht),float(pitch))
-                subtract_bodies(subComp1)               # Subtract the Threads from the Nut
-            if CN_Check == 'Y':
-                if iTY_Char > 3:
-                    ChamferNut(subComp1, OD1, Pit, PitHlx, NH_Ht, F_Cham_Wid, iTY_Char)
+        Params.update(CoilType=CoilType, Cdiameter=Cdiameter, Crevs=Crevs, Cheight=Cheight, Cpitch=Cpitch, Cangle=Cangle,
+                      CsplinePts=CsplinePts, CsplineTol=CsplineTol, CSec_Type=CSec_Type, Cposition=Cposition, Cdia_Sect=Cdia_Sect,
+                      CpolySides=CpolySides, CvertPos=CvertPos, CellipseX=CellipseX, CellipseY=CellipseY, Crect_Wid=Crect_Wid,
+                      Crect_Ht=Crect_Ht, CPosRect=CPosRect, CStarOut_Rad=CStarOut_Rad, CStarIn_Rad=CStarIn_Rad, CStar_Num=CStar_Num)
+# The same dialog values were built before in this design, so insert another occurrence of that component instead
+    Spec_Hash = SpecHash(Params)
+    if config.REUSE_COMPONENTS and not _ForceRebuild.value:
+        cached = FindCachedComponent(Spec_Hash)
+        if cached is not None:
+            rootComp.occurrences.addExistingComponent(cached, adsk.core.Matrix3D.create())
+            futil.log(f'Reused {cached.name}, check Force Rebuild to build it again')
+            return
+# Threads of the other hand are in the design, a mirror image of their bodies is this hand without sweeping anything
+        cached = None
+        if iTY_Char != 6:
+            cached = FindCachedComponent(SpecHash(dict(Params, RightLeft=OTHER_HAND[RtLt])))
+        if cached is not None:
+            subComp1 = CreateNewComponent(Body_Name)
+            MirrorBodies(cached, subComp1)
+            TagComponent(subComp1, Spec_Hash, Params)
+            design.timeline.timelineGroups.add(Tstart, design.timeline.markerPosition - 1)
+            futil.log(f'Mirrored {cached.name}, check Force Rebuild to build it again')
+            return
+# A build estimated to tie Fusion up for a long time, or to fill the timeline, needs an OK before it starts
+    if not ConfirmCost(Params):
+        return
+    Spans = None
+    if config.SPANS_LOG or config.HISTORY_DB:
+        Spans = perf.SpanRecorder(Params)
+        Spans.pause()                       # SpanStages runs its clock while the stages draw, not the Long Build message or the waits
+# The build is a generator of stages, so build_step can draw it a stage at a time & keep Fusion responsive
+    def BuildStages():
+        global Build
+        global Spans
+        global BodyNut_Name
+        global Build_Values
+        global Thread_Seed
+        Build_Values = dict(angleTop=angleTop, angleBot=angleBot, MF_Gap=MF_Gap, splineTol=splineTol)
+        Thread_Seed = None
+# Defer the sketch computes while drawing, BuildContext computes them again & restores the precision even if something fails
+        try:
+            with BuildContext(preferences) as Build:
+                if iTY_Char == 6:
+                    OutString1 = Cposition + ',' + Cdia_Sect + ',' + CpolySides + ',' + CvertPos + ',' + CellipseX + ',' + CellipseY + ',' + Crect_Wid +',' + Crect_Ht + ',' + CPosRect + ',' +  CStarOut_Rad + ',' + CStarIn_Rad + ',' + CStar_Num + ',' + CsplineTol
+                    OutString = CoilType + ',' + Cdiameter +',' + Crevs + ',' + Cheight + ',' + Cpitch + ',' + Cangle + ',' + CsplinePts + ',' + GRC_Char + ',' + CSec_Type + ',' + OutString1
+                    with open(CFname, 'w') as csvfile:
+                        csvfile.write(OutString)
+                    csvfile.close
+                    Cspts = int(CsplinePts)
+                    if float(CsplineTol) > 0:
+                        C_MaxRad = threadgeom.coil_max_radius(CoilType, Cdiameter, CSec_Type, Cdia_Sect, CellipseX, Crect_Wid, CStarOut_Rad, Cpitch, Crevs, Cheight, Cangle)
+                        Cspts = threadgeom.points_for_tolerance(C_MaxRad, float(CsplineTol), multiple=4)
+                    Coil_Name = "Coil_" + Cdiameter
+                    subComp1 = CreateNewComponent(Coil_Name)
+                    with Span('coil'):
+                        yield from DrawCoil(subComp1, CoilType, Cdiameter, CSec_Type, CpolySides, CellipseX, CellipseY, Cposition, CPosRect, Crect_Wid, Crect_Ht, CStarOut_Rad, CStarIn_Rad, CStar_Num, Cpitch, Crevs, Cheight, Cspts, GRC_Char, RL_Char, Cangle, CvertPos)
                 else:
-                    ChamferNut(subComp1, OD1, Pit, PitHlx, F_Height, F_Cham_Wid, iTY_Char)
-            if Subbodies:
-                unhide_body(Subbodies)              # Unhide the Bolt Threads
-            bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
-            numBodies = bsubComp1_bodies.count                  # Get a count of the bodies used, should be 3
-            NutThreads = bsubComp1_bodies.item(numBodies-1)     # This should be the Nut just drawn
-            NutThreads.name = BodyNut_Name                      # Rename the Nut or Nut Threads
+                    subComp1 = CreateNewComponent(Body_Name)
+                    if iTY_Char != 4:
+# The chamfer of the top of the threads is cut with the flush cuts of DrawCylinder
+                        Cham = None
+                        if CT_Check == 'Y':
+                            Cham = (OD / 2, F_Cham_Wid)
+                        with Span('threads'):
+                            yield from DrawThreads(subComp1, OD, Pit, PitHlx, F_Height, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 0, iTY_Char, Cham)
+                    if iTY_Char == 2 or iTY_Char == 5:
+                        yield 'bolt head extrude'
+                        with Span('bolt head extrude'):
+                            DrawBoltHead(subComp1, float(BoltFlat_Dia),int(Bolt_Sides),float(BoltHd_Ht))
+                    if iTY_Char > 2:
+                        NH_Ht = float(NutHd_Ht)
+                        Nt_Thread_Ht = NH_Ht + Pit + Pit
+                        Subbodies = GetBodies(subComp1)
+                        if Subbodies:
+                            hide_body(Subbodies)                                # Hide the Bolt Threads
+                        OD1 = (float(MF_Gap) * 2.0)  + OD                   # Used if not doing real offsets of threads
+                        if ME_Units == 'M':
+                            BodyNut_Name = "M" + diameter + "_" + MF_Gap + "_MF_Gap_Nut"
+                        else:
+                            BodyNut_Name = Ediameter + "_" + Epitch + "TPIx" + EpitHelix + "HTPIx" + "_" + MF_Gap + "mm_MF_Gap_Nut"
+                        Cham = None
+                        if CN_Check == 'Y' and iTY_Char == 3:
+                            Cham = (OD1 / 2, F_Cham_Wid)                    # Female threads are chamfered like the male ones
+                        with Span('nut threads'):
+                            if RL_Check == 'Y':
+                                if iTY_Char == 3:
+                                    yield from DrawThreads(subComp1, OD, Pit, PitHlx, F_Height, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char, Cham)
+                                else:
+                                    yield from DrawThreads(subComp1, OD, Pit, PitHlx, Nt_Thread_Ht, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char)
+                            else:
+                                if iTY_Char == 3:
+                                    yield from DrawThreads(subComp1, OD1, Pit, PitHlx, F_Height, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char, Cham)
+                                else:
+                                    yield from DrawThreads(subComp1, OD1, Pit, PitHlx, Nt_Thread_Ht, sPts, GR_Char, RL_Char, iST_Char, RL_Check, 1, iTY_Char)
+                        if iTY_Char > 3:
+                            yield 'nut extrude'
+                            with Span('nut extrude'):
+                                DrawNut(subComp1, float(NutFlat_Dia), int(Nut_Sides), float(NutHd_Ht),float(pitch))
+                            yield 'combine/subtract'
+                            with Span('combine/subtract'):
+                                subtract_bodies(subComp1)               # Subtract the Threads from the Nut
+                        if CN_Check == 'Y' and iTY_Char > 3:
+                            yield 'chamfer revolve'
+                            with Span('chamfer revolve'):
+                                ChamferNut(subComp1, OD1, Pit, PitHlx, NH_Ht, F_Cham_Wid, iTY_Char)
+                        if Subbodies:
+                            unhide_body(Subbodies)              # Unhide the Bolt Threads
+                        bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
+                        numBodies = bsubComp1_bodies.count                  # Get a count of the bodies used, should be 3
+                        NutThreads = bsubComp1_bodies.item(numBodies-1)     # This should be the Nut just drawn
+                        NutThreads.name = BodyNut_Name                      # Rename the Nut or Nut Threads
+        finally:
+            Build = None
+            Build_Values = None
+            Thread_Seed = None
+        if FB_Check == 'Y':
+            yield 'fast build collapse'
+            with Span('fast build collapse'):
+                CollapseToBaseFeature(subComp1, Tstart)
 # Group everything used to create the gear in the timeline.
-    timelineGroups = design.timeline.timelineGroups
-    TLend = design.timeline.markerPosition - 1
-    timelineGroups.add(Tstart, TLend)
-    end = time.time()
-    Elapsed = round(end - start,2)
-    #msg = f'Elapsed Time: {Elapsed} seconds'
-    #ui.messageBox(msg)
+        timelineGroups = design.timeline.timelineGroups
+        TLend = design.timeline.markerPosition - 1
+        timelineGroups.add(Tstart, TLend)
+# Only a build that drew every stage gets this far, a stage that fails raises & is rolled back, so it is
+# not tagged for reuse or kept in the spans log, the history & the cost model
+        if config.REUSE_COMPONENTS and subComp1.bRepBodies.count > 0:
+            TagComponent(subComp1, Spec_Hash, Params)
+# Keep the stage times, a log or history that cannot be written must not spoil the build
+        if Spans is not None:
+            if config.SPANS_LOG:
+                try:
+                    Spans.write(config.SPANS_LOG)
+                except:
+                    futil.handle_error('Write timing spans')
+            if config.HISTORY_DB:
+                try:
+                    perf.record_build(config.HISTORY_DB, Spans.records(), subComp1.name, app.version)
+                    changes = perf.regression_report(config.HISTORY_DB, config.HISTORY_RECENT, config.HISTORY_REGRESSION, Params, config.HISTORY_MIN_MS)
+                    if any(change.regressed for change in changes):
+                        futil.log('Slower than the history of this part:\n' + perf.format_report(changes), force_console=True)
+                except:
+                    futil.handle_error('Build history')
+            Spans = None
+    StartStages(SpanStages(BuildStages()), Tstart, EstimateSeconds(Params), f'{CMD_NAME} {Body_Name}')
+# Draw the stages a custom event at a time with a progress dialog, or all of them now when there is no custom event.
+# Either way a stage that fails takes the design back to Tstart
+def StartStages(stages, Tstart, seconds, title):
+    global Running
+    if Step_Event is None or not config.CHUNKED_BUILD:
+        occurrences = rootComp.occurrences.count
+        try:
+            RunStages(stages)               # Not started inside Fusion, or chunking is off, so draw it all now
+        except:
+            roll_back(design, Tstart, occurrences)
+            raise
+        return
+    Running = StepRunner(app, stages, Tstart, seconds, title)
+    Running.start(STEP_EVENT_ID)
+# Hash of the whole dialog, in mm, that a built component is tagged with & looked up by
+def SpecHash(Params):
+    return hashlib.sha1(perf.spec_key(Params).encode('utf-8')).hexdigest()
+# A component in the design tagged with Spec_Hash that still has its bodies, or None
+def FindCachedComponent(Spec_Hash):
+    for attr in design.findAttributes(CACHE_GROUP, 'spec'):
+        component = attr.parent
+        if attr.value == Spec_Hash and component is not None and component.isValid and component.bRepBodies.count > 0:
+            return component
+    return None
+# Tag a finished component with its hash, & the values themselves so they can be read back from the design
+def TagComponent(subComp1, Spec_Hash, Params):
+    subComp1.attributes.add(CACHE_GROUP, 'spec', Spec_Hash)
+    subComp1.attributes.add(CACHE_GROUP, 'params', perf.spec_key(Params))
+# Reflection through the XZ plane, the threads of one hand become the other
+def MirrorXZ():
+    transform = adsk.core.Matrix3D.create()
+    transform.setCell(1, 1, -1.0)
+    return transform
+# Mirror images of the bodies of source into subComp1, the bolt head, nut & chamfers are symmetric about the XZ plane
+# so only the hand of the threads changes. The body named after source is named after subComp1
+def MirrorBodies(source, subComp1):
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+    bodies = []
+    for body in source.bRepBodies:
+        tempBody = tempBRep.copy(body)
+        tempBRep.transform(tempBody, MirrorXZ())
+        name = body.name
+        if name == source.name:
+            name = subComp1.name
+        bodies.append((tempBody, name, body.isLightBulbOn))
+    AddBaseBodies(subComp1, bodies)
+# Fast build, swap everything drawn after the new component for plain copies of the bodies in one
+# Base Feature, so later recomputes of the design only have the Base Feature to do for these threads
+def CollapseToBaseFeature(subComp1, Tstart):
+    if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        return                                          # Direct modeling has no timeline to collapse
+    tempBRep = adsk.fusion.TemporaryBRepManager.get()
+    bodies = []
+    for body in subComp1.bRepBodies:
+        bodies.append((tempBRep.copy(body), body.name, body.isLightBulbOn))
+    timeline = design.timeline
+    timeline.markerPosition = Tstart + 1                # Keep the new component, it is the 1st item after Tstart
+    timeline.deleteAllAfterMarker()
+    AddBaseBodies(subComp1, bodies)
+# Add (TemporaryBRepManager body, name, visible) to the component, all in one Base Feature if the design has history
+def AddBaseBodies(subComp1, bodies):
+    if design.designType != adsk.fusion.DesignTypes.ParametricDesignType:
+        for tempBody, name, visible in bodies:
+            body = subComp1.bRepBodies.add(tempBody)
+            body.name = name
+            body.isLightBulbOn = visible
+        return
+    baseFeat = subComp1.features.baseFeatures.add()
+    baseFeat.startEdit()
+    for tempBody, name, visible in bodies:
+        subComp1.bRepBodies.add(tempBody, baseFeat)
+    baseFeat.finishEdit()
+    baseFeat.name = subComp1.name
+# Put the body names & visibility back, the bodies come back in the same order they were added
+    for i in range(baseFeat.bodies.count):
+        body = baseFeat.bodies.item(i)
+        body.name = bodies[i][1]
+        body.isLightBulbOn = bodies[i][2]
 def GetBodies(subComp1):
 # Create an empty collection to store bodies
     bsubComp1_bodies = subComp1.bRepBodies              # Collect the bodies used in our component
@@ -2107,11 +2612,153 @@ def unhide_body(Subbodies):
 def command_preview(args: adsk.core.CommandEventArgs):
 # General logging for debug.
     futil.log(f'{CMD_NAME} Command Preview Event')
-    #inputs = args.command.commandInputs
+    inputs = args.command.commandInputs
+# Show a quick mesh of the threads or coil from the current dialog values, no features are made until OK
+    ClearPreview()
+    try:
+        mesh = PreviewMesh(inputs)
+    except (ValueError, ZeroDivisionError, IndexError):
+        return                                  # Something in the dialog is not a usable number yet
+    global Preview_Group
+    Preview_Group = rootComp.customGraphicsGroups.add()
+    coords = adsk.fusion.CustomGraphicsCoordinates.create(mesh.coordinates)
+    Preview_Group.addMesh(coords, mesh.indices, [], [])
+def ClearPreview():
+    global Preview_Group
+    if Preview_Group and Preview_Group.isValid:
+        Preview_Group.deleteMe()
+    Preview_Group = None
+# Mesh of the threads (all the starts) or the coil, a thread is the single thread section swept along its helix
+def PreviewMesh(inputs):
+    TY_Char = inputs.itemById('WhatType').selectedItem.name[0]
+    direction = 1
+    if inputs.itemById('RightLeft').selectedItem.name == 'Left':
+        direction = -1
+    if TY_Char == '6':
+        return PreviewCoilMesh(inputs, direction)
+    if inputs.itemById('EnglishMetric').selectedItem.index == 0:
+        OD = float(inputs.itemById('Ediameter').text) * 25.4
+        Pit = (1.0 / float(inputs.itemById('Epitch').text)) * 25.4
+        PitHlx = (1.0 / float(inputs.itemById('EpitHelix').text)) * 25.4
+        Ht = float(inputs.itemById('Eheight').text) * 25.4
+    else:
+        OD = float(inputs.itemById('diameter').text)
+        Pit = float(inputs.itemById('pitch').text)
+        PitHlx = float(inputs.itemById('pitHelix').text)
+        Ht = float(inputs.itemById('height').text)
+    angleTop = float(inputs.itemById('angleTop').text)
+    angleBot = float(inputs.itemById('angleBot').text)
+    starts = int(inputs.itemById('Starts').selectedItem.name.split()[0])
+    prof = threadgeom.thread_profile(threadgeom.ThreadSpec(OD, Pit, PitHlx, angleTop, angleBot))
+    section = [(x, -y) for x, y in prof.vertices[:5]]          # Sketch Y on the XZ plane is negative Z
+    section.append((prof.x0, section[-1][1]))
+    PitHlx1 = PitHlx * .1
+    revs = abs(Ht) * .1 / PitHlx1
+    pts = PreviewPoints(revs * starts)
+    meshes = []
+    for i in range(starts):
+        stations = threadgeom.helix_stations(pts, revs, PitHlx1, 0.0, direction, 2 * math.pi * i / starts)
+        meshes.append(threadgeom.sweep_mesh(section, stations))
+    return threadgeom.merge_meshes(meshes)
+def PreviewCoilMesh(inputs, direction):
+    CoilType = inputs.itemById('CoilType').selectedItem.name[0]
+    CSec_Type = inputs.itemById('CSec_Type').selectedItem.name[0]
+    Cposition = inputs.itemById('Cposition').selectedItem.name[0]
+    CvertPos = inputs.itemById('CvertPos').selectedItem.name[0]
+    F_Rad1 = float(inputs.itemById('Cdiameter').text) / 2.0 * .1
+    I_revs = int(inputs.itemById('Crevs').text)
+    F_pitch = float(inputs.itemById('Cpitch').text) * .1
+    Ht1 = float(inputs.itemById('Cheight').text) * .1
+    points = threadgeom.coil_section(CSec_Type, F_Rad1, Cposition, CvertPos,
+                                     float(inputs.itemById('Cdia_Sect').text) * .1, int(inputs.itemById('CpolySides').text),
+                                     float(inputs.itemById('CellipseX').text) * .1, float(inputs.itemById('CellipseY').text) * .1,
+                                     float(inputs.itemById('Crect_Wid').text) * .1, float(inputs.itemById('Crect_Ht').text) * .1,
+                                     inputs.itemById('CPosRect').selectedItem.name[0], float(inputs.itemById('CStarOut_Rad').text) * .1,
+                                     float(inputs.itemById('CStarIn_Rad').text) * .1, int(inputs.itemById('CStar_Num').text))
+    section = [(x, -y) for x, y in points]
+    stations = threadgeom.coil_stations(CoilType, PreviewPoints(I_revs), I_revs, F_pitch, Ht1,
+                                        float(inputs.itemById('Cangle').text), direction)
+    return threadgeom.sweep_mesh(section, stations)
+# BuildSpec of the dialog values, what the estimate of the build time & features goes on
+def DialogSpec(inputs):
+    TY_Char = inputs.itemById('WhatType').selectedItem.name[0]
+    if TY_Char == '6':
+        C = {id: inputs.itemById(id).text for id in ('Cdiameter', 'Cdia_Sect', 'CellipseX', 'Crect_Wid', 'CStarOut_Rad', 'Cpitch',
+                                                      'Crevs', 'Cheight', 'Cangle', 'CsplinePts', 'CsplineTol')}
+        CoilType = inputs.itemById('CoilType').selectedItem.name[0]
+        CsplinePts = int(C['CsplinePts'])
+        if float(C['CsplineTol']) > 0:
+            C_MaxRad = threadgeom.coil_max_radius(CoilType, C['Cdiameter'], inputs.itemById('CSec_Type').selectedItem.name[0], C['Cdia_Sect'],
+                                                  C['CellipseX'], C['Crect_Wid'], C['CStarOut_Rad'], C['Cpitch'], C['Crevs'], C['Cheight'], C['Cangle'])
+            CsplinePts = threadgeom.points_for_tolerance(C_MaxRad, float(C['CsplineTol']), multiple=4)
+        return perf.build_spec(dict(type=6, CoilType=CoilType, Crevs=C['Crevs'], Cheight=C['Cheight'], Cpitch=C['Cpitch'], CsplinePts=CsplinePts))
+    if inputs.itemById('EnglishMetric').selectedItem.index == 0:
+        OD = float(inputs.itemById('Ediameter').text) * 25.4
+        PitHlx = (1.0 / float(inputs.itemById('EpitHelix').text)) * 25.4
+        Ht = float(inputs.itemById('Eheight').text) * 25.4
+    else:
+        OD = float(inputs.itemById('diameter').text)
+        PitHlx = float(inputs.itemById('pitHelix').text)
+        Ht = float(inputs.itemById('height').text)
+    sPts = int(inputs.itemById('splinePts').text)
+    splineTol = float(inputs.itemById('splineTol').text)
+    if splineTol > 0:
+        sPts = threadgeom.points_for_tolerance(OD / 2.0 + abs(float(inputs.itemById('MF_Gap').text)), splineTol)
+    YN = lambda id: 'Y' if inputs.itemById(id).value else 'N'
+    return perf.build_spec(dict(type=int(TY_Char), GuideRail=inputs.itemById('GuideRail').selectedItem.name, height=Ht, pitHelix=PitHlx,
+                                splinePts=sPts, starts=int(inputs.itemById('Starts').selectedItem.name.split()[0]),
+                                ChamThread=YN('_ChamThread'), ChamNut=YN('_ChamNut'), FastBuild=YN('_FastBuild'),
+                                OffsetNut='Y' if OffsetNutThreads(inputs.itemById('GuideRail').selectedItem.name[0], int(TY_Char), YN('_RealOffset')) else 'N'))
+# Show the estimate of the build in the dialog, blank while a value is not a usable number
+def UpdateEstimate(inputs):
+    box = inputs.itemById('Estimate')
+    if box is None or Cost_Model is None:
+        return
+    try:
+        estimate = Cost_Model.estimate(DialogSpec(inputs), config.PATTERN_DOUBLING_REVS)
+    except (ValueError, ZeroDivisionError, IndexError, KeyError):
+        box.text = ''
+        return
+    text = f'{estimate.seconds:.0f} s, {estimate.features} features'
+    if estimate.seconds < 1:
+        text = f'under 1 s, {estimate.features} features'
+    if not estimate.fitted:
+        text += ' (rough)'
+    box.text = text
+# Estimated seconds for the build, what the progress of a build drawn a stage at a time is measured against
+def EstimateSeconds(Params):
+    model = Cost_Model or perf.CostModel()
+    try:
+        return model.estimate(perf.build_spec(Params), config.PATTERN_DOUBLING_REVS).seconds
+    except (ValueError, ZeroDivisionError, KeyError):
+        return config.COST_CONFIRM_SECONDS
+# Ask before a build estimated over config.COST_CONFIRM_SECONDS or COST_CONFIRM_FEATURES, False when the user says No
+def ConfirmCost(Params):
+    model = Cost_Model or perf.CostModel()
+    try:
+        spec = perf.build_spec(Params)
+        estimate = model.estimate(spec, config.PATTERN_DOUBLING_REVS)
+    except (ValueError, ZeroDivisionError, KeyError):
+        return True
+    if estimate.seconds <= config.COST_CONFIRM_SECONDS and estimate.features <= config.COST_CONFIRM_FEATURES:
+        return True
+    msg = f'This build is estimated to take {estimate.seconds:.0f} seconds & add {estimate.features} features to the timeline.'
+    if not estimate.fitted:
+        msg += '<br>(A rough estimate, it gets better as more builds are made.)'
+    tips = model.suggestions(spec, config.COST_CONFIRM_SECONDS, config.PATTERN_DOUBLING_REVS)
+    if tips:
+        msg += '<br><br>Quicker options:<br>' + '<br>'.join(tips)
+    msg += '<br><br>Build it anyway?'
+    answer = ui.messageBox(msg, 'Long Build', adsk.core.MessageBoxButtonTypes.YesNoButtonType, adsk.core.MessageBoxIconTypes.WarningIconType)
+    return answer == adsk.core.DialogResults.DialogYes
+# Fewer points per revolution on long threads & coils so the preview stays quick
+def PreviewPoints(revs):
+    return max(config.PREVIEW_MIN_PTS, min(config.PREVIEW_PTS, int(config.PREVIEW_MAX_STATIONS / max(revs, 1))))
 # These are all the inputs that are currently checked when they change in the dialog box
 # MetTpe, diameter, pitch, angleTop, angleBot, Starts
 # WhatType, height, pitHelix, splinePts, GuideRail, RightLeft, Cham_Wid, _ChamThread, _ChamNut, _RealOffset
 # APITabBar, Bolt_Sides, BoltFlat_Dia, BoltHd_Ht, Nut_Sides, NutFlat_Dia, NutHd_Ht, MF_Gap
+@Profiled
 def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
     #msg = f'args.input.id = {args.input.id}'
@@ -2209,6 +2856,7 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 # Only run this routine when we need to
     if i_Calc == 1:
         CalcThread(0)
+    UpdateEstimate(changed_input.parentCommand.commandInputs)
 # General logging for debug.
     futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
 # This event handler is called when the user interacts with any of the inputs in the dialog
@@ -2227,5 +2875,6 @@ def command_validate_input(args: adsk.core.ValidateInputsEventArgs):
 def command_destroy(args: adsk.core.CommandEventArgs):
 # General logging for debug.
     futil.log(f'{CMD_NAME} Command Destroy Event')
+    ClearPreview()
     global local_handlers
     local_handlers = []
\ No newline at end of file
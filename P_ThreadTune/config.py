@@ -10,6 +10,15 @@ import os
 # are ready to distribute it.
 DEBUG = True
 
+# Profile the command created, input changed & execute events with cProfile. Each call writes a
+# .prof file named by the body & time to PROFILE_FOLDER, only the newest PROFILE_HISTORY are kept,
+# & the PROFILE_TOP_N slowest functions are listed in the Text Command window. A build drawn a stage
+# at a time is one .prof, from the execute event through the last of its build step events.
+PROFILE = False
+PROFILE_HISTORY = 20
+PROFILE_TOP_N = 15
+PROFILE_FOLDER = os.path.join(os.path.dirname(__file__), 'profiles')
+
 # Gets the name of the add-in from the name of the folder the py file is in.
 # This is used when defining unique internal names for various UI elements 
 # that need a unique name. It's also recommended to use a company name as 
@@ -17,5 +26,68 @@ DEBUG = True
 ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 COMPANY_NAME = 'ACME'
 
+# Pattern & NurbsHelix threads with more revolutions than this are built by copying & joining
+# doubling blocks of revolutions instead of one path pattern of every revolution.
+PATTERN_DOUBLING_REVS = 32
+
+# LongHelix, coil & spiral paths are fitted as a chain of splines with at most this many points each,
+# joined end to end with smooth constraints, so the fit & the sweep grow linearly with the length.
+SPLINE_SEGMENT_PTS = 100
+
+# Arcs per revolution of the rational NURBS helices of the NurbsHelix & BRepHelix guides. They are off
+# the true helix in Z by up to 0.36 * helix pitch / arcs**3, 4 arcs is about a 36 point fitted spline.
+# With a Helix Tolerance in the dialog, the arcs are worked out from the tolerance instead.
+NURBS_SPANS_PER_TURN = 4
+
+# Live preview mesh, points per revolution & the most sections swept for the whole preview,
+# long threads drop towards PREVIEW_MIN_PTS so the preview stays around 50 ms.
+PREVIEW_PTS = 16
+PREVIEW_MIN_PTS = 6
+PREVIEW_MAX_STATIONS = 1500
+
+# Points around each revolution of the STL & 3MF mesh export, 48 keeps the flat facets
+# within 0.01 mm of round on an M8 & 0.05 mm on an M50.
+EXPORT_COLUMNS = 48
+
+# Each build appends the time of its stages (profile sketch, sweep, path pattern ...) tagged with the
+# dialog parameters to this JSON lines log next to the add-in, None turns the timing spans off.
+SPANS_LOG = os.path.join(os.path.dirname(__file__), 'build_spans.jsonl')
+
+# Every build & its stage times are kept in this SQLite database too, None turns it off. After a build,
+# its newest HISTORY_RECENT builds of the same parameters are compared with the ones before them &
+# stages more than HISTORY_REGRESSION percent & HISTORY_MIN_MS slower are listed in the Text Command
+# window. python -m P_ThreadTune.cli history reports on every part in it.
+HISTORY_DB = os.path.join(os.path.dirname(__file__), 'build_history.sqlite')
+HISTORY_RECENT = 3
+HISTORY_REGRESSION = 25.0
+HISTORY_MIN_MS = 50.0
+
+# Builds estimated to take more than COST_CONFIRM_SECONDS, or add more than COST_CONFIRM_FEATURES
+# features, ask before they start & suggest a quicker GuideRail or fewer spline points. The estimate is
+# fitted from the history once a GuideRail mode has COST_FIT_BUILDS builds, rough defaults until then.
+COST_CONFIRM_SECONDS = 60
+COST_CONFIRM_FEATURES = 200
+COST_FIT_BUILDS = 8
+
+# Draw each build a stage at a time from a custom event (profile, helix, sweep, each pattern or join
+# block ...) with a progress dialog whose Cancel rolls the timeline back, so Fusion does not freeze on
+# long bolts & coils. False draws the whole build inside command_execute.
+CHUNKED_BUILD = True
+
+# Each built component is tagged with a hash of its dialog values. Asking for the same values again
+# inserts another occurrence of that component instead of building it, unless Force Rebuild is checked.
+REUSE_COMPONENTS = True
+
+# The one revolution the Pattern & NurbsHelix threads are patterned from is saved as an SMT file in
+# TEMPLATE_FOLDER & loaded by later builds of the same profile & helix, instead of being swept again.
+# The least recently used are deleted once they add up to more than TEMPLATE_MAX_MB. None turns it off.
+# The P_ThreadTune Templates button builds them for every size in the catalogs ahead of time.
+TEMPLATE_FOLDER = os.path.join(os.path.dirname(__file__), 'templates')
+TEMPLATE_MAX_MB = 200
+
+# With Use Real Offset of Threads, the Pattern & NurbsHelix nut threads of Threads M/F & Bolt & Nut are
+# the bolt's one revolution with its faces offset by the M/F Thread Gap, instead of a 2nd profile & sweep.
+OFFSET_NUT_THREADS = True
+
 # Palettes
 sample_palette_id = f'{COMPANY_NAME}_{ADDIN_NAME}_palette_id'
\ No newline at end of file
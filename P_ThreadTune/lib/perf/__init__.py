@@ -0,0 +1,4 @@
+from .spans import *
+from .profiler import *
+from .history import *
+from .costmodel import *
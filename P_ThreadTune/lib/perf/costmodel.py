@@ -0,0 +1,247 @@
+# Build cost estimate from the dialog values, before anything is drawn, so a build that would
+# lock up Fusion 360 for minutes can be caught & changed first. The feature count follows the
+# features command_execute makes, the time is a linear model per GuideRail mode:
+#   ms = build + part * parts + rev * parts * revs + spline point * parts * spline points
+#        + start rev * parts * (starts - 1) * revs
+# fitted by least squares from the builds in the SQLite history (perf.history). Until a mode
+# has enough builds of its own it uses DEFAULT_COEFFS, which are rough starting values only.
+
+import json
+import math
+import os
+import sqlite3
+from typing import NamedTuple
+
+from ..threadgeom import doubling_plan, helix_nurbs
+
+__all__ = [
+    'TERMS',
+    'DEFAULT_COEFFS',
+    'BuildSpec',
+    'Estimate',
+    'CostModel',
+    'build_spec',
+    'feature_count',
+]
+
+TERMS = ('build', 'part', 'rev', 'spline point', 'start rev')
+# ms for each term, G_Rail letter as in command_execute, 'coil' for the type 6 coils
+DEFAULT_COEFFS = {
+    'H': (500.0, 1500.0, 250.0, 5.0, 100.0),
+    'C': (500.0, 1500.0, 250.0, 5.0, 100.0),
+    'P': (500.0, 1500.0, 120.0, 5.0, 100.0),
+    'N': (500.0, 1500.0, 120.0, 5.0, 100.0),
+    'L': (500.0, 1500.0, 150.0, 20.0, 100.0),
+    'B': (500.0, 800.0, 60.0, 0.0, 50.0),
+    'coil': (300.0, 1000.0, 100.0, 10.0, 0.0),
+}
+GUIDE_RAILS = {'Helix': 'H', 'Pattern': 'P', 'LongHelix': 'L', 'NurbsHelix': 'N', 'BRepHelix': 'B'}
+NURBS_POINTS = len(helix_nurbs(1.0, 1.0, 1, 1).control_points)      # Control points of one revolution of the NURBS helix at 4 arcs
+
+
+class BuildSpec(NamedTuple):
+    """What the cost of a build depends on, guide is the G_Rail letter or 'coil'."""
+    guide: str
+    thread_type: int
+    revs: int
+    spline_pts: int
+    starts: int = 1
+    chamfer_thread: bool = True
+    chamfer_nut: bool = True
+    fast_build: bool = False
+    offset_nut: bool = False    # Nut threads offset from the bolt's one revolution, not swept
+
+
+class Estimate(NamedTuple):
+    seconds: float
+    features: int
+    fitted: bool                # False while the time comes from DEFAULT_COEFFS
+
+
+def build_spec(params):
+    """BuildSpec from the parameters command_execute tags its spans with (all lengths in mm)."""
+    thread_type = int(params['type'])
+    if thread_type == 6:
+        revs = int(params['Crevs'])
+        if params['CoilType'] == '3':
+            revs = int(math.ceil(abs(float(params['Cheight'])) / float(params['Cpitch'])))
+        return BuildSpec('coil', 6, revs, int(params['CsplinePts']))
+    guide = GUIDE_RAILS.get(params['GuideRail'], 'C')
+    revs = int(abs(float(params['height'])) / float(params['pitHelix'])) + 1
+    return BuildSpec(guide, thread_type, revs, int(params['splinePts']), int(params['starts']),
+                     params.get('ChamThread') == 'Y', params.get('ChamNut') == 'Y', params.get('FastBuild') == 'Y',
+                     params.get('OffsetNut') == 'Y' and guide in ('P', 'N') and thread_type in (3, 5))
+
+
+def thread_parts(spec):
+    """Thread bodies the build sweeps, the bolt threads, the nut threads or both."""
+    if spec.thread_type in (3, 5):
+        return 2
+    return 1
+
+
+def spline_points(spec):
+    """Fitted or control points of the helix & guide rail splines of one thread part."""
+    if spec.guide == 'B':
+        return 0
+    if spec.guide == 'N':
+        return 2 * NURBS_POINTS
+    if spec.guide in ('L', 'coil'):
+        return 2 * spec.spline_pts * spec.revs
+    return 2 * spec.spline_pts
+
+
+def thread_features(spec, doubling_revs=32):
+    """Features of one thread part, the sweep (or BRep body), its pattern, the cylinder join & the cut revolve & the starts."""
+    if spec.guide == 'B':
+        count = 1                                   # One Base Feature
+    else:
+        count = 3                                   # Sweep, cylinder join & one revolve cutting below & above
+        if spec.guide in ('P', 'N'):
+            if spec.revs > doubling_revs:
+                appended = False
+                for step in doubling_plan(spec.revs):
+                    if step.op == 'final':
+                        count += 2                  # Move the block & join it
+                        continue
+                    count += 1 + (step.shift != 0)  # Copy & move it up
+                    if step.op == 'double' or appended:
+                        count += 1                  # Join, the 1st block appended becomes the thread body
+                    appended = appended or step.op == 'append'
+            else:
+                count += 1                          # Path pattern
+    if spec.starts > 1:
+        count += 2                                  # Circular pattern & the combine that joins the starts
+    return count
+
+
+def feature_count(spec, doubling_revs=32):
+    """Timeline features the build leaves, 1 Base Feature with fast build."""
+    if spec.fast_build:
+        return 1
+    if spec.thread_type == 6:
+        return 1
+    count = 0
+    if spec.thread_type != 4:
+        count += thread_features(spec, doubling_revs)
+        if spec.guide == 'B':
+            count += spec.chamfer_thread            # The other guides chamfer the threads in the flush cut revolve
+    if spec.thread_type in (2, 5):
+        count += 1                                  # Bolt head extrude
+    if spec.thread_type > 2:
+        count += thread_features(spec, doubling_revs)
+        if spec.thread_type > 3 or spec.guide == 'B':
+            count += spec.chamfer_nut               # The chamfer of a nut is cut after the threads are cut out of it
+        count += spec.offset_nut                    # Base Feature & offset faces in place of the sweep
+        if spec.thread_type > 3:
+            count += 2                              # Nut extrude & the combine that cuts the threads out of it
+    return count
+
+
+def terms(spec):
+    parts = thread_parts(spec)
+    return (1.0, parts, parts * spec.revs, parts * spline_points(spec), parts * (spec.starts - 1) * spec.revs)
+
+
+class CostModel:
+    """Time coefficients for each guide, fit() replaces the defaults with the measured ones."""
+    def __init__(self, coeffs=None, fitted=()):
+        self.coeffs = dict(DEFAULT_COEFFS)
+        self.coeffs.update(coeffs or {})
+        self.fitted = set(fitted)
+
+    def estimate(self, spec, doubling_revs=32):
+        coeffs = self.coeffs.get(spec.guide, DEFAULT_COEFFS['H'])
+        ms = sum(c * x for c, x in zip(coeffs, terms(spec)))
+        return Estimate(ms / 1000.0, feature_count(spec, doubling_revs), spec.guide in self.fitted)
+
+    def fit(self, samples, min_builds=8):
+        """Fits the guides with at least min_builds (BuildSpec, ms) samples, the rest keep their coefficients."""
+        by_guide = {}
+        for spec, ms in samples:
+            by_guide.setdefault(spec.guide, []).append((terms(spec), ms))
+        for guide, rows in by_guide.items():
+            if len(rows) < max(min_builds, len(TERMS)):
+                continue
+            coeffs = least_squares(rows)
+            if coeffs is not None:
+                self.coeffs[guide] = coeffs
+                self.fitted.add(guide)
+        return self
+
+    @classmethod
+    def from_history(cls, path, min_builds=8):
+        """Model fitted from the builds in the history database, the defaults when there is none."""
+        model = cls()
+        if not path or not os.path.exists(path):
+            return model
+        db = sqlite3.connect(path)
+        try:
+            rows = db.execute('SELECT params, elapsed_ms FROM builds WHERE elapsed_ms IS NOT NULL').fetchall()
+        except sqlite3.Error:
+            rows = []
+        finally:
+            db.close()
+        samples = []
+        for params, ms in rows:
+            try:
+                samples.append((build_spec(json.loads(params)), ms))
+            except (KeyError, ValueError, TypeError, ZeroDivisionError):
+                continue                                # A build from before a parameter was logged
+        return model.fit(samples, min_builds)
+
+    def suggestions(self, spec, seconds, doubling_revs=32):
+        """Quicker GuideRail modes & fewer spline points for spec, as short lines of text.
+
+        The spline points are halved until the estimate is under seconds or down to 8.
+        Only changes that take at least a fifth off the estimate are suggested.
+        """
+        if spec.guide == 'coil':
+            return []
+        current = self.estimate(spec, doubling_revs).seconds
+        lines = []
+        for name, guide in GUIDE_RAILS.items():
+            if guide != spec.guide:
+                estimate = self.estimate(spec._replace(guide=guide), doubling_revs)
+                if estimate.seconds < current * 0.8:
+                    lines.append(f'{name} GuideRail: {estimate.seconds:.0f} s')
+        pts = spec.spline_pts
+        estimate = None
+        while pts > 8 and spec.guide not in ('B', 'N'):
+            pts = max(8, pts // 2)
+            estimate = self.estimate(spec._replace(spline_pts=pts), doubling_revs)
+            if estimate.seconds < seconds:
+                break
+        if estimate is not None and estimate.seconds < current * 0.8:
+            lines.append(f'{pts} Spline Points: {estimate.seconds:.0f} s')
+        return lines
+
+
+def least_squares(rows, ridge=1e-6):
+    """Coefficients for [(terms, ms)], negative ones clamped to 0, None if the terms never vary."""
+    n = len(TERMS)
+    a = [[0.0] * n for _ in range(n)]
+    b = [0.0] * n
+    for x, y in rows:
+        for i in range(n):
+            b[i] += x[i] * y
+            for j in range(n):
+                a[i][j] += x[i] * x[j]
+    for i in range(n):
+        a[i][i] += ridge * (a[i][i] or 1.0)
+# Gaussian elimination with partial pivoting
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        if abs(a[pivot][col]) < 1e-12:
+            return None
+        a[col], a[pivot] = a[pivot], a[col]
+        b[col], b[pivot] = b[pivot], b[col]
+        for r in range(col + 1, n):
+            f = a[r][col] / a[col][col]
+            for c in range(col, n):
+                a[r][c] -= f * a[col][c]
+            b[r] -= f * b[col]
+    coeffs = [0.0] * n
+    for i in reversed(range(n)):
+        coeffs[i] = (b[i] - sum(a[i][j] * coeffs[j] for j in range(i + 1, n))) / a[i][i]
+    return tuple(max(c, 0.0) for c in coeffs)
@@ -0,0 +1,143 @@
+# SQLite history of every build, its parameters & the time of each stage, so the same part can be
+# compared across add-in changes & Fusion 360 updates. A spec is one exact set of dialog parameters,
+# the report compares the newest builds of each spec with the builds before them & flags the stages
+# that got slower by more than the threshold. Plain Python & sqlite3, it runs outside Fusion 360 too.
+
+import json
+import sqlite3
+import statistics
+
+__all__ = [
+    'StageChange',
+    'spec_key',
+    'record_build',
+    'regression_report',
+    'format_report',
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    build TEXT PRIMARY KEY,
+    time TEXT,
+    spec TEXT,
+    body_name TEXT,
+    fusion_version TEXT,
+    params TEXT,
+    elapsed_ms REAL
+);
+CREATE INDEX IF NOT EXISTS builds_spec ON builds (spec, time);
+CREATE TABLE IF NOT EXISTS stages (
+    build TEXT,
+    part TEXT,
+    stage TEXT,
+    ms REAL
+);
+CREATE INDEX IF NOT EXISTS stages_build ON stages (build);
+"""
+
+
+class StageChange:
+    """One stage of one spec, the median ms of the history & of the recent builds.
+
+    It has regressed when it is more than threshold percent & more than min_ms slower, so the
+    stages that only take a few ms do not get flagged for their jitter.
+    """
+    def __init__(self, spec, body_name, part, stage, history_ms, recent_ms, history_builds, recent_builds, threshold, min_ms=0.0):
+        self.spec = spec
+        self.body_name = body_name
+        self.part = part
+        self.stage = stage
+        self.history_ms = history_ms
+        self.recent_ms = recent_ms
+        self.history_builds = history_builds
+        self.recent_builds = recent_builds
+        self.change = (recent_ms - history_ms) / history_ms * 100.0 if history_ms > 0 else 0.0
+        self.regressed = self.change > threshold and recent_ms - history_ms > min_ms
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in ('body_name', 'part', 'stage', 'history_ms', 'recent_ms',
+                                                       'history_builds', 'recent_builds', 'change', 'regressed')}
+
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def spec_key(params):
+    """The same dialog parameters always give the same spec."""
+    return json.dumps(params, sort_keys=True)
+
+
+def record_build(path, records, body_name='', fusion_version=''):
+    """Stores one build from its SpanRecorder.records(), the 'build' record is the total."""
+    if not records:
+        return
+    first = records[0]
+    total = [record['ms'] for record in records if record['stage'] == 'build' and record.get('part') is None]
+    db = connect(path)
+    try:
+        with db:
+            db.execute('INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?)',
+                       (first['build'], first['time'], spec_key(first['params']), body_name, fusion_version,
+                        json.dumps(first['params']), total[-1] if total else None))
+            db.execute('DELETE FROM stages WHERE build = ?', (first['build'],))
+            db.executemany('INSERT INTO stages VALUES (?, ?, ?, ?)',
+                           [(record['build'], record.get('part'), record['stage'], record['ms']) for record in records])
+    finally:
+        db.close()
+
+
+def regression_report(path, recent=3, threshold=25.0, spec=None, min_ms=50.0):
+    """StageChange of every stage of every spec with more than recent builds, or only the spec of params spec.
+
+    The recent builds are the newest recent builds of the spec & the history is all the builds before them.
+    """
+    db = connect(path)
+    try:
+        if spec is None:
+            specs = [row[0] for row in db.execute('SELECT spec FROM builds GROUP BY spec HAVING COUNT(*) > ?', (recent,))]
+        else:
+            specs = [spec_key(spec)]
+        changes = []
+        for key in specs:
+            builds = db.execute('SELECT build, body_name FROM builds WHERE spec = ? ORDER BY time DESC, rowid DESC', (key,)).fetchall()
+            if len(builds) <= recent:
+                continue
+            body_name = builds[0][1]
+            newest = [build for build, name in builds[:recent]]
+            older = [build for build, name in builds[recent:]]
+            recent_ms = stage_times(db, newest)
+            history_ms = stage_times(db, older)
+            for (part, stage), times in history_ms.items():
+                if (part, stage) not in recent_ms:
+                    continue
+                changes.append(StageChange(key, body_name, part, stage, statistics.median(times),
+                                           statistics.median(recent_ms[(part, stage)]), len(older), len(newest), threshold, min_ms))
+        return changes
+    finally:
+        db.close()
+
+
+def stage_times(db, builds):
+    """{(part, stage): [ms of each build]}, a stage that runs twice in a build is added up."""
+    times = {}
+    for build in builds:
+        totals = {}
+        for part, stage, ms in db.execute('SELECT part, stage, ms FROM stages WHERE build = ?', (build,)):
+            totals[(part, stage)] = totals.get((part, stage), 0.0) + ms
+        for key, ms in totals.items():
+            times.setdefault(key, []).append(ms)
+    return times
+
+
+def format_report(changes, only_regressions=True):
+    """A few lines of text, one for each stage that got slower (every stage when only_regressions is False)."""
+    lines = []
+    for change in changes:
+        if only_regressions and not change.regressed:
+            continue
+        stage = change.stage if change.part is None else f'{change.part} / {change.stage}'
+        lines.append(f'{change.body_name}: {stage} {change.recent_ms:.0f} ms, was {change.history_ms:.0f} ms ({change.change:+.0f}%)')
+    return '\n'.join(lines)
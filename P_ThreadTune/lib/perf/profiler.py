@@ -0,0 +1,129 @@
+# cProfile capture of one call, saved as a .prof file & summed up in a few lines of text.
+# The .prof files go in one folder named by what was built & when, only the newest history
+# of them are kept. Open one with snakeviz, or python -m pstats, to see the whole call tree.
+# Fusion 360's own work shows up under the adsk wrapper modules & their _core/_fusion built-ins,
+# so the summary splits the time between the add-in's Python & waiting on Fusion.
+# A ProfileSession adds up any number of calls in one profile, like the events of a build drawn a
+# stage at a time, & saves them as one .prof when it is done.
+
+import cProfile
+import glob
+import io
+import os
+import pstats
+import re
+import time
+
+__all__ = [
+    'ProfileRun',
+    'ProfileSession',
+    'profile_call',
+    'fusion_seconds',
+    'prune_profiles',
+]
+
+
+class ProfileRun:
+    """What profile_call did, path is None when the .prof file could not be written."""
+    def __init__(self, result, stats, path, summary):
+        self.result = result
+        self.stats = stats
+        self.path = path
+        self.summary = summary
+
+
+class ProfileSession:
+    """One cProfile profile of every call() made through it, until save().
+
+    name is the label of the .prof file, or a callable giving it when it is saved (the body name
+    is only known by then), the __name__ of the 1st function called if None.
+    """
+    def __init__(self, name=None):
+        self.profiler = cProfile.Profile()
+        self.started = time.time()
+        self.name = name
+
+    def call(self, func, *args):
+        """Runs func(*args) with the profiler on, an exception from func is passed on."""
+        if self.name is None:
+            self.name = func.__name__
+        self.profiler.enable()
+        try:
+            return func(*args)
+        finally:
+            self.profiler.disable()
+
+    def save(self, folder, history=20, top_n=15, result=None):
+        """Saves the profile in folder as name_YYYYmmdd-HHMMSS-ms.prof, only the newest history .prof files there are kept."""
+        name = self.name() if callable(self.name) else self.name
+        name = re.sub(r'[^\w.-]+', '_', name or 'profile').strip('_')
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started)) + f'-{int(self.started * 1000) % 1000:03d}'
+        stats = pstats.Stats(self.profiler)
+        path = None
+        try:
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f'{name}_{stamp}.prof')
+            stats.dump_stats(path)
+            prune_profiles(folder, history)
+        except OSError:
+            path = None
+        return ProfileRun(result, stats, path, summary(stats, name, top_n))
+
+
+def profile_call(func, *args, folder, name=None, history=20, top_n=15):
+    """Runs func(*args) under cProfile & saves the profile in folder.
+
+    name is the label of the .prof file, or a callable giving it after func has run (the body
+    name is only known by then), func.__name__ if None. The file is name_YYYYmmdd-HHMMSS-ms.prof
+    & only the newest history .prof files in folder are kept. An exception from func is raised
+    again after the profile is saved.
+    """
+    session = ProfileSession(name)
+    error = None
+    result = None
+    try:
+        result = session.call(func, *args)
+    except BaseException as e:
+        error = e
+    run = session.save(folder, history, top_n, result)
+    if error is not None:
+        raise error
+    return run
+
+
+def fusion_seconds(stats):
+    """Seconds spent inside the Fusion 360 API, the adsk modules & their built-in calls."""
+    total = 0.0
+    for (filename, line, func), (cc, nc, tottime, cumtime, callers) in stats.stats.items():
+        if re.search(r'[\\/]adsk[\\/]', filename) or (filename == '~' and re.search(r'\b_(core|fusion|cam)\.', func)):
+            total += tottime
+    return total
+
+
+def summary(stats, name, top_n=15):
+    """Total, Fusion & Python seconds, then the top_n functions by cumulative time."""
+    fusion = fusion_seconds(stats)
+    lines = [f'Profile {name}: {stats.total_tt:.3f} s, Fusion API {fusion:.3f} s, Python {stats.total_tt - fusion:.3f} s']
+    if top_n > 0:
+        text = io.StringIO()
+        stream = stats.stream
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(top_n)
+        stats.stream = stream
+# Skip the pstats preamble, keep the table from its heading down
+        table = text.getvalue().splitlines()
+        for i, line in enumerate(table):
+            if line.lstrip().startswith('ncalls'):
+                lines += [row for row in table[i:] if row.strip()]
+                break
+    return '\n'.join(lines)
+
+
+def prune_profiles(folder, history):
+    """Deletes all but the newest history .prof files in folder."""
+    paths = sorted(glob.glob(os.path.join(folder, '*.prof')), key=os.path.getmtime, reverse=True)
+    for path in paths[max(history, 0):]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
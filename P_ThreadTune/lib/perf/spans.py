@@ -0,0 +1,105 @@
+# Named timing spans for the stages of a build, written as JSON lines so each build can be
+# broken down afterwards into where the seconds went. Every line is one stage of one build,
+# tagged with the build id, the part it was drawing & the full set of dialog parameters,
+# & the last line of a build is its 'build' span with the total time. Spans can be nested,
+# a span opened inside another one is tagged with the outermost span as its part, so the
+# stages of the bolt threads & the nut threads can be told apart.
+# The clock can be paused, a build drawn a stage at a time waits between its stages for Fusion 360
+# to redraw & fire the next event, pause() & resume() around the waits keep them out of every span
+# that is open across them & out of the build total.
+# Plain Python without adsk, so the log can be read outside of Fusion 360 too.
+
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+__all__ = [
+    'SpanRecorder',
+    'read_spans',
+    'stage_totals',
+]
+
+
+class SpanRecorder:
+    """Collects the spans of one build, write() appends them to the log when the build is done."""
+    def __init__(self, params=None):
+        self.params = dict(params or {})
+        self.build = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.idle = 0.0             # Seconds the clock has been paused
+        self.paused = None          # perf_counter() when the clock was paused, None while it runs
+        self.spans = []
+        self.open = []              # Stages of the spans still open, outermost 1st
+
+    def clock(self):
+        """Seconds since the recorder was made, less the time it was paused."""
+        now = time.perf_counter() if self.paused is None else self.paused
+        return now - self.t0 - self.idle
+
+    def pause(self):
+        """Stops the clock until resume()."""
+        if self.paused is None:
+            self.paused = time.perf_counter()
+
+    def resume(self):
+        """Starts the clock again after pause()."""
+        if self.paused is not None:
+            self.idle += time.perf_counter() - self.paused
+            self.paused = None
+
+    @contextmanager
+    def span(self, stage):
+        """Times the with block as stage, the span is kept even when the block raises."""
+        part = self.open[0] if self.open else None
+        self.open.append(stage)
+        start = self.clock()
+        try:
+            yield
+        finally:
+            end = self.clock()
+            self.open.pop()
+            self.spans.append({
+                'stage': stage,
+                'part': part,
+                'depth': len(self.open),
+                'start_ms': round(start * 1000.0, 3),
+                'ms': round((end - start) * 1000.0, 3),
+            })
+
+    def records(self, elapsed=None):
+        """The span lines, ending with the 'build' span of elapsed seconds (the clock so far if None)."""
+        if elapsed is None:
+            elapsed = self.clock()
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started))
+        spans = self.spans + [{'stage': 'build', 'part': None, 'depth': 0, 'start_ms': 0.0, 'ms': round(elapsed * 1000.0, 3)}]
+        return [dict(build=self.build, time=stamp, **span, params=self.params) for span in spans]
+
+    def write(self, path, elapsed=None):
+        """Appends the span lines to the JSON lines log at path."""
+        with open(path, 'a') as file:
+            for record in self.records(elapsed):
+                file.write(json.dumps(record) + '\n')
+
+
+def read_spans(path):
+    """Every span line in the log, lines that do not parse (a build cut off part way) are skipped."""
+    records = []
+    with open(path) as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def stage_totals(records):
+    """{build id: {(part, stage): ms}}, the time of each stage of each build added up."""
+    totals = {}
+    for record in records:
+        stages = totals.setdefault(record['build'], {})
+        key = (record.get('part'), record['stage'])
+        stages[key] = stages.get(key, 0.0) + record['ms']
+    return totals
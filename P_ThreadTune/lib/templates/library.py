@@ -0,0 +1,100 @@
+# On-disk library of one-revolution thread bodies for the Pattern & NurbsHelix guide rails.
+# Each body is saved as an SMT file named by a hash of what its shape depends on (the thread
+# profile, helix pitch & radius, spline points, guide rail & hand), so a thread built before
+# can be loaded instead of sketched & swept again. Reading a template marks it as just used,
+# & once the files add up to more than max_bytes the least recently used ones are deleted.
+# Only the files are handled here, entry.py exports & loads the bodies through Fusion 360.
+
+import glob
+import hashlib
+import json
+import os
+
+__all__ = [
+    'TemplateLibrary',
+    'template_key',
+]
+
+EXTENSION = '.smt'
+
+
+def template_key(**params):
+    """Hash of the parameters, floats are rounded so the same thread always gives the same key."""
+    def rounded(value):
+        if isinstance(value, float):
+            return round(value, 9)
+        if isinstance(value, (list, tuple)):
+            return [rounded(v) for v in value]
+        return value
+    text = json.dumps({name: rounded(value) for name, value in params.items()}, sort_keys=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class TemplateLibrary:
+    def __init__(self, folder, max_bytes):
+        self.folder = folder
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.folder, key + EXTENSION)
+
+    def get(self, key):
+        """Path of the template for key, or None. A template that is found counts as just used."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, write):
+        """Saves a template with write(path) & evicts the least recently used ones over max_bytes.
+
+        write goes to a temporary name 1st, so a failed export never leaves half a template behind.
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(key)
+        temp = os.path.join(self.folder, key + '.tmp' + EXTENSION)
+        try:
+            write(temp)
+            os.replace(temp, path)
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        self.evict()
+        return path
+
+    def entries(self):
+        """(path, bytes, last used) of every template, least recently used 1st."""
+        entries = []
+        for path in glob.glob(os.path.join(self.folder, '*' + EXTENSION)):
+            if path.endswith('.tmp' + EXTENSION):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def total_bytes(self):
+        return sum(size for path, size, used in self.entries())
+
+    def evict(self):
+        """Deletes the least recently used templates until the rest fit in max_bytes, returns the paths deleted."""
+        entries = self.entries()
+        total = sum(size for path, size, used in entries)
+        removed = []
+        for path, size, used in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed.append(path)
+        return removed
@@ -0,0 +1,9 @@
+from .profile import *
+from .sampler import *
+from .nurbs import *
+from .tolerance import *
+from .pattern import *
+from .flanks import *
+from .sections import *
+from .mesh import *
+from .export import *
@@ -0,0 +1,308 @@
+# Mesh export of a threaded rod straight from the thread profile, no B-Rep is built.
+# Around the rod the outside is a height field: at angle a & height z the radius is the
+# profile radius at u = z - helix_pitch * a / 2pi, so every profile vertex becomes a helix
+# & every profile edge a ruled flank, the same faces the sweep makes. The root flat is the
+# core cylinder (r_min) & the ends are cut flush at z = 0 & z = height like DrawCylinder does.
+# The triangles come out one revolution at a time from a generator & the writers stream them
+# to disk, so the memory used is the same for a 10mm rod as it is for a 1m rod.
+# Every vertex position is worked out from the integer (column, row) it sits on, so the
+# vertices shared by neighbouring revolutions & across the seam come out bit for bit the same
+# & the mesh is watertight without welding. Breaks & rows of the outline that the starts put within
+# _EPS of each other are merged first, so float noise between them cannot make sliver rows.
+
+import math
+import shutil
+import struct
+import tempfile
+import zipfile
+
+from .profile import ThreadSpec, thread_profile
+
+__all__ = [
+    'thread_rows',
+    'thread_triangles',
+    'mesh_triangles',
+    'write_stl',
+    'write_3mf',
+]
+
+_STL_TRIANGLE = struct.Struct('<12fH')
+_EPS = 1e-9                     # cm, breaks & rows of the outline closer than this are the same one
+
+
+def thread_rows(spec: ThreadSpec, starts=1):
+    """Outline of the thread for one helix pitch, as sorted (u, radius) pairs in cm.
+
+    u goes up the rod from the bottom of the first flank. With more than one start the other
+    threads sit in the root flat, the outline is the highest of them all.
+    Raises ValueError when a flank leans over (negative angles), the outline would fold back on itself.
+    """
+    prof = thread_profile(spec)
+    period = spec.helix_pitch * .1
+    points = [(-y, x) for x, y in prof.vertices[1:5]]
+    points.append((points[0][0] + period, points[0][1]))
+    for (u0, r0), (u1, r1) in zip(points, points[1:]):
+        if u1 < u0:
+            raise ValueError('Mesh export needs flank angles of 0 or more, the thread profile folds back on itself')
+    base = points[0][0]
+    copies = [[(u + period * k / starts - base, r) for u, r in points] for k in range(starts)]
+# The starts are period / starts apart, so the same break can come out of different copies a few ulps apart
+    breaks = [0.0]
+    for u in sorted(u % period for copy in copies for u, r in copy):
+        if u - breaks[-1] > _EPS and period - u > _EPS:
+            breaks.append(u)
+    ends = breaks[1:] + [period]
+    rows = []
+    for u0, u1 in zip(breaks, ends):
+# A 0 degree flank is a step, the rows just below & just above it are both kept
+        left = max(_profile_at(copy, u0, period, False) for copy in copies)
+        lines = [(_profile_at(copy, u0, period, True), _profile_at(copy, u1, period, False)) for copy in copies]
+        right = max(a for a, b in lines)
+        if abs(left - right) > _EPS:
+            _add_row(rows, u0, left)
+        cuts = [0.0]
+        for i in range(len(lines)):
+            for j in range(i + 1, len(lines)):
+                d0 = lines[i][0] - lines[j][0]
+                d1 = lines[i][1] - lines[j][1]
+                if d0 * d1 < 0:
+                    cuts.append(d0 / (d0 - d1))
+        for t in sorted(cuts):
+            _add_row(rows, u0 + t * (u1 - u0), max(a + t * (b - a) for a, b in lines))
+    if len(rows) > 1 and period - rows[-1][0] <= _EPS and abs(rows[-1][1] - rows[0][1]) <= _EPS:
+        rows.pop()                                  # Comes round to the 1st row again
+    return [(u + base, r) for u, r in rows]
+
+
+def _add_row(rows, u, r):
+# A row within _EPS of the last one would only make sliver triangles & edges with no partner
+    if rows and abs(u - rows[-1][0]) <= _EPS and abs(r - rows[-1][1]) <= _EPS:
+        return
+    rows.append((u, r))
+
+
+def _profile_at(points, u, period, above):
+# Radius of one thread at u, taken from the flank just above u or the one just below it
+    u0 = points[0][0]
+    if above:
+        u = u0 + (u - u0) % period
+    else:
+        u = u0 + period - (u0 + period - u) % period
+    for (ua, ra), (ub, rb) in zip(points, points[1:]):
+        if ub > ua and (ua <= u < ub if above else ua < u <= ub):
+            return ra + (u - ua) * (rb - ra) / (ub - ua)
+    return points[0][1]
+
+
+def _radius_at(rows, period, u):
+    u0 = rows[0][0]
+    turn = math.floor((u - u0) / period)
+    u = u - turn * period
+    points = rows + [(u0 + period, rows[0][1])]
+    for (ua, ra), (ub, rb) in zip(points, points[1:]):
+        if ua <= u <= ub:
+            if ub == ua:
+                return ra
+            return ra + (u - ua) * (rb - ra) / (ub - ua)
+    return rows[0][1]
+
+
+def thread_triangles(spec: ThreadSpec, height, columns=48, starts=1, direction=1):
+    """Yields the triangles of a threaded rod one revolution at a time.
+
+    Arguments:
+    spec -- Thread to make, lengths in mm like the dialog.
+    height -- Length of the rod in cm.
+    columns -- Points around one revolution of every helix.
+    starts -- Number of thread starts, spec.helix_pitch is the pitch times the starts.
+    direction -- 1 for Right hand threads, -1 for Left hand threads.
+
+    Every triangle is 3 (x, y, z) vertices in cm, counter clockwise seen from outside the rod.
+    """
+    if height <= 0:
+        raise ValueError('Height has to be more than 0')
+    rows = thread_rows(spec, starts)
+    period = spec.helix_pitch * .1
+    n_rows = len(rows)
+    cos_a = [math.cos(2 * math.pi * c / columns) for c in range(columns)]
+    sin_a = [direction * math.sin(2 * math.pi * c / columns) for c in range(columns)]
+    shift = [period * c / columns for c in range(columns)]
+# z of row k on column c in the first turn, later turns add a whole number of pitches
+    z_base = [[u + shift[c] for u, r in rows] for c in range(columns)]
+    xy_base = [[(r * cos_a[c], r * sin_a[c]) for u, r in rows] for c in range(columns)]
+    bottom = []
+    top = []
+    for c in range(columns):
+        r = _radius_at(rows, period, -shift[c])
+        bottom.append((r * cos_a[c], r * sin_a[c], 0.0))
+        r = _radius_at(rows, period, height - shift[c])
+        top.append((r * cos_a[c], r * sin_a[c], height))
+    bottom_key = [('b', c) for c in range(columns)]
+    top_key = [('t', c) for c in range(columns)]
+
+    def vertex(c, j):
+        if c == columns:
+            c = 0
+            j += n_rows
+        turn, k = divmod(j, n_rows)
+        z = z_base[c][k] + turn * period
+# A row a few ulps inside an end is on the cap, or its triangles against the cap have no area
+        if z <= _EPS:
+            return bottom_key[c], bottom[c]
+        if z >= height - _EPS:
+            return top_key[c], top[c]
+        x, y = xy_base[c][k]
+        return (c, j), (x, y, z)
+
+    first = math.floor(-(period + rows[0][0]) / period) - 1
+    last = math.ceil((height - rows[0][0]) / period) + 1
+    center_b = (0.0, 0.0, 0.0)
+    center_t = (0.0, 0.0, height)
+    pending = None
+# Turns with nothing in them are skipped, the caps go in with the first & last turn that has triangles
+    for turn in range(first, last):
+        triangles = []
+        if pending is None:
+            for c in range(columns):
+                triangles.append((center_b, bottom[(c + 1) % columns], bottom[c]))
+        j0 = turn * n_rows
+        grid = [[vertex(c, j0 + k) for k in range(n_rows + 1)] for c in range(columns + 1)]
+        for k in range(n_rows):
+            for c in range(columns):
+                ka, a = grid[c][k]
+                kb, b = grid[c][k + 1]
+                kc, cc = grid[c + 1][k + 1]
+                kd, d = grid[c + 1][k]
+                if ka != kc:
+                    if kb != ka and kb != kc:
+                        triangles.append((a, cc, b))
+                    if kd != ka and kd != kc:
+                        triangles.append((a, d, cc))
+        if len(triangles) == columns and pending is None:
+            continue
+        if pending is not None:
+            yield _wind(pending, direction)
+        pending = triangles
+    for c in range(columns):
+        pending.append((center_t, top[c], top[(c + 1) % columns]))
+    yield _wind(pending, direction)
+
+
+def _wind(triangles, direction):
+# Left hand threads are the Right hand ones mirrored in y, which turns every triangle inside out
+    if direction < 0:
+        return [(a, c, b) for a, b, c in triangles]
+    return triangles
+
+
+def mesh_triangles(mesh, per_chunk=10000):
+    """Yields the triangles of a Mesh (the preview & coil meshes) in chunks the writers take."""
+    xyz = mesh.coordinates
+    indices = mesh.indices
+    for start in range(0, len(indices), per_chunk * 3):
+        chunk = indices[start:start + per_chunk * 3]
+        points = [(xyz[3 * i], xyz[3 * i + 1], xyz[3 * i + 2]) for i in chunk]
+        yield [tuple(points[k:k + 3]) for k in range(0, len(points), 3)]
+
+
+def _normal(a, b, c):
+    ux, uy, uz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    vx, vy, vz = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+    nx = uy * vz - uz * vy
+    ny = uz * vx - ux * vz
+    nz = ux * vy - uy * vx
+    length = math.sqrt(nx * nx + ny * ny + nz * nz) or 1.0
+    return nx / length, ny / length, nz / length
+
+
+def write_stl(path, chunks, scale=10.0, name='P_ThreadTune'):
+    """Streams the triangles from chunks (lists of triangles) to a binary STL file.
+
+    scale -- Multiplies every coordinate, the default 10 writes cm as mm which slicers expect.
+    Returns the number of triangles written. The count in the header is filled in at the end.
+    """
+    pack = _STL_TRIANGLE.pack
+    count = 0
+    with open(path, 'wb') as file:
+        file.write(name.encode('ascii', 'replace')[:80].ljust(80, b' '))
+        file.write(struct.pack('<I', 0))
+        for triangles in chunks:
+            out = []
+            for a, b, c in triangles:
+                n = _normal(a, b, c)
+                out.append(pack(n[0], n[1], n[2],
+                                a[0] * scale, a[1] * scale, a[2] * scale,
+                                b[0] * scale, b[1] * scale, b[2] * scale,
+                                c[0] * scale, c[1] * scale, c[2] * scale, 0))
+            file.write(b''.join(out))
+            count += len(out)
+        file.seek(80)
+        file.write(struct.pack('<I', count))
+    return count
+
+
+_3MF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>\n')
+_3MF_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>\n')
+
+
+def write_3mf(path, chunks, scale=10.0, name='P_ThreadTune'):
+    """Streams the triangles from chunks to a 3MF file in millimeters.
+
+    3MF wants all the vertices before the triangles, so the vertices go straight into the
+    model while the triangles wait in a temporary file. Vertices are only looked up in the
+    last few revolutions, the caps reach back at most 3 of them & nothing else reaches back past 1.
+    Returns the number of triangles written.
+    """
+    count = 0
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _3MF_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _3MF_RELS)
+        with archive.open('3D/3dmodel.model', 'w') as model, tempfile.TemporaryFile() as tris:
+            model.write(('<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<model unit="millimeter" xml:lang="en-US" '
+                         'xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">\n'
+                         '<resources><object id="1" name="%s" type="model"><mesh><vertices>\n'
+                         % name).encode('utf-8'))
+            recent = []
+            total = 0
+            for triangles in chunks:
+                current = {}
+                verts = []
+                out = []
+                for triangle in triangles:
+                    ids = []
+                    for v in triangle:
+                        i = current.get(v)
+                        if i is None:
+                            for previous in recent:
+                                i = previous.get(v)
+                                if i is not None:
+                                    break
+                            if i is None:
+                                i = total
+                                total += 1
+                                verts.append('<vertex x="%.6g" y="%.6g" z="%.6g"/>\n'
+                                             % (v[0] * scale, v[1] * scale, v[2] * scale))
+                            current[v] = i
+                        ids.append(i)
+                    out.append('<triangle v1="%d" v2="%d" v3="%d"/>\n' % tuple(ids))
+                model.write(''.join(verts).encode('utf-8'))
+                tris.write(''.join(out).encode('utf-8'))
+                count += len(out)
+                recent = [current] + recent[:2]
+            model.write(b'</vertices><triangles>\n')
+            tris.seek(0)
+            shutil.copyfileobj(tris, model)
+            model.write(b'</triangles></mesh></object></resources>\n'
+                        b'<build><item objectid="1"/></build></model>\n')
+    return count
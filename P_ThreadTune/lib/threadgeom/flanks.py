@@ -0,0 +1,85 @@
+# Helical sweep of a closed thread section as NURBS faces, for the BRepHelix thread engine.
+# Every vertex of the section follows its own helix (helix_nurbs with the same pitch) & every
+# edge of the section sweeps out a ruled flank between the helices of its two vertices.
+# The helices all have the same knots & weights whatever their radius, so joining matching
+# control points with straight lines gives the exact ruled surface, degree 2 around the
+# Z-axis & degree 1 across the flank. No points are fitted, the flanks are as close to the true
+# helical surface as the helices are, which spans_per_turn sets.
+
+from typing import NamedTuple
+
+from .nurbs import NurbsCurve, helix_nurbs, evaluate_nurbs
+
+__all__ = [
+    'NurbsSurface',
+    'HelicalSweep',
+    'helical_sweep',
+    'evaluate_ruled',
+]
+
+
+class NurbsSurface(NamedTuple):
+    """Data for adsk.core.NurbsSurface.create. control_points[i][j] & weights[i][j] go
+    along u (around the helix) with i & across the flank with j."""
+    degree_u: int
+    degree_v: int
+    control_points: list
+    knots_u: list
+    knots_v: list
+    weights: list
+
+
+class HelicalSweep(NamedTuple):
+    """section -- (radius, z) of the section vertices in the order the faces are built.
+    helices -- NurbsCurve followed by each vertex, starting on the X-axis at the vertex z.
+    flanks -- NurbsSurface swept by the edge from vertex i to vertex i + 1, the last one closes the section.
+    """
+    section: list
+    helices: list
+    flanks: list
+
+
+def helical_sweep(section, pitch, turns=1, direction=1, spans_per_turn=4) -> HelicalSweep:
+    """Sweeps a closed section in the XZ plane around the Z-axis.
+
+    Arguments:
+    section -- (radius, z) pairs going around the section, the last one joins back to the first.
+    pitch -- Rise in Z per revolution.
+    turns -- Number of revolutions.
+    direction -- 1 turns counter clockwise (Right hand threads), -1 clockwise (Left hand threads).
+    spans_per_turn -- Arcs per revolution of every helix, see helix_nurbs.
+
+    The section is put in clockwise order (radius right, Z up) for Right hand threads and counter
+    clockwise for Left hand threads. With that order the end faces & flanks built by entry.py all face
+    out of the thread, with the flank surfaces parameter reversed.
+    """
+    section = [(float(r), float(z)) for r, z in section]
+    area = 0.0
+    for (r0, z0), (r1, z1) in zip(section, section[1:] + section[:1]):
+        area += r0 * z1 - r1 * z0
+    if (area > 0) == (direction > 0):
+        section.reverse()
+    helices = []
+    for r, z in section:
+        curve = helix_nurbs(r, pitch, turns, direction, spans_per_turn)
+        points = [(x, y, z + hz) for x, y, hz in curve.control_points]
+        helices.append(NurbsCurve(curve.degree, points, curve.knots, curve.weights))
+    flanks = []
+    for i, helix in enumerate(helices):
+        other = helices[(i + 1) % len(helices)]
+        flanks.append(NurbsSurface(
+            helix.degree, 1,
+            [[p0, p1] for p0, p1 in zip(helix.control_points, other.control_points)],
+            helix.knots, [0.0, 0.0, 1.0, 1.0],
+            [[w, w] for w in helix.weights]))
+    return HelicalSweep(section, helices, flanks)
+
+
+def evaluate_ruled(surface: NurbsSurface, u, v):
+    """Point on a ruled (degree_v = 1) surface at u along the helix & v from 0 to 1 across it."""
+    ends = []
+    for j in range(2):
+        curve = NurbsCurve(surface.degree_u, [row[j] for row in surface.control_points],
+                           surface.knots_u, [row[j] for row in surface.weights])
+        ends.append(evaluate_nurbs(curve, u))
+    return tuple((1 - v) * a + v * b for a, b in zip(*ends))
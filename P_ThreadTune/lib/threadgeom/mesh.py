@@ -0,0 +1,93 @@
+# Triangle mesh of a section swept around the Z-axis, for the live preview.
+# A station is (angle, dr, dz): the section is pushed out by dr, lifted by dz & turned to
+# the angle around the Z-axis. Thread helices, angled coils & spirals are all a list of
+# stations, see helix_stations. The mesh is flat lists ready for CustomGraphicsCoordinates.
+
+import math
+from typing import NamedTuple
+
+__all__ = [
+    'Mesh',
+    'helix_stations',
+    'coil_stations',
+    'sweep_mesh',
+    'merge_meshes',
+]
+
+
+class Mesh(NamedTuple):
+    """coordinates is x, y, z of every vertex one after the other, indices is 3 vertex numbers per triangle."""
+    coordinates: list
+    indices: list
+
+
+def helix_stations(pts_per_rev, revolutions, z_pitch=0.0, radial_pitch=0.0, direction=1, start_angle=0.0):
+    """Stations along a helix, angled coil or spiral, pts_per_rev * revolutions + 1 of them."""
+    count = int(pts_per_rev * revolutions) + 1
+    return [(start_angle + direction * 2 * math.pi * i / pts_per_rev,
+             radial_pitch * i / pts_per_rev,
+             z_pitch * i / pts_per_rev) for i in range(count)]
+
+
+def coil_stations(coil_type, pts_per_rev, revolutions, pitch, height=0.0, angle=0.0, direction=1):
+    """Stations along a coil the way DrawAngledCoil & DrawSpiral lay it out.
+
+    coil_type -- '1' Revolutions & Height, '2' Revolutions & Pitch, '3' Height & Pitch or '4' Spiral.
+    pitch & height are in cm, angle in degrees. Only the spiral turns with direction, like DrawSpiral.
+    """
+    if coil_type == '4':
+        return helix_stations(pts_per_rev, revolutions, 0.0, pitch, direction)
+    if coil_type == '1':
+        pitch = height / revolutions
+    return helix_stations(pts_per_rev, revolutions, pitch, pitch * math.tan(math.radians(angle)))
+
+
+def sweep_mesh(section, stations, caps=True) -> Mesh:
+    """Sweeps a closed section of (radius, z) pairs through the stations.
+
+    caps closes the first & last section with a fan around the section's centre.
+    The section is put in the order that makes every triangle face out, which the mesh export needs.
+    """
+    n = len(section)
+    area = 0.0
+    for (r0, z0), (r1, z1) in zip(section, section[1:] + section[:1]):
+        area += r0 * z1 - r1 * z0
+    if len(stations) > 1 and (area > 0) != (stations[1][0] > stations[0][0]):
+        section = section[::-1]
+    coords = []
+    for ang, dr, dz in stations:
+        c = math.cos(ang)
+        s = math.sin(ang)
+        for r, z in section:
+            coords += [(r + dr) * c, (r + dr) * s, z + dz]
+    indices = []
+    for k in range(len(stations) - 1):
+        a = k * n
+        b = a + n
+        for i in range(n):
+            j = (i + 1) % n
+            indices += [a + i, b + i, b + j, a + i, b + j, a + j]
+    if caps and stations:
+        rc = sum(r for r, z in section) / n
+        zc = sum(z for r, z in section) / n
+        for k, flip in ((0, True), (len(stations) - 1, False)):
+            ang, dr, dz = stations[k]
+            centre = len(coords) // 3
+            coords += [(rc + dr) * math.cos(ang), (rc + dr) * math.sin(ang), zc + dz]
+            for i in range(n):
+                j = (i + 1) % n
+                if flip:
+                    indices += [centre, k * n + j, k * n + i]
+                else:
+                    indices += [centre, k * n + i, k * n + j]
+    return Mesh(coords, indices)
+
+
+def merge_meshes(meshes) -> Mesh:
+    coords = []
+    indices = []
+    for mesh in meshes:
+        offset = len(coords) // 3
+        coords += mesh.coordinates
+        indices += [i + offset for i in mesh.indices]
+    return Mesh(coords, indices)
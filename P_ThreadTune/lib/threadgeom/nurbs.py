@@ -0,0 +1,84 @@
+# Rational NURBS helix for the NurbsHelix guide rail option.
+# Each span is a rational quadratic arc, so the curve lies exactly on the cylinder
+# of the helix radius (no radial deviation at all), with the Z of the middle control
+# point halfway between the ends so the curve passes through the true helix at the
+# ends & middle of every span. In between the arc does not climb evenly with the angle,
+# so the curve is off the true helix in Z (tolerance.nurbs_deviation). With the default
+# 4 spans per turn one revolution needs only 9 control points & is about as close as a
+# 36 point fitted spline, more spans per turn bring it closer.
+
+import math
+from typing import NamedTuple
+
+__all__ = [
+    'NurbsCurve',
+    'helix_nurbs',
+    'evaluate_nurbs',
+]
+
+
+class NurbsCurve(NamedTuple):
+    """Data for adsk.core.NurbsCurve3D.createRational. control_points are (x, y, z) tuples
+    and knots is the full clamped knot vector, len(control_points) + degree + 1 long."""
+    degree: int
+    control_points: list
+    knots: list
+    weights: list
+
+
+def helix_nurbs(radius, pitch, turns, direction=1, spans_per_turn=4) -> NurbsCurve:
+    """Builds a helix starting on the X-axis at Z = 0.
+
+    Arguments:
+    radius -- Radius of the helix.
+    pitch -- Rise in Z per revolution.
+    turns -- Number of revolutions, does not need to be a whole number.
+    direction -- 1 turns counter clockwise (Right hand threads), -1 clockwise (Left hand threads).
+    spans_per_turn -- Number of arcs per revolution, at least 3 so no arc is 180 degrees or more.
+    """
+    if spans_per_turn < 3:
+        raise ValueError('spans_per_turn must be at least 3')
+    spans = max(1, math.ceil(turns * spans_per_turn - 1e-9))
+    sweep = 2 * math.pi * turns / spans             # Angle of each span
+    weight = math.cos(sweep / 2)
+    mid_rad = radius / weight                       # Middle control point sits where the end tangents cross
+    rise = pitch * turns / spans
+    points = [(radius, 0.0, 0.0)]
+    weights = [1.0]
+    for i in range(spans):
+        ang_mid = direction * (i + 0.5) * sweep
+        ang_end = direction * (i + 1) * sweep
+        points.append((mid_rad * math.cos(ang_mid), mid_rad * math.sin(ang_mid), (i + 0.5) * rise))
+        points.append((radius * math.cos(ang_end), radius * math.sin(ang_end), (i + 1) * rise))
+        weights += [weight, 1.0]
+    knots = [0.0] * 3
+    for i in range(1, spans):
+        knots += [float(i), float(i)]
+    knots += [float(spans)] * 3
+    return NurbsCurve(2, points, knots, weights)
+
+
+def evaluate_nurbs(curve: NurbsCurve, u):
+    """Point on the curve at parameter u, using de Boor's algorithm on the weighted points."""
+    p = curve.degree
+    knots = curve.knots
+    n = len(curve.control_points) - 1
+    if u >= knots[n + 1]:
+        k = n
+    else:
+        k = p
+        while knots[k + 1] <= u:
+            k += 1
+    d = []
+    for j in range(k - p, k + 1):
+        w = curve.weights[j]
+        x, y, z = curve.control_points[j]
+        d.append([x * w, y * w, z * w, w])
+    for r in range(1, p + 1):
+        for j in range(p, r - 1, -1):
+            i = j + k - p
+            den = knots[i + p + 1 - r] - knots[i]
+            alpha = 0.0 if den == 0 else (u - knots[i]) / den
+            d[j] = [(1 - alpha) * a + alpha * b for a, b in zip(d[j - 1], d[j])]
+    x, y, z, w = d[p]
+    return (x / w, y / w, z / w)
@@ -0,0 +1,44 @@
+# Copy & join plan for building a long thread out of one swept revolution.
+# Instead of patterning the revolution rev times, the block is doubled (1, 2, 4, 8 ... revolutions)
+# and the blocks for the binary digits of rev are joined on as they go by, so a thread of rev
+# revolutions takes about 2 * log2(rev) copy/move/join steps. The copies only touch end to end
+# like the pattern instances do, they never overlap.
+
+from typing import NamedTuple
+
+__all__ = [
+    'DoublingStep',
+    'doubling_plan',
+]
+
+
+class DoublingStep(NamedTuple):
+    """One step of the plan, there is a block body that starts as the swept revolution at Z = 0 & a thread body.
+
+    op is one of:
+    'double' -- Copy the block, move it up shift revolutions & join it to the block.
+    'append' -- Copy the block, move it up shift revolutions & join it to the thread body (the 1st one becomes the thread body).
+    'final'  -- Move the block itself up shift revolutions & join it to the thread body.
+    revs is the number of revolutions in the block at that step.
+    """
+    op: str
+    revs: int
+    shift: int
+
+
+def doubling_plan(rev):
+    """Steps to build rev revolutions, see DoublingStep. A power of 2 leaves the block as the thread body."""
+    if rev < 1:
+        raise ValueError('rev must be at least 1')
+    steps = []
+    size = 1
+    done = 0                        # Revolutions already in the thread body
+    while size * 2 <= rev:
+        if rev & size:
+            steps.append(DoublingStep('append', size, done))
+            done += size
+        steps.append(DoublingStep('double', size, size))
+        size *= 2
+    if done:
+        steps.append(DoublingStep('final', size, done))
+    return steps
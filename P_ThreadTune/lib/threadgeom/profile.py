@@ -0,0 +1,289 @@
+# Thread profile math that does not need Fusion 360 to be running.
+# Everything here works on plain (x, y) tuples in the same units & orientation
+# the Thread_Profile sketch uses: X is the radius in cm, and because the sketch
+# sits on the XZ plane, negative Y numbers are above the X-axis (up the helix).
+# NumPy is used for the batch routines when it is available, but Fusion 360
+# does not ship it, so every routine also works on plain Python lists.
+
+import math
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = [
+    'ThreadSpec',
+    'ThreadProfile',
+    'ProfileBatch',
+    'thread_profile',
+    'thread_profiles',
+    'offset_profile',
+    'real_offset',
+    'line_intersection',
+    'find_intersection',
+    'calculate_intersection',
+]
+
+
+class ThreadSpec(NamedTuple):
+    """Input parameters for one thread profile. Lengths are in mm, angles in degrees."""
+    od: float
+    pitch: float
+    helix_pitch: float
+    angle_top: float = 30.0
+    angle_bot: float = 30.0
+    gap: float = 0.0
+
+
+class ThreadProfile(NamedTuple):
+    """One thread profile in sketch coordinates (cm).
+
+    vertices -- P00, P1, P2, P3, P4, P5 as (x, y) tuples, the same points calcPts used to return.
+    x0 -- Inner radius of the profile (R_Min1), a little inside r_min so multiple threads connect.
+    r_min -- Minor radius of the thread.
+    yb_b, yb_t -- Largest bottom & top flank heights, used to cut the threads flush.
+    """
+    vertices: tuple
+    x0: float
+    r_min: float
+    yb_b: float
+    yb_t: float
+
+
+class ProfileBatch(NamedTuple):
+    """Many thread profiles at once. With NumPy every field is an array, vertices has shape (N, 6, 2)
+    and offsets (the Real Offset vertices P1..P4) has shape (N, 4, 2). Without NumPy they are lists."""
+    vertices: object
+    x0: object
+    r_min: object
+    yb_b: object
+    yb_t: object
+    offsets: object
+
+
+def _calc_angle(ang_t, ang_b):
+# We want to use the absolute value of smallest angle to use with formulas to get R_Min
+    abs_t = abs(ang_t)
+    abs_b = abs(ang_b)
+    ang = abs_b
+    if abs_t < abs_b:
+        ang = abs_t
+    if ang == 0.0:
+        ang = 30.0
+    if ang_t < 0 and ang_b < 0:
+        if abs_t > abs_b:
+            ang = ang_t
+        else:
+            ang = ang_b
+    return ang
+
+
+def thread_profile(spec: ThreadSpec) -> ThreadProfile:
+    """Calculates the single thread profile for a spec. This is the math calcPts has always used."""
+    ang_t = float(spec.angle_top)
+    ang_b = float(spec.angle_bot)
+    t_ang = math.tan(math.radians(ang_t))
+    b_ang = math.tan(math.radians(ang_b))
+    c_ang = math.tan(math.radians(_calc_angle(ang_t, ang_b)))
+    rad = spec.od / 2.0
+    h_thread = (1 / c_ang) * (spec.pitch / 2)
+    h8 = h_thread / 8
+    h_5h8 = (5 * h_thread) / 8
+    h3 = ((h_5h8 + h8) * c_ang) * 0.1
+    r_min = ((spec.od - (2 * abs(h_5h8))) * 0.1) / 2
+    x0 = r_min - .01                            # need just a little more inward to get one profile for multiple threads
+# To be less confusing, make sure we are dealing with positive numbers
+    yb_b = abs((h_5h8 + h8) * b_ang * .1)       # Biggest Length closest to center
+    ys_b = abs(h8 * b_ang * .1)
+    yb_t = abs((h_5h8 + h8) * t_ang * .1)       # Smallest Length on Outside Diameter
+    ys_t = abs(h8 * t_ang * .1)
+    x2 = rad * 0.1
+# The special cases of mixed signs on the angles give the same points as these 2 tests
+    if ang_b > 0:
+        y1, y2 = yb_b, ys_b
+    elif ang_b == 0:
+        y1, y2 = h3, h3
+    else:
+        y1, y2 = ys_b, yb_b
+    if ang_t > 0:
+        y3, y4 = -ys_t, -yb_t
+    elif ang_t == 0:
+        y3, y4 = -h3, -h3
+    else:
+        y3, y4 = -yb_t, -ys_t
+    vertices = (
+        (x0, y1),
+        (r_min, y1),
+        (x2, y2),
+        (x2, y3),
+        (r_min, y4),
+        (r_min, y1 - spec.helix_pitch * 0.1),
+    )
+    return ThreadProfile(vertices, x0, r_min, yb_b, yb_t)
+
+
+def thread_profiles(od, pitch, helix_pitch, angle_top=30.0, angle_bot=30.0, gap=None) -> ProfileBatch:
+    """Calculates many thread profiles in one call.
+
+    Every argument can be a number or a sequence; sequences are broadcast against each other.
+    If gap is given (mm), the Real Offset vertices for the female threads are calculated too.
+    """
+    if np is None:
+        return _thread_profiles_py(od, pitch, helix_pitch, angle_top, angle_bot, gap)
+    od, pitch, helix_pitch, t, b = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (od, pitch, helix_pitch, angle_top, angle_bot)))
+    od, pitch, helix_pitch, t, b = (np.atleast_1d(v) for v in (od, pitch, helix_pitch, t, b))
+    abs_t = np.abs(t)
+    abs_b = np.abs(b)
+    ang = np.where(abs_t < abs_b, abs_t, abs_b)
+    ang = np.where(ang == 0.0, 30.0, ang)
+    ang = np.where((t < 0) & (b < 0), np.where(abs_t > abs_b, t, b), ang)
+    t_ang = np.tan(np.radians(t))
+    b_ang = np.tan(np.radians(b))
+    c_ang = np.tan(np.radians(ang))
+    h_thread = (1 / c_ang) * (pitch / 2)
+    h8 = h_thread / 8
+    h_5h8 = (5 * h_thread) / 8
+    h3 = ((h_5h8 + h8) * c_ang) * 0.1
+    r_min = ((od - (2 * np.abs(h_5h8))) * 0.1) / 2
+    x0 = r_min - .01
+    yb_b = np.abs((h_5h8 + h8) * b_ang * .1)
+    ys_b = np.abs(h8 * b_ang * .1)
+    yb_t = np.abs((h_5h8 + h8) * t_ang * .1)
+    ys_t = np.abs(h8 * t_ang * .1)
+    x2 = od / 2.0 * 0.1
+    y1 = np.select([b > 0, b == 0], [yb_b, h3], ys_b)
+    y2 = np.select([b > 0, b == 0], [ys_b, h3], yb_b)
+    y3 = np.select([t > 0, t == 0], [-ys_t, -h3], -yb_t)
+    y4 = np.select([t > 0, t == 0], [-yb_t, -h3], -ys_t)
+    xs = np.stack([x0, r_min, x2, x2, r_min, r_min], axis=-1)
+    ys = np.stack([y1, y1, y2, y3, y4, y1 - helix_pitch * 0.1], axis=-1)
+    vertices = np.stack([xs, ys], axis=-1)
+    offsets = None
+    if gap is not None:
+        offsets = _offset_profiles_np(vertices, np.abs(np.asarray(gap, dtype=float)) * 0.1)
+    return ProfileBatch(vertices, x0, r_min, yb_b, yb_t, offsets)
+
+
+def _thread_profiles_py(od, pitch, helix_pitch, angle_top, angle_bot, gap):
+    columns = [od, pitch, helix_pitch, angle_top, angle_bot]
+    if gap is not None:
+        columns.append(gap)
+    columns = [list(c) if isinstance(c, (list, tuple, range)) else c for c in columns]
+    count = max([len(c) for c in columns if isinstance(c, list)] or [1])
+    columns = [c if isinstance(c, list) else [c] * count for c in columns]
+    batch = ProfileBatch([], [], [], [], [], [] if gap is not None else None)
+    for row in zip(*columns):
+        profile = thread_profile(ThreadSpec(*row))
+        batch.vertices.append(list(profile.vertices))
+        batch.x0.append(profile.x0)
+        batch.r_min.append(profile.r_min)
+        batch.yb_b.append(profile.yb_b)
+        batch.yb_t.append(profile.yb_t)
+        if gap is not None:
+            batch.offsets.append(offset_profile(profile, row[5]))
+    return batch
+
+
+def offset_profile(profile: ThreadProfile, gap: float) -> list:
+    """Returns P1..P4 of the profile offset by gap (mm) all the way around, as used for Real Offsets."""
+    p1 = profile.vertices[1]
+    points = [(p1[0], p1[1] + 1.0)] + list(profile.vertices[1:])
+    return real_offset(points, abs(gap) * 0.1)
+
+
+###############################################################################################
+#############  Following routines below were generated from ChatGPT on 5/13/2024  #############
+###############################################################################################
+def _offset_point(px, py, ox, oy, distance):
+# Offset a point (px, py) in the direction (ox, oy) by a specified distance.
+    norm = math.sqrt(ox**2 + oy**2)
+    return (px + distance * ox / norm, py + distance * oy / norm)
+
+
+def _det(a, b):
+    return a[0] * b[1] - a[1] * b[0]
+
+
+def line_intersection(l1, l2):
+    """Find the intersection of two lines, each given as a pair of (x, y) points."""
+    xdiff = (l1[0][0] - l1[1][0], l2[0][0] - l2[1][0])
+    ydiff = (l1[0][1] - l1[1][1], l2[0][1] - l2[1][1])
+    div = _det(xdiff, ydiff)
+    if div == 0:
+        raise ValueError('Lines do not intersect')
+    d = (_det(l1[0], l1[1]), _det(l2[0], l2[1]))
+    return (_det(d, xdiff) / div, _det(d, ydiff) / div)
+
+
+def real_offset(points, distance):
+    """Offsets each line segment of the polyline by distance (cm) & returns the intersections of
+    consecutive offset lines, so the gap is the same all the way around the profile."""
+    offsets = []
+    for p_start, p_end in zip(points[:-1], points[1:]):
+# Offsetting direction is perpendicular to the line segment direction
+        ox = -(p_end[1] - p_start[1])
+        oy = p_end[0] - p_start[0]
+        offsets.append((
+            _offset_point(p_start[0], p_start[1], ox, oy, distance),
+            _offset_point(p_end[0], p_end[1], ox, oy, distance)
+        ))
+# Find intersections of consecutive offset lines
+    return [line_intersection(offsets[i], offsets[i + 1]) for i in range(len(offsets) - 1)]
+#########################################################################################
+##########  Following routines above were generated from ChatGPT on 5/13/2024  ##########
+#########################################################################################
+
+
+def _offset_profiles_np(vertices, distance):
+# Same as real_offset, but for a whole batch of profiles at once
+    p1 = vertices[:, 1, :]
+    lifted = np.stack([p1[:, 0], p1[:, 1] + 1.0], axis=-1)
+    pts = np.concatenate([lifted[:, None, :], vertices[:, 1:, :]], axis=1)
+    start = pts[:, :-1, :]
+    end = pts[:, 1:, :]
+    d = end - start
+    normal = np.stack([-d[..., 1], d[..., 0]], axis=-1)
+    normal /= np.linalg.norm(normal, axis=-1, keepdims=True)
+    shift = normal * np.reshape(distance, (-1, 1, 1))
+    a = start + shift
+    b = end + shift
+# Intersections of consecutive offset lines, same determinant formula as line_intersection
+    xdiff = np.stack([a[:, :-1, 0] - b[:, :-1, 0], a[:, 1:, 0] - b[:, 1:, 0]], axis=-1)
+    ydiff = np.stack([a[:, :-1, 1] - b[:, :-1, 1], a[:, 1:, 1] - b[:, 1:, 1]], axis=-1)
+    div = xdiff[..., 0] * ydiff[..., 1] - xdiff[..., 1] * ydiff[..., 0]
+    cross = a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    d1 = cross[:, :-1]
+    d2 = cross[:, 1:]
+    x = (d1 * xdiff[..., 1] - d2 * xdiff[..., 0]) / div
+    y = (d1 * ydiff[..., 1] - d2 * ydiff[..., 0]) / div
+    return np.stack([x, y], axis=-1)
+
+
+def find_intersection(p1, p2, p3, p4):
+    """Intersection point of the line through p1, p2 and the line through p3, p4."""
+    x1, y1 = p1
+    x2, y2 = p2
+    x3, y3 = p3
+    x4, y4 = p4
+    den = (x1 - x2) * (y3 - y4) - (y1 - y2) * (x3 - x4)
+    px = ((x1 * y2 - y1 * x2) * (x3 - x4) - (x1 - x2) * (x3 * y4 - y3 * x4)) / den
+    py = ((x1 * y2 - y1 * x2) * (y3 - y4) - (y1 - y2) * (x3 * y4 - y3 * x4)) / den
+    return (px, py)
+
+
+def calculate_intersection(p3, p4, p5, p22):
+    """Intersection of line p3, p4 with line p5, p22 working on the absolute Y values.
+    Returns None if the lines are parallel."""
+    a1 = abs(p4[1]) - abs(p3[1])
+    b1 = p3[0] - p4[0]
+    c1 = (a1 * p3[0]) + (b1 * abs(p3[1]))
+    a2 = abs(p22[1]) - abs(p5[1])
+    b2 = p5[0] - p22[0]
+    c2 = (a2 * p5[0]) + (b2 * abs(p5[1]))
+    det = a1 * b2 - a2 * b1
+    if det == 0:
+        return None
+    return ((b2 * c1 - b1 * c2) / det, (a1 * c2 - a2 * c1) / det)
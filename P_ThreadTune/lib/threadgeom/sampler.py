@@ -0,0 +1,99 @@
+# Point sampler for the helix, coil & spiral paths.
+# DrawHelix, DrawAngledCoil & DrawSpiral all sample the same kind of curve, a point
+# that turns around the Z-axis while its radius and/or Z grow linearly with the turn:
+#   helix         radial_pitch = 0,                   z_pitch = pitch
+#   angled coil   radial_pitch = pitch * tan(angle),  z_pitch = pitch
+#   spiral        radial_pitch = pitch,               z_pitch = 0
+# The path & the guide rail are generated together in one pass. Units are whatever
+# the caller uses, the entry.py routines pass cm.
+# Long paths are fitted as a chain of shorter splines, spline_segments splits the points for that.
+
+import itertools
+import math
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+__all__ = [
+    'CurveSamples',
+    'sample_curve',
+    'spline_segments',
+]
+
+
+class CurveSamples(NamedTuple):
+    """Points along a path & its guide rail.
+
+    With NumPy, path & rail are (N, 3) arrays, otherwise lists of (x, y, z) tuples.
+    rail is None when no rail_radius was given.
+    """
+    path: object
+    rail: object
+
+
+def sample_curve(radius, pts_per_rev, revolutions, z_pitch=0.0, radial_pitch=0.0, rail_radius=None, direction=1):
+    """Samples pts_per_rev * revolutions + 1 points starting on the X-axis at Z = 0.
+
+    Arguments:
+    radius -- Starting radius of the path.
+    pts_per_rev -- Number of spline points per revolution.
+    revolutions -- Number of revolutions to sample.
+    z_pitch -- Rise in Z per revolution.
+    radial_pitch -- Growth of the radius per revolution.
+    rail_radius -- Starting radius of the guide rail, or None for no guide rail.
+    direction -- 1 turns counter clockwise (Right hand threads), -1 clockwise (Left hand threads).
+    """
+    count = int(pts_per_rev * revolutions) + 1
+    ang_R = direction * 2 * math.pi / pts_per_rev       # Increment angle in radians between spline points
+    if np is not None:
+        turns = np.arange(count, dtype=float) / pts_per_rev
+        ang = np.arange(count, dtype=float) * ang_R
+        cos_a = np.cos(ang)
+        sin_a = np.sin(ang)
+        z = turns * z_pitch
+        grow = turns * radial_pitch
+        r = radius + grow
+        path = np.column_stack((r * cos_a, r * sin_a, z))
+        rail = None
+        if rail_radius is not None:
+            r1 = rail_radius + grow
+            rail = np.column_stack((r1 * cos_a, r1 * sin_a, z))
+        return CurveSamples(path, rail)
+# Without NumPy, the angles repeat every revolution, so only look up cos & sin for one revolution
+    n = int(pts_per_rev)
+    cos_t = [math.cos(k * ang_R) for k in range(n)]
+    sin_t = [math.sin(k * ang_R) for k in range(n)]
+    z_step = z_pitch / pts_per_rev
+    r_step = radial_pitch / pts_per_rev
+    path = _sample_py(radius, r_step, z_step, count, cos_t, sin_t)
+    rail = None
+    if rail_radius is not None:
+        rail = _sample_py(rail_radius, r_step, z_step, count, cos_t, sin_t)
+    return CurveSamples(path, rail)
+
+
+def spline_segments(count, max_points):
+    """(start, stop) slices that split count points into splines of at most max_points points.
+
+    Each segment starts on the last point of the one before it, so the splines join end to end,
+    & the points are shared out evenly so the last segment is not left with only a few.
+    """
+    max_points = max(int(max_points), 3)
+    if count <= max_points:
+        return [(0, count)]
+    spans = count - 1
+    segments = -(-spans // (max_points - 1))
+    bounds = [round(i * spans / segments) for i in range(segments + 1)]
+    return [(bounds[i], bounds[i + 1] + 1) for i in range(segments)]
+
+
+def _sample_py(radius, r_step, z_step, count, cos_t, sin_t):
+    if r_step == 0:
+# Helix, the x, y points are the same every revolution & only Z changes
+        xy = itertools.cycle([(radius * c, radius * s) for c, s in zip(cos_t, sin_t)])
+        return [(x, y, i * z_step) for i, (x, y) in zip(range(count), xy)]
+    return [((radius + i * r_step) * c, (radius + i * r_step) * s, i * z_step)
+            for i, c, s in zip(range(count), itertools.cycle(cos_t), itertools.cycle(sin_t))]
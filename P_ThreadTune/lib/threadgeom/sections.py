@@ -0,0 +1,144 @@
+# Points of the coil sections, in sketch coordinates on the XZ plane (x is the radius).
+# DrawPolygon, DrawStar & DrawRectangle draw lines through these points & the live preview
+# sweeps the same points, so the preview matches what gets built. Curved sections (circle &
+# ellipse) are drawn as real circles & ellipses in the sketch, their points are for the preview
+# & the command line mesh export.
+
+import math
+
+__all__ = [
+    'polygon_points',
+    'star_points',
+    'circle_points',
+    'ellipse_points',
+    'rectangle_points',
+    'x_axis_crossings',
+    'vertex_angle',
+    'coil_section',
+    'coil_max_radius',
+]
+
+
+def polygon_points(center_x, num_sides, radius, start_angle=0.0):
+    angle = 2 * math.pi / num_sides
+    return [(center_x + radius * math.cos(i * angle + start_angle), radius * math.sin(i * angle + start_angle))
+            for i in range(num_sides)]
+
+
+def star_points(center_x, outer_radius, inner_radius, num_points, start_angle=0.0):
+    angle = 2 * math.pi / (num_points * 2)
+    points = []
+    for i in range(num_points * 2):
+        radius = outer_radius if i % 2 == 0 else inner_radius
+        points.append((center_x + radius * math.cos(i * angle + start_angle), radius * math.sin(i * angle + start_angle)))
+    return points
+
+
+def circle_points(center_x, radius, segments=24):
+    return polygon_points(center_x, segments, radius)
+
+
+def ellipse_points(center_x, major_x, minor_y, segments=24):
+    """major_x & minor_y are the full width & height, like DrawEllipse takes them."""
+    angle = 2 * math.pi / segments
+    return [(center_x + major_x / 2 * math.cos(i * angle), minor_y / 2 * math.sin(i * angle)) for i in range(segments)]
+
+
+def rectangle_points(path_x, width, height, position='3', vert_position='3'):
+    """Corners of the coil rectangle.
+
+    Arguments:
+    path_x -- Radius of the coil path.
+    position -- '1' Inside, '2' Center or '3' Outside of the path.
+    vert_position -- '1' Top, '2' Middle or '3' Bottom on the path.
+    """
+    x0 = path_x
+    if position == '1':
+        x0 = path_x - width
+    elif position == '2':
+        x0 = path_x - width / 2.0
+    x1 = x0 + width
+    y0 = 0
+    y1 = -height
+    if vert_position == '1':
+        y0 = height
+        y1 = 0
+    elif vert_position == '2':
+        y0 = -height / 2.0
+        y1 = height / 2.0
+    return [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+
+
+def x_axis_crossings(points):
+    """Sorted X values where the closed outline through points crosses the X-axis."""
+    crossings = []
+    for i, (x1, y1) in enumerate(points):
+        x2, y2 = points[(i + 1) % len(points)]
+        if (y1 >= 0 > y2) or (y1 <= 0 < y2):
+            t = y1 / (y1 - y2)
+            crossings.append(x1 + t * (x2 - x1))
+    return sorted(crossings)
+
+
+def vertex_angle(vert_position):
+    """Start angle of the first polygon or star vertex for the Vertex Position choice."""
+    if vert_position == '2':
+        return - math.pi / 2        # -90 degrees Top vertex
+    if vert_position == '3':
+        return math.pi              # 180 degrees Left vertex
+    if vert_position == '4':
+        return math.pi / 2          # 90 degrees Bottom vertex
+    if vert_position == '5':
+        return math.pi / 8          # 22.5 degrees for 8 sided
+    if vert_position == '6':
+        return math.pi / 4          # 45.0 degrees for 12 sided
+    return 0.0                      # 0 degrees Right vertex
+
+
+def coil_section(sec_type, path_x, position='2', vert_position='1', dia_sect=2.0, poly_sides=6, ellipse_x=1.0,
+                 ellipse_y=2.0, rect_wid=3.0, rect_ht=6.0, rect_position='2', star_out=5.0, star_in=2.5, star_num=6):
+    """Points of a coil section placed on the path the way DrawCoil places it, lengths in cm.
+
+    sec_type -- '1' Circle, '2' Polygon, '3' Ellipse, '4' Rectangle or '5' Star.
+    position -- '1' Inside, '2' Center or '3' Outside of the path.
+    """
+    if sec_type == '4':
+        return rectangle_points(path_x, rect_wid, rect_ht, position, rect_position)
+    if sec_type == '2':
+        points = polygon_points(0, int(poly_sides), dia_sect / 2.0, vertex_angle(vert_position))
+    elif sec_type == '3':
+        points = ellipse_points(0, ellipse_x, ellipse_y)
+    elif sec_type == '5':
+        points = star_points(0, star_out, star_in, int(star_num), vertex_angle(vert_position))
+    else:
+        points = circle_points(0, dia_sect / 2.0)
+# Inside puts the section inside the path, Outside puts it outside
+    crossings = x_axis_crossings(points)
+    x = path_x
+    if position == '1':
+        x = path_x - crossings[-1]
+    elif position == '3':
+        x = path_x - crossings[0]
+    return [(px + x, py) for px, py in points]
+
+
+def coil_max_radius(coil_type, diameter, sec_type, dia_sect, ellipse_x, rect_wid, star_out, pitch, revs, height, angle):
+    """Largest radius in mm the coil path or guide rail gets to, used to size the spline points for a tolerance.
+
+    Takes the dialog values as they are saved, numbers or strings. The whole section size is
+    added, so it covers the Inside, Center & Outside positions.
+    """
+    size = float(dia_sect)
+    if sec_type == '3':
+        size = float(ellipse_x)
+    elif sec_type == '4':
+        size = float(rect_wid)
+    elif sec_type == '5':
+        size = float(star_out) * 2.0
+    rad = float(diameter) / 2.0 + size
+    if coil_type == '4':
+        return rad + float(pitch) * int(revs)          # Spiral grows a pitch every revolution
+    ht = float(height)
+    if coil_type == '2':
+        ht = int(revs) * float(pitch)
+    return rad + ht * abs(math.tan(math.radians(float(angle))))
@@ -0,0 +1,70 @@
+# Spline point count from a radial tolerance instead of a guess.
+# A fitted spline through helix points is worst at its free ends, where the spline
+# has no curvature but the helix does. There the radial deviation is
+#   deviation = END_FACTOR * radius * spacing**2,   spacing = 2 * pi / points per revolution
+# END_FACTOR is measured from cubic splines through helix points, see benchmarks/bench_nurbs.py,
+# and is rounded up so the count is never too small. The spline points are spaced evenly
+# along the helix, so the helix pitch scales every segment alike & drops out of the result.
+# The NURBS helix of the NurbsHelix & BRepHelix guides lies on its cylinder, but its rational
+# arcs do not climb evenly with the angle, so it strays from the true helix in Z by
+#   deviation = NURBS_Z_FACTOR * pitch / spans per turn**3
+# NURBS_Z_FACTOR is the worst of it at 3 spans per turn, rounded up, more spans come a little under.
+
+import math
+
+__all__ = [
+    'END_FACTOR',
+    'MIN_SPLINE_POINTS',
+    'NURBS_Z_FACTOR',
+    'MIN_NURBS_SPANS',
+    'spline_deviation',
+    'points_for_tolerance',
+    'nurbs_deviation',
+    'spans_for_tolerance',
+]
+
+END_FACTOR = 0.052
+MIN_SPLINE_POINTS = 8
+NURBS_Z_FACTOR = 0.36
+MIN_NURBS_SPANS = 3                 # helix_nurbs needs at least 3 arcs per revolution
+
+
+def spline_deviation(radius, pts_per_rev):
+    """Largest radial deviation of a fitted spline helix with pts_per_rev points, same units as radius."""
+    spacing = 2 * math.pi / pts_per_rev
+    return END_FACTOR * radius * spacing ** 2
+
+
+def points_for_tolerance(radius, tolerance, multiple=1, minimum=MIN_SPLINE_POINTS):
+    """Smallest number of spline points per revolution that keeps the deviation within tolerance.
+
+    Arguments:
+    radius -- Largest radius of the path or guide rail.
+    tolerance -- Maximum radial deviation, same units as radius.
+    multiple -- Round the count up to a multiple of this, the coils need 4.
+    minimum -- Never return fewer points than this.
+    """
+    if tolerance <= 0:
+        raise ValueError('tolerance must be greater than 0')
+    spacing = math.sqrt(tolerance / (END_FACTOR * abs(radius)))
+    count = max(minimum, math.ceil(2 * math.pi / spacing - 1e-9))
+    return int(math.ceil(count / multiple) * multiple)
+
+
+def nurbs_deviation(pitch, spans_per_turn):
+    """Largest Z deviation of a helix_nurbs helix with spans_per_turn arcs per revolution, same units as pitch."""
+    return NURBS_Z_FACTOR * abs(pitch) / spans_per_turn ** 3
+
+
+def spans_for_tolerance(pitch, tolerance, minimum=MIN_NURBS_SPANS):
+    """Smallest number of helix_nurbs arcs per revolution that keeps the Z deviation within tolerance.
+
+    Arguments:
+    pitch -- Rise of the helix per revolution.
+    tolerance -- Maximum deviation in Z, same units as pitch.
+    minimum -- Never return fewer arcs than this.
+    """
+    if tolerance <= 0:
+        raise ValueError('tolerance must be greater than 0')
+    count = math.ceil((NURBS_Z_FACTOR * abs(pitch) / tolerance) ** (1 / 3) - 1e-9)
+    return int(max(minimum, count))
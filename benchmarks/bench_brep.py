@@ -0,0 +1,54 @@
+# BRepHelix engine against Pattern mode for M3 to M24 threads 3 diameters long.
+# Pattern mode sends Fusion 2 sketches with fitted spline helices, then a sweep, a path pattern of
+# rev bodies, the cylinder join & one revolve that trims & chamfers the threads. The BRepHelix
+# engine works out the NURBS flanks here in Python, does the doubling & trimming booleans in
+# memory with the TemporaryBRepManager & adds only the finished body, then its chamfer. This times the Python side of the BRep
+# engine & counts what each mode hands to Fusion, the Fusion side can only be timed inside Fusion:
+#   features   -- Timeline features a 1 start type 1 Threads build leaves, perf.feature_count of each mode
+#   spline pts -- Fitted spline points Fusion has to solve (Pattern, 18 points per revolution)
+#   booleans   -- In memory TemporaryBRepManager booleans (BRepHelix)
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_brep
+
+import csv
+
+from P_ThreadTune import config
+from P_ThreadTune.lib import perf, threadgeom
+from benchmarks.bench_nurbs import METRIC_CSV
+from benchmarks.bench_sampler import best_of
+
+SPLINE_POINTS = 18
+LENGTH_DIAMETERS = 3
+
+
+def section(od, pitch):
+    prof = threadgeom.thread_profile(threadgeom.ThreadSpec(od, pitch, pitch))
+    points = [(x, -y) for x, y in prof.vertices[:5]]
+    return points + [(prof.x0, points[-1][1])]
+
+
+def brep_python(od, pitch):
+    return threadgeom.helical_sweep(section(od, pitch), pitch * .1)
+
+
+def main():
+    with open(METRIC_CSV) as file:
+        rows = list(csv.reader(file))[1:]
+    print(f'{"size":<8}{"revs":>6}  {"pattern":>8}{"spline pts":>12}  {"brep":>6}{"booleans":>10}{"faces":>7}{"python ms":>11}')
+    features = lambda guide, rev: perf.feature_count(perf.BuildSpec(guide, 1, rev, SPLINE_POINTS), config.PATTERN_DOUBLING_REVS)
+    for row in rows:
+        od = float(row[1])
+        if od > 24:
+            continue
+        pitch = float(row[2])
+        rev = int(od * LENGTH_DIAMETERS / pitch) + 1
+        sweep = brep_python(od, pitch)
+        booleans = sum(1 for step in threadgeom.doubling_plan(rev) if step.op != 'append' or step.shift) + 3
+        seconds = best_of(lambda: brep_python(od, pitch))
+        print(f'{"M" + row[1] + "x" + row[2]:<8}{rev:>6}  {features("P", rev):>8}{2 * (SPLINE_POINTS + 1):>12}'
+              f'  {features("B", rev):>6}{booleans:>10}{len(sweep.flanks) + 2:>7}{seconds * 1000:>11.3f}')
+
+
+if __name__ == '__main__':
+    main()
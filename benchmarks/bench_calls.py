@@ -0,0 +1,212 @@
+# Counts what command_execute asks Fusion 360 to do for each kind of build, using the recording
+# fakeadsk stand-in. Most of the build time is in Fusion, so the number of sketches, lines,
+# spline points, features & booleans a build makes is the cost we can keep an eye on without it.
+# Every thread type (1-5) is built with each GuideRail mode & 1 & 3 starts, plus the coil
+# sections, & the counts are checked against benchmarks/baselines/call_budgets.json.
+# So are the paths that skip the sweep: Real Offset nut threads offset from the bolt's revolution,
+# a thread body loaded from the template library, & a component that is in the design already,
+# in the same hand (reused) or the other (mirrored).
+# A build that goes over its budget, brings up a message box (an error inside Fusion), or makes
+# a different number of features than perf.feature_count estimates for it, fails the run.
+# After a change that is meant to add work, record new budgets with --save.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_calls                 check against the budgets
+#   python -m benchmarks.bench_calls --save          record the counts as the new budgets
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+from types import SimpleNamespace
+
+from benchmarks import fakeadsk
+
+fakeadsk.install()
+
+from P_ThreadTune.commands.commandDialog import entry
+from P_ThreadTune.lib import perf
+
+BUDGETS = os.path.join(os.path.dirname(__file__), 'baselines', 'call_budgets.json')
+THREAD_TYPES = {'1': 'Threads', '2': 'Bolt', '3': 'Threads M/F', '4': 'Nut', '5': 'Bolt & Nut'}
+GUIDE_RAILS = ('Helix', 'Pattern', 'LongHelix', 'NurbsHelix', 'BRepHelix')
+STARTS = (1, 3)
+COIL_SECTIONS = {'1': 'circle', '2': 'polygon', '3': 'ellipse', '4': 'rectangle', '5': 'star'}
+METRICS = ('sketches', 'lines', 'splines', 'spline points', 'features', 'booleans', 'messages')
+
+DIALOG = {
+    'diameter': '8', 'pitch': '1.25', 'pitHelix': '1.25', 'height': '20', 'angleTop': '30', 'angleBot': '30',
+    'splinePts': '18', 'splineTol': '0', 'Bolt_Sides': '6', 'Nut_Sides': '6', 'MF_Gap': '0.3',
+    'BoltFlat_Dia': '13', 'BoltHd_Ht': '5.4', 'NutFlat_Dia': '13', 'NutHd_Ht': '6.5', 'Cham_Wid': '1.015',
+    'Cdiameter': '24.0', 'Cpitch': '2.5', 'Cheight': '20', 'CsplinePts': '20', 'CsplineTol': '0', 'Crevs': '3',
+    'Cangle': '0', 'Cdia_Sect': '2.0', 'CpolySides': '6', 'CellipseX': '1.0', 'CellipseY': '2.0', 'Crect_Wid': '3',
+    'Crect_Ht': '6', 'CStarOut_Rad': '5', 'CStarIn_Rad': '2.5', 'CStar_Num': '6',
+    'Thread_Wid': '', 'Thread_Ht': '', 'Ediameter': '', 'Epitch': '', 'EpitHelix': '', 'Cham_EWid': '', 'Thread_EWid': '',
+    'Thread_EHt': '', 'BoltFlat_EDia': '', 'BoltHd_EHt': '', 'NutFlat_EDia': '', 'NutHd_EHt': '',
+}
+DROPDOWNS = {
+    'GuideRail': 'Pattern', 'RightLeft': 'Right', 'Starts': '1 Start', 'WhatType': '1 Threads', 'CoilType': '2 Revs & Pitch',
+    'CSec_Type': '1 Circle', 'Cposition': '2 Center', 'CvertPos': '1 Right', 'CPosRect': '2 Middle',
+}
+CHECKS = {'_ChamThread': True, '_ChamNut': True, '_RealOffset': False, '_FastBuild': False, '_ForceRebuild': False}
+
+
+class CommandInputs:
+    def __init__(self, values, dropdowns, checks):
+        self.inputs = {name: fakeadsk.text_input(value) for name, value in values.items()}
+        self.inputs.update({name: fakeadsk.dropdown(0, value) for name, value in dropdowns.items()})
+        self.inputs.update({name: SimpleNamespace(value=value) for name, value in checks.items()})
+
+    def itemById(self, name):
+        return self.inputs.get(name)
+
+
+def build_report(type_char='1', guide='Pattern', starts=1, coil_section='1', height=DIALOG['height'], hand='Right', checks=None, tags=()):
+    """Runs command_execute through fakeadsk & returns the counts for that one build, plus the estimated features.
+
+    checks -- Check boxes that differ from CHECKS.
+    tags -- Spec hashes of components that are in the design before the build.
+    """
+    dropdowns = dict(DROPDOWNS, GuideRail=guide, Starts=f'{starts} Start', WhatType=f'{type_char} {THREAD_TYPES.get(type_char, "Coils")}',
+                     CSec_Type=f'{coil_section} {COIL_SECTIONS[coil_section]}', RightLeft=hand)
+    values = dict(DIALOG, pitHelix=repr(float(DIALOG['pitch']) * starts), height=height)
+    inputs = CommandInputs(values, dropdowns, dict(CHECKS, **(checks or {})))
+    inputs.inputs['EnglishMetric'] = fakeadsk.dropdown(1, 'Metric')
+    args = SimpleNamespace(command=SimpleNamespace(commandInputs=inputs))
+# command_created keeps the dialog inputs in _name globals that calcPts & the rest read
+    for name, item in inputs.inputs.items():
+        setattr(entry, '_' + name.lstrip('_'), item)
+    entry.dropdownInputEM = inputs.inputs['EnglishMetric']
+    entry.Thread_Wid = '0.6766'
+    entry.Thread_Ht = '0.9375'
+    entry.GRC_Char = 'L'
+    entry.Cdia_Sect = DIALOG['Cdia_Sect']     # DrawCoil reads the section diameter from the dialog global
+    fakeadsk.reset()
+    for value in tags:
+        fakeadsk.tag(entry.CACHE_GROUP, 'spec', value, ('M8', 'M8_Nut'))
+# futil.log prints every event, keep it out of the table
+    with contextlib.redirect_stdout(io.StringIO()):
+        entry.command_execute(args)
+    report = summarize(fakeadsk.calls, fakeadsk.messages)
+    spec = entry.DialogSpec(inputs)
+    report['estimate'] = perf.feature_count(spec, entry.config.PATTERN_DOUBLING_REVS)
+    return report
+
+
+def spec_hash(**params):
+    """Spec hash command_execute tags the component of this build with."""
+    hashes = []
+    SpecHash = entry.SpecHash
+    entry.SpecHash = lambda Params: hashes.append(SpecHash(Params)) or hashes[-1]
+    try:
+        build_report(**params)
+    finally:
+        entry.SpecHash = SpecHash
+    return hashes[0]                        # The 1st is the build's own, the next looks for the other hand
+
+
+def case_report(template=False, cached=None, **params):
+    """build_report, after a 1st build has saved the template, or with the component of hand cached in the design."""
+    if template:
+        with tempfile.TemporaryDirectory() as folder:
+            entry.config.TEMPLATE_FOLDER = folder
+            try:
+                build_report(**params)
+                return build_report(**params)
+            finally:
+                entry.config.TEMPLATE_FOLDER = None
+    if cached:
+        report = build_report(tags=[spec_hash(**dict(params, hand=cached))], **params)
+# The estimate is for building it, a reused component adds nothing & a mirrored one is a single Base Feature
+        report['estimate'] = int(cached != params.get('hand', 'Right'))
+        return report
+    return build_report(**params)
+
+
+def summarize(calls, messages):
+    features = sum(n for key, n in calls.items() if re.fullmatch(r'\w+Features\.add\w*', key)) + calls['copyPasteBodies.add']
+    return {
+        'sketches': calls['sketches.add'],
+        'lines': calls['sketchLines.addByTwoPoints'],
+        'splines': calls['sketchFittedSplines.add'] + calls['sketchFixedSplines.addByNurbsCurve'],
+        'spline points': calls['spline points'],
+        'features': features,
+        'booleans': calls['combineFeatures.add'] + sum(n for key, n in calls.items() if key.endswith('.booleanOperation')),
+        'messages': len(messages),
+    }
+
+
+def over_budget(report, budget):
+    """Names of the counts in report that are more than the budget allows."""
+    return [name for name in METRICS if name in budget and report[name] > budget[name]]
+
+
+def cases():
+    for type_char in THREAD_TYPES:
+        for guide in GUIDE_RAILS:
+            for starts in STARTS:
+                yield f'type {type_char} {guide} {starts} start', dict(type_char=type_char, guide=guide, starts=starts)
+# Long enough for the Pattern & NurbsHelix threads to be built by doubling
+    for guide in ('Pattern', 'NurbsHelix'):
+        yield f'type 1 {guide} 1 start 100mm', dict(type_char='1', guide=guide, height='100')
+    for section, shape in COIL_SECTIONS.items():
+        yield f'type 6 coil {shape}', dict(type_char='6', coil_section=section)
+    for type_char in ('3', '5'):
+        for starts in STARTS:
+            yield f'type {type_char} Pattern {starts} start offset', dict(type_char=type_char, starts=starts, checks={'_RealOffset': True})
+    yield 'type 2 Pattern 1 start template', dict(type_char='2', template=True)
+    yield 'type 5 Pattern 1 start offset template', dict(type_char='5', checks={'_RealOffset': True}, template=True)
+    yield 'type 5 Pattern 1 start reused', dict(type_char='5', cached='Right')
+    yield 'type 5 Pattern 1 start mirrored', dict(type_char='5', cached='Left')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fusion 360 operation counts per build')
+    parser.add_argument('--save', action='store_true', help='Record these counts as the new budgets')
+    args = parser.parse_args()
+    budgets = {}
+    if os.path.exists(BUDGETS):
+        with open(BUDGETS) as file:
+            budgets = json.load(file)
+    reports = {}
+    failed = []
+    print(f'{"build":<40}' + ''.join(f'{name:>15}' for name in METRICS) + f'{"estimate":>10}')
+    with tempfile.TemporaryDirectory() as folder:
+# command_execute saves the dialog values, keep that away from the real DialogInput files
+        entry.Fname = os.path.join(folder, 'DialogInput_V9.txt')
+        entry.EFname = os.path.join(folder, 'EDialogInput_V9.txt')
+        entry.CFname = os.path.join(folder, 'Coil_DialogInput_V10.txt')
+        entry.config.SPANS_LOG = os.path.join(folder, 'build_spans.jsonl')
+        entry.config.HISTORY_DB = os.path.join(folder, 'build_history.sqlite')
+        entry.config.TEMPLATE_FOLDER = None         # fakeadsk bodies cannot be saved, & a template would change the later counts
+        for name, params in cases():
+            report = case_report(**params)
+            reports[name] = report
+            over = over_budget(report, budgets.get(name, {}))
+            if report['messages']:
+                over.append('messages')
+            if report['features'] != report['estimate']:
+                over.append('estimate')
+            flag = ''
+            if over:
+                flag = '  OVER: ' + ', '.join(over)
+                failed.append(name)
+            print(f'{name:<40}' + ''.join(f'{report[m]:>15}' for m in METRICS) + f'{report["estimate"]:>10}' + flag)
+    if args.save:
+        os.makedirs(os.path.dirname(BUDGETS), exist_ok=True)
+        with open(BUDGETS, 'w') as file:
+            json.dump({name: {m: report[m] for m in METRICS} for name, report in reports.items()}, file, indent=1)
+            file.write('\n')
+        print(f'Budgets saved to {BUDGETS}')
+    elif failed:
+        print(f'{len(failed)} build(s) over budget, with a message box or off the estimate')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# Python side of the entry.py geometry routines, timed against the fakeadsk stand-in.
+# calcPts, Real_offset, CalcThread, the DrawHelix spline points, DrawPolygon, DrawStar & DrawCoil
+# are run for catalog rows from metric_V3.csv & English_V3.csv & the coil section shapes.
+# The Fusion calls they make go to fakeadsk & cost next to nothing, so what is timed is
+# the add-in's own Python. The times are compared with benchmarks/baselines/bench_entry.json
+# & any case slower than the baseline by more than the tolerance fails the run.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_entry                 compare with the baseline
+#   python -m benchmarks.bench_entry --save          record a new baseline
+# Baselines are only comparable on the machine they were recorded on.
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from benchmarks import fakeadsk
+
+fakeadsk.install()
+
+from P_ThreadTune.commands.commandDialog import entry
+from benchmarks.bench_nurbs import METRIC_CSV
+from benchmarks.bench_sampler import best_of
+
+ENGLISH_CSV = os.path.join(os.path.dirname(METRIC_CSV), 'English_V3.csv')
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'bench_entry.json')
+METRIC_SIZES = ('3', '8', '24')
+ENGLISH_SIZES = ('1/4-20 UNC', '1/2-12 UNS', '1-8 UNC')
+ROD_LENGTH = 500                # mm, for the LongHelix spline points
+COILS = (('1', 'circle'), ('2', 'polygon'), ('3', 'ellipse'), ('4', 'rectangle'), ('5', 'star'))
+
+
+def catalog():
+    with open(METRIC_CSV) as file:
+        metric = {row[1]: row for row in list(csv.reader(file))[1:]}
+    with open(ENGLISH_CSV) as file:
+        english = {row[0]: row for row in list(csv.reader(file))[1:]}
+    rows = [(f'M{size}x{metric[size][2]}', float(metric[size][1]), float(metric[size][2])) for size in METRIC_SIZES]
+    rows += [(name, float(english[name][1]) * 25.4, 25.4 / float(english[name][2])) for name in ENGLISH_SIZES]
+    return rows
+
+
+def set_dialog(od, pitch, english=False):
+    """Puts the dialog inputs entry.py reads into its globals."""
+    entry._angleTop = fakeadsk.text_input(30)
+    entry._angleBot = fakeadsk.text_input(30)
+    entry._MF_Gap = fakeadsk.text_input(0.3)
+    entry.dropdownInputEM = fakeadsk.dropdown(0 if english else 1, 'English' if english else 'Metric')
+    entry._diameter = fakeadsk.text_input(od)
+    entry._pitch = fakeadsk.text_input(pitch)
+    entry.pitHelix = str(pitch)
+    entry._Ediameter = fakeadsk.text_input(od / 25.4)
+    entry._Epitch = fakeadsk.text_input(25.4 / pitch)
+    entry._EpitHelix = fakeadsk.text_input(25.4 / pitch)
+    for name in ('_Cham_Wid', '_Thread_Wid', '_Thread_Ht', '_Cham_EWid', '_Thread_EWid', '_Thread_EHt'):
+        setattr(entry, name, fakeadsk.text_input(''))
+    entry.Body_Name = 'Bench'
+
+
+def draw_helix(od, pitch, sPts, guide):
+    comp = fakeadsk.Component()
+    sketch = comp.sketches.add(None)
+    entry.RunStages(entry.DrawHelix(comp, sketch, 0, od / 2.0, pitch, ROD_LENGTH, ROD_LENGTH * .1, sPts, guide, 'R', None, 1))
+
+
+def draw_coil(sec_type, coil_type):
+    entry.Cdia_Sect = '2.0'             # DrawCoil reads the section diameter from the dialog global
+    entry.RunStages(entry.DrawCoil(fakeadsk.Component(), coil_type, '24.0', sec_type, '6', '1.0', '2.0', '3', '2', '3', '6',
+                                   '5', '2.5', '6', '2.5', '10', '20', 20, 'L', 'R', '5', '1'))
+
+
+def cases():
+# The default arguments hold each case's values, so the lambdas do not all see the last loop values
+    for name, od, pitch in catalog():
+        english = not name.startswith('M')
+        yield f'calcPts {name}', lambda od=od, pitch=pitch, english=english: (set_dialog(od, pitch, english), entry.calcPts(od, pitch, pitch * .1))
+        pts = entry.calcPts(od, pitch, pitch * .1)
+        yield f'Real_offset {name}', lambda pts=pts: entry.Real_offset(pts[1:5])
+        yield f'CalcThread {name}', lambda od=od, pitch=pitch, english=english: (set_dialog(od, pitch, english), entry.CalcThread(1))
+        for guide, sPts in (('P', 18), ('L', 18), ('N', 18)):
+            yield f'DrawHelix {guide} {sPts} {name} {ROD_LENGTH}mm', lambda od=od, pitch=pitch, english=english, sPts=sPts, guide=guide: (
+                set_dialog(od, pitch, english), draw_helix(od, pitch, sPts, guide))
+    sketch = fakeadsk.Sketch()
+    for sides in (3, 6, 12):
+        yield f'DrawPolygon {sides} sides', lambda sides=sides: entry.DrawPolygon(sketch, 1.2, sides, 0.1, '1', 1)
+    for points in (5, 12):
+        yield f'DrawStar {points} points', lambda points=points: entry.DrawStar(sketch, 1.2, 0.5, 0.25, points, '1')
+    for sec_type, shape in COILS:
+        for coil_type in ('2', '4'):
+            yield f'DrawCoil {shape} {"spiral" if coil_type == "4" else "coil"}', lambda sec_type=sec_type, coil_type=coil_type: draw_coil(sec_type, coil_type)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--save', action='store_true', help='Record these times as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed slow down, 0.5 is 50%% slower')
+    args = parser.parse_args()
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as file:
+            baseline = json.load(file)
+    results = {}
+    failed = []
+    print(f'{"case":<40}{"ms":>10}{"baseline":>10}{"ratio":>8}')
+    for name, func in cases():
+        ms = best_of(func) * 1000
+        results[name] = round(ms, 4)
+        base = baseline.get(name)
+        ratio = ms / base if base else None
+        flag = ''
+        if ratio is not None and ratio > 1 + args.tolerance:
+            flag = '  SLOWER'
+            failed.append(name)
+        base_text = f'{base:.4f}' if base else '-'
+        ratio_text = f'{ratio:.2f}' if ratio is not None else '-'
+        print(f'{name:<40}{ms:>10.4f}{base_text:>10}{ratio_text:>8}{flag}')
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+            file.write('\n')
+        print(f'Baseline saved to {BASELINE}')
+    elif failed:
+        print(f'{len(failed)} case(s) more than {args.tolerance:.0%} slower than the baseline')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# Time & memory to export threaded rods as STL & 3MF straight from the thread profile.
+# The triangles are streamed to disk one revolution at a time, so the peak memory should
+# stay the same however long the rod is. An M8x500 rod should take well under a second.
+# The mesh of short rods with 1, 3, 4 & 6 starts is checked too, every edge has to be used once
+# each way round (watertight & manifold) & no triangle may have zero area, or the run fails.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_export
+
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from P_ThreadTune import config
+from P_ThreadTune.lib import threadgeom
+
+RODS = ((8, 1.25, 50, 1), (8, 1.25, 500, 1), (8, 1.25, 1000, 1), (24, 3, 500, 1), (24, 3, 500, 4))
+MESH_CHECKS = [(od, pitch, 30, starts) for od, pitch in ((8, 1.25), (24, 3)) for starts in (1, 3, 4, 6)]
+
+
+def export(writer, path, od, pitch, length, starts):
+    spec = threadgeom.ThreadSpec(od, pitch, pitch * starts)
+    chunks = threadgeom.thread_triangles(spec, length * .1, config.EXPORT_COLUMNS, starts)
+    start = time.perf_counter()
+    count = writer(path, chunks)
+    return count, time.perf_counter() - start
+
+
+def mesh_defects(od, pitch, length, starts):
+    """(zero area triangles, edges not used exactly once each way round) of a rod's mesh."""
+    spec = threadgeom.ThreadSpec(od, pitch, pitch * starts)
+    edges = Counter()
+    degenerate = 0
+    for triangles in threadgeom.thread_triangles(spec, length * .1, config.EXPORT_COLUMNS, starts):
+        for a, b, c in triangles:
+            u = [b[i] - a[i] for i in range(3)]
+            v = [c[i] - a[i] for i in range(3)]
+            if math.hypot(u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0]) < 1e-12:
+                degenerate += 1
+            for p, q in ((a, b), (b, c), (c, a)):
+                edges[p, q] += 1
+    unmatched = sum(1 for (p, q), n in edges.items() if n != 1 or edges.get((q, p)) != 1)
+    return degenerate, unmatched
+
+
+def main():
+    print(f'{"rod":<24}{"triangles":>10}{"stl ms":>9}{"3mf ms":>9}{"stl MB":>8}{"peak KB":>9}')
+    with tempfile.TemporaryDirectory() as folder:
+        stl = os.path.join(folder, 'rod.stl')
+        tmf = os.path.join(folder, 'rod.3mf')
+        for od, pitch, length, starts in RODS:
+            count, stl_s = export(threadgeom.write_stl, stl, od, pitch, length, starts)
+# tracemalloc slows Python down a lot, so the memory is measured on a run of its own
+            tracemalloc.start()
+            export(threadgeom.write_stl, stl, od, pitch, length, starts)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            tmf_s = export(threadgeom.write_3mf, tmf, od, pitch, length, starts)[1]
+            print(f'{f"M{od}x{pitch} {length}mm {starts} start":<24}{count:>10}{stl_s * 1000:>9.0f}{tmf_s * 1000:>9.0f}'
+                  f'{os.path.getsize(stl) / 1e6:>8.1f}{peak / 1024:>9.0f}')
+    print(f'\n{"mesh":<24}{"degenerate":>11}{"unmatched":>11}')
+    failed = 0
+    for od, pitch, length, starts in MESH_CHECKS:
+        degenerate, unmatched = mesh_defects(od, pitch, length, starts)
+        flag = '  BAD' if degenerate or unmatched else ''
+        failed += bool(flag)
+        print(f'{f"M{od}x{pitch} {length}mm {starts} start":<24}{degenerate:>11}{unmatched:>11}{flag}')
+    if failed:
+        print(f'{failed} mesh(es) with zero area triangles or unmatched edges')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
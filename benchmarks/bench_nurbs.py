@@ -0,0 +1,108 @@
+# Accuracy of the NurbsHelix path against the fitted spline helix.
+# For the outer radius of M3 to M24 threads, this compares the radial deviation
+# of one revolution of threadgeom.helix_nurbs with a cubic spline through sPts
+# helix points, which is how a fitted spline is built from the DrawHelix points.
+# The NURBS helix has no radial deviation but is off in Z, it is drawn with
+# config.NURBS_SPANS_PER_TURN arcs & its Z deviation is checked against the
+# threadgeom.nurbs_deviation bound that spans_for_tolerance sizes the arcs from.
+# The sweep time of each path can only be measured inside Fusion 360, where it
+# shows up in the timing of the sweep itself.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_nurbs
+
+import csv
+import math
+import os
+import sys
+
+from P_ThreadTune import config
+from P_ThreadTune.lib import threadgeom
+
+SPLINE_POINTS = (18, 36, 45)
+SAMPLES_PER_SPAN = 50
+METRIC_CSV = os.path.join(os.path.dirname(__file__), '..', 'P_ThreadTune', 'commands', 'commandDialog', 'metric_V3.csv')
+
+
+def natural_cubic(values):
+# Second derivatives of a natural cubic spline through equally spaced values
+    n = len(values) - 1
+    m = [0.0] * (n + 1)
+    c = [0.0] * (n + 1)
+    d = [0.0] * (n + 1)
+    for i in range(1, n):
+        rhs = 6 * (values[i + 1] - 2 * values[i] + values[i - 1])
+        denom = 4 - c[i - 1]
+        c[i] = 1 / denom
+        d[i] = (rhs - d[i - 1]) / denom
+    for i in range(n - 1, 0, -1):
+        m[i] = d[i] - c[i] * m[i + 1]
+    return m
+
+
+def spline_deviation(radius, pitch, sPts):
+    samples = threadgeom.sample_curve(radius, sPts, 1, z_pitch=pitch).path
+    if hasattr(samples, 'tolist'):
+        samples = samples.tolist()
+    xs = [p[0] for p in samples]
+    ys = [p[1] for p in samples]
+    mx = natural_cubic(xs)
+    my = natural_cubic(ys)
+    worst = 0.0
+    for i in range(sPts):
+        for k in range(SAMPLES_PER_SPAN):
+            t = k / SAMPLES_PER_SPAN
+            a = 1 - t
+            x = a * xs[i] + t * xs[i + 1] + ((a ** 3 - a) * mx[i] + (t ** 3 - t) * mx[i + 1]) / 6
+            y = a * ys[i] + t * ys[i + 1] + ((a ** 3 - a) * my[i] + (t ** 3 - t) * my[i + 1]) / 6
+            worst = max(worst, abs(math.hypot(x, y) - radius))
+    return worst
+
+
+def nurbs_deviation(radius, pitch, spans=config.NURBS_SPANS_PER_TURN):
+    curve = threadgeom.helix_nurbs(radius, pitch, 1, 1, spans)
+    end = curve.knots[-1]
+    count = SAMPLES_PER_SPAN * int(end)
+    worst_r = 0.0
+    worst_z = 0.0
+    for i in range(count + 1):
+        x, y, z = threadgeom.evaluate_nurbs(curve, end * i / count)
+        worst_r = max(worst_r, abs(math.hypot(x, y) - radius))
+        if 0 < i < count:
+            ang = math.atan2(y, x) % (2 * math.pi)
+            worst_z = max(worst_z, abs(z - pitch * ang / (2 * math.pi)))
+    return worst_r, worst_z, len(curve.control_points)
+
+
+def main():
+    with open(METRIC_CSV) as file:
+        rows = list(csv.reader(file))[1:]
+    header = f'{"size":<8}{"nurbs pts":>10}{"nurbs dR mm":>13}{"nurbs dZ mm":>13}{"dZ bound":>10}'
+    for sPts in SPLINE_POINTS:
+        header += f'{f"{sPts}pt dR mm":>14}'
+    print(header)
+    over = []
+    for row in rows:
+        od = float(row[1])
+        if od > 24:
+            continue
+        radius = od / 2 * .1                # cm like the sketch
+        pitch = float(row[2]) * .1
+        dr, dz, n_pts = nurbs_deviation(radius, pitch)
+        bound = threadgeom.nurbs_deviation(pitch, config.NURBS_SPANS_PER_TURN)
+        line = f'{"M" + row[1] + "x" + row[2]:<8}{n_pts:>10}{dr * 10:>13.2e}{dz * 10:>13.2e}{bound * 10:>10.2e}'
+        for sPts in SPLINE_POINTS:
+            line += f'{spline_deviation(radius, pitch, sPts) * 10:>14.2e}'
+        print(line)
+# The bound has to hold for every arc count spans_for_tolerance can pick
+        for spans in range(threadgeom.MIN_NURBS_SPANS, 33):
+            if nurbs_deviation(radius, pitch, spans)[1] > threadgeom.nurbs_deviation(pitch, spans):
+                over.append(f'M{row[1]}x{row[2]} {spans} arcs')
+    if over:
+        print('Z deviation over the nurbs_deviation bound: ' + ', '.join(over))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
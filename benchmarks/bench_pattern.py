@@ -0,0 +1,48 @@
+# Operation counts for the two ways of building Pattern threads from a 1 revolution sweep.
+# DrawPatternThreads makes one path pattern of rev bodies & the cylinder extrude then joins all
+# of them. DrawDoublingThreads copies, moves & joins doubling blocks, so the cylinder joins one body.
+# Fusion itself is needed to time the features, this prints what each strategy asks Fusion to do:
+#   features   -- Timeline features added for the threads
+#   copies     -- Bodies Fusion has to create from the 1 revolution sweep
+#   tools      -- Most tool bodies in any one join, the cylinder join for the pattern
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_pattern
+
+from P_ThreadTune.lib import threadgeom
+
+REVOLUTIONS = (10, 100, 400)
+
+
+def pattern_counts(rev):
+    return {'features': 1, 'copies': rev - 1, 'tools': rev}
+
+
+def doubling_counts(rev):
+    features = 0
+    copies = 0
+    thread = False
+    for step in threadgeom.doubling_plan(rev):
+        if step.op == 'final':
+            features += 2                               # move & join
+        elif step.op == 'double':
+            features += 3                               # copy, move & join
+            copies += 1
+        else:
+            features += 1 if step.shift == 0 else 2     # copy & maybe move
+            features += 1 if thread else 0              # join to the thread body
+            copies += 1
+            thread = True
+    return {'features': features, 'copies': copies, 'tools': 1}
+
+
+def main():
+    print(f'{"revs":>6}  {"pattern":>8}{"copies":>8}{"tools":>7}  {"doubling":>9}{"copies":>8}{"tools":>7}')
+    for rev in REVOLUTIONS:
+        p = pattern_counts(rev)
+        d = doubling_counts(rev)
+        print(f'{rev:>6}  {p["features"]:>8}{p["copies"]:>8}{p["tools"]:>7}  {d["features"]:>9}{d["copies"]:>8}{d["tools"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
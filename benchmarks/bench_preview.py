@@ -0,0 +1,51 @@
+# Time to build the live preview mesh, which should stay around 50 ms per dialog change.
+# Uses the same sections, stations & point counts as PreviewMesh & PreviewCoilMesh in entry.py,
+# only the CustomGraphicsCoordinates & addMesh calls inside Fusion are left out.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_preview
+
+import math
+
+from P_ThreadTune import config
+from P_ThreadTune.lib import threadgeom
+from benchmarks.bench_sampler import best_of
+
+THREADS = ((8, 1.25, 20, 1), (8, 1.25, 100, 1), (8, 1.25, 500, 1), (24, 3, 60, 4), (24, 3, 500, 6))
+COILS = ((24, 2, 3, 10), (50, 2, 5, 40), (100, 4, 10, 100))
+
+
+def preview_points(revs):
+    return max(config.PREVIEW_MIN_PTS, min(config.PREVIEW_PTS, int(config.PREVIEW_MAX_STATIONS / max(revs, 1))))
+
+
+def thread_mesh(od, pitch, height, starts):
+    prof = threadgeom.thread_profile(threadgeom.ThreadSpec(od, pitch, pitch * starts))
+    section = [(x, -y) for x, y in prof.vertices[:5]]
+    section.append((prof.x0, section[-1][1]))
+    pitch1 = pitch * starts * .1
+    revs = height * .1 / pitch1
+    pts = preview_points(revs * starts)
+    return threadgeom.merge_meshes([threadgeom.sweep_mesh(section, threadgeom.helix_stations(pts, revs, pitch1, 0.0, 1, 2 * math.pi * i / starts))
+                                    for i in range(starts)])
+
+
+def coil_mesh(diameter, section_dia, pitch, revs):
+    section = [(x, -y) for x, y in threadgeom.circle_points(diameter / 2 * .1, section_dia / 2 * .1)]
+    return threadgeom.sweep_mesh(section, threadgeom.helix_stations(preview_points(revs), revs, pitch * .1))
+
+
+def main():
+    print(f'{"case":<28}{"triangles":>10}{"ms":>9}')
+    for od, pitch, height, starts in THREADS:
+        mesh = thread_mesh(od, pitch, height, starts)
+        ms = best_of(lambda: thread_mesh(od, pitch, height, starts)) * 1000
+        print(f'{f"M{od}x{pitch} {height}mm {starts} start":<28}{len(mesh.indices) // 3:>10}{ms:>9.2f}')
+    for diameter, section_dia, pitch, revs in COILS:
+        mesh = coil_mesh(diameter, section_dia, pitch, revs)
+        ms = best_of(lambda: coil_mesh(diameter, section_dia, pitch, revs)) * 1000
+        print(f'{f"coil {diameter}mm {revs} revs":<28}{len(mesh.indices) // 3:>10}{ms:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# Microbenchmark of the helix/coil point sampling.
+# Compares the per point loops DrawHelix & DrawAngledCoil used to run with
+# threadgeom.sample_curve, for 18, 45 & 360 spline points over 10 to 400 revolutions.
+# Only the coordinate math is timed, Point3D creation costs the same either way.
+#
+# Run from the repository root:
+#   python -m benchmarks.bench_sampler
+
+import math
+import timeit
+
+from P_ThreadTune.lib import threadgeom
+
+SPLINE_POINTS = (18, 45, 360)
+REVOLUTIONS = (10, 50, 100, 400)
+
+
+def legacy_helix(R_Min1, Rad1, Pitch1, sPts, rev):
+# The LongHelix loop from DrawHelix, appending tuples instead of Point3D objects
+    Z0 = 0.0
+    ang_R = (360.0 / sPts) * math.pi / 180
+    Z_inc = Pitch1 / sPts
+    sPts_Total = sPts * rev
+    Icount = 0
+    ang = 0
+    points = []
+    points1 = []
+    while (Icount <= sPts_Total):
+        x = R_Min1 * math.cos(ang)
+        y = R_Min1 * math.sin(ang)
+        z = Z0
+        Z0 = Z0 + Z_inc
+        x1 = Rad1 * math.cos(ang)
+        y1 = Rad1 * math.sin(ang)
+        points1.append((x1, y1, z))
+        points.append((x, y, z))
+        ang = ang + ang_R
+        Icount = Icount + 1
+    return points, points1
+
+
+def legacy_coil(rad0, rad1, pitch, sPts, I_revs, angle):
+# The loop from DrawAngledCoil
+    points = []
+    points1 = []
+    for i in range(sPts * I_revs + 1):
+        t = i / sPts * 2 * math.pi
+        r = rad0 + (pitch * i / sPts) * math.tan(angle)
+        r1 = rad1 + (pitch * i / sPts) * math.tan(angle)
+        x = r * math.cos(t)
+        y = r * math.sin(t)
+        x1 = r1 * math.cos(t)
+        y1 = r1 * math.sin(t)
+        z = (pitch / (2 * math.pi)) * t
+        points.append((x, y, z))
+        points1.append((x1, y1, z))
+    return points, points1
+
+
+def best_of(func, repeat=3):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main():
+    backend = 'numpy' if threadgeom.sampler.np is not None else 'python'
+    print(f'threadgeom.sample_curve backend: {backend}')
+    print(f'{"curve":<7}{"sPts":>6}{"revs":>6}{"points":>9}{"legacy ms":>12}{"sampler ms":>12}{"speedup":>9}')
+    for sPts in SPLINE_POINTS:
+        for rev in REVOLUTIONS:
+            cases = (
+                ('helix',
+                 lambda: legacy_helix(0.34, 0.4, 0.125, sPts, rev),
+                 lambda: threadgeom.sample_curve(0.34, sPts, rev, z_pitch=0.125, rail_radius=0.4)),
+                ('coil',
+                 lambda: legacy_coil(1.2, 1.3, 0.3, sPts, rev, math.radians(5)),
+                 lambda: threadgeom.sample_curve(1.2, sPts, rev, z_pitch=0.3, radial_pitch=0.3 * math.tan(math.radians(5)), rail_radius=1.3)),
+            )
+            for name, legacy, sampler in cases:
+                t_old = best_of(legacy)
+                t_new = best_of(sampler)
+                print(f'{name:<7}{sPts:>6}{rev:>6}{sPts * rev + 1:>9}{t_old * 1000:>12.3f}{t_new * 1000:>12.3f}{t_old / t_new:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
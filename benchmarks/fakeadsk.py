@@ -0,0 +1,346 @@
+# Lightweight stand-in for the adsk.core & adsk.fusion modules, so entry.py can be imported &
+# its Python side timed without Fusion 360. Point3D, ObjectCollection, Sketch & the sketch
+# curve collections are real little classes that keep what they are given, everything else
+# in the API is a Stub that takes any attribute, call or assignment & does nothing.
+# It only has to be good enough for the routines the benchmarks call, not to model Fusion.
+# Every API call is counted in calls by 'collection.method', e.g. 'extrudeFeatures.addSimple',
+# & every message box goes into messages, so a build can be checked for what it asks Fusion to do.
+# design.findAttributes returns what is in attributes, so a component can be put in the design
+# with tag() for the builds that reuse or mirror one, & TemporaryBRepManager writes & reads
+# template files so the template library can be filled & used.
+#
+#   from benchmarks import fakeadsk
+#   fakeadsk.install()
+#   from P_ThreadTune.commands.commandDialog import entry
+
+import sys
+import types
+from collections import Counter
+from types import SimpleNamespace
+
+calls = Counter()           # 'collection.method' -> number of calls, plus 'spline points'
+messages = []               # Text of every ui.messageBox
+attributes = []             # Attributes of the components in the design, design.findAttributes looks in here
+
+
+def reset():
+    calls.clear()
+    messages.clear()
+    attributes.clear()
+
+
+class Stub:
+    """Any part of the API that is not modelled. Attributes are Stubs too & stay the same object."""
+    def __init__(self, name='adsk', parent=''):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_parent', parent)
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        value = Stub(attr, self._name)
+        object.__setattr__(self, attr, value)
+        return value
+
+    def __call__(self, *args, **kwargs):
+        calls[f'{self._parent}.{self._name}'] += 1
+        return Stub(self._name, self._parent)
+
+    def __iter__(self):
+        return iter(())
+
+    def __repr__(self):
+        return f'<Stub {self._name}>'
+
+    count = 0
+    isValid = True
+
+    def item(self, index):
+        return Stub('item')
+
+
+class Point3D:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    def copy(self):
+        return Point3D(self.x, self.y, self.z)
+
+    def asArray(self):
+        return [self.x, self.y, self.z]
+
+
+class Vector3D(Point3D):
+    __slots__ = ()
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+
+class ObjectCollection:
+    def __init__(self):
+        self.items = []
+
+    @staticmethod
+    def create():
+        return ObjectCollection()
+
+    def add(self, item):
+        self.items.append(item)
+        return True
+
+    def item(self, index):
+        return self.items[index]
+
+    def clear(self):
+        self.items = []
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class ValueInput(SimpleNamespace):
+    @staticmethod
+    def createByReal(value):
+        return ValueInput(realValue=value)
+
+    @staticmethod
+    def createByString(value):
+        return ValueInput(stringValue=value)
+
+    @staticmethod
+    def createByObject(value):
+        return ValueInput(objectValue=value)
+
+
+class NurbsCurve3D(SimpleNamespace):
+    @staticmethod
+    def createRational(controlPoints, degree, knots, weights, isPeriodic):
+        return NurbsCurve3D(controlPoints=controlPoints, degree=degree, knots=knots, weights=weights, isPeriodic=isPeriodic)
+
+
+class UserInterface(Stub):
+    def __init__(self):
+        super().__init__('userInterface', 'app')
+
+    def messageBox(self, text, *args):
+        calls['userInterface.messageBox'] += 1
+        messages.append(text)
+        return Stub('messageBox', 'userInterface')
+
+
+class _Collection:
+    """Base for the sketch collections, keeps & counts every curve added."""
+    name = 'collection'
+
+    def __init__(self):
+        self.items = []
+
+    def _keep(self, curve, method='add'):
+        calls[f'{self.name}.{method}'] += 1
+        self.items.append(curve)
+        return curve
+
+    def item(self, index):
+        return self.items[index]
+
+    @property
+    def count(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class SketchLines(_Collection):
+    name = 'sketchLines'
+
+    def addByTwoPoints(self, start, end):
+        return self._keep(SimpleNamespace(startSketchPoint=SimpleNamespace(geometry=start),
+                                          endSketchPoint=SimpleNamespace(geometry=end), isConstruction=False), 'addByTwoPoints')
+
+
+class SketchFittedSplines(_Collection):
+    name = 'sketchFittedSplines'
+
+    def add(self, points):
+        calls['spline points'] += points.count
+        return self._keep(SimpleNamespace(fitPoints=points, isClosed=False, startSketchPoint=SimpleNamespace(geometry=points.item(0)),
+                                          endSketchPoint=SimpleNamespace(geometry=points.item(points.count - 1))))
+
+
+class SketchFixedSplines(_Collection):
+    name = 'sketchFixedSplines'
+
+    def addByNurbsCurve(self, curve):
+        calls['spline points'] += len(curve.controlPoints)
+        return self._keep(SimpleNamespace(geometry=curve), 'addByNurbsCurve')
+
+
+class SketchCircles(_Collection):
+    name = 'sketchCircles'
+
+    def addByCenterRadius(self, center, radius):
+        return self._keep(SimpleNamespace(centerSketchPoint=SimpleNamespace(geometry=center), radius=radius), 'addByCenterRadius')
+
+
+class SketchEllipses(_Collection):
+    name = 'sketchEllipses'
+
+    def add(self, center, major_point, minor_point):
+        return self._keep(SimpleNamespace(centerSketchPoint=SimpleNamespace(geometry=center),
+                                          majorAxis=major_point, minorAxis=minor_point))
+
+
+class SketchCurves:
+    def __init__(self):
+        self.sketchLines = SketchLines()
+        self.sketchFittedSplines = SketchFittedSplines()
+        self.sketchFixedSplines = SketchFixedSplines()
+        self.sketchCircles = SketchCircles()
+        self.sketchEllipses = SketchEllipses()
+
+
+class Sketch(Stub):
+    def __init__(self, plane=None):
+        super().__init__('sketch')
+        object.__setattr__(self, 'referencePlane', plane)
+        object.__setattr__(self, 'sketchCurves', SketchCurves())
+        object.__setattr__(self, 'name', 'Sketch')
+        object.__setattr__(self, 'isComputeDeferred', False)
+        object.__setattr__(self, 'isVisible', True)
+
+
+class Sketches(_Collection):
+    name = 'sketches'
+
+    def add(self, plane):
+        return self._keep(Sketch(plane))
+
+
+class Component(Stub):
+    """Component with real sketches, its features, bodies & planes are Stubs."""
+    def __init__(self, name='Component'):
+        super().__init__('component')
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'sketches', Sketches())
+
+
+class Occurrences(Stub):
+    def __init__(self):
+        super().__init__('occurrences', 'rootComponent')
+
+    def addNewComponent(self, transform):
+        calls['occurrences.addNewComponent'] += 1
+        return SimpleNamespace(component=Component(), isLightBulbOn=True)
+
+
+def text_input(text):
+    """Stand-in for a TextBoxCommandInput or StringValueCommandInput."""
+    return SimpleNamespace(text=str(text), value=str(text), isVisible=True, isEnabled=True)
+
+
+def dropdown(index, name=''):
+    """Stand-in for a DropDownCommandInput with one item selected."""
+    return SimpleNamespace(selectedItem=SimpleNamespace(index=index, name=name), isVisible=True)
+
+
+class Bodies(list):
+    """BRepBodies of a component put in the design by tag()."""
+    @property
+    def count(self):
+        return len(self)
+
+    def item(self, index):
+        return self[index]
+
+
+def tag(group, name, value, body_names=('Body',)):
+    """Puts a component with bodies named body_names in the design, with the attribute group, name = value."""
+    component = Component(body_names[0])
+    object.__setattr__(component, 'bRepBodies', Bodies(SimpleNamespace(name=body, isLightBulbOn=True) for body in body_names))
+    object.__setattr__(component, 'isValid', True)
+    attributes.append(SimpleNamespace(groupName=group, name=name, value=value, parent=component))
+    return component
+
+
+def find_attributes(group, name):
+    calls['design.findAttributes'] += 1
+    return [attr for attr in attributes if attr.groupName == group and attr.name == name]
+
+
+class TemporaryBRepManager(Stub):
+    """Writes a placeholder file for every export, & reads one back as a single body."""
+    def __init__(self):
+        super().__init__('TemporaryBRepManager', 'fusion')
+
+    @staticmethod
+    def get():
+        return _TEMP_BREP
+
+    def exportToFile(self, bodies, path):
+        calls['TemporaryBRepManager.exportToFile'] += 1
+        with open(path, 'w') as file:
+            file.write('fakeadsk body\n')
+        return True
+
+    def createFromFile(self, path):
+        calls['TemporaryBRepManager.createFromFile'] += 1
+        bodies = ObjectCollection()
+        bodies.add(Stub('body', 'TemporaryBRepManager'))
+        return bodies
+
+
+class _Module(types.ModuleType):
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        value = Stub(attr)
+        setattr(self, attr, value)
+        return value
+
+
+def install():
+    """Puts the stand-in adsk, adsk.core & adsk.fusion into sys.modules & returns adsk.
+
+    Does nothing when a real adsk is already imported, so it is safe inside Fusion 360.
+    """
+    if 'adsk' in sys.modules:
+        return sys.modules['adsk']
+    adsk = _Module('adsk')
+    core = _Module('adsk.core')
+    fusion = _Module('adsk.fusion')
+    for cls in (Point3D, Vector3D, ObjectCollection, ValueInput, NurbsCurve3D):
+        setattr(core, cls.__name__, cls)
+    core.Application = SimpleNamespace(get=lambda: _APP)
+    fusion.Component = Component
+    fusion.Sketch = Sketch
+    fusion.TemporaryBRepManager = TemporaryBRepManager
+    adsk.core = core
+    adsk.fusion = fusion
+    _APP.activeProduct.designType = fusion.DesignTypes.ParametricDesignType
+    sys.modules.update({'adsk': adsk, 'adsk.core': core, 'adsk.fusion': fusion})
+    return adsk
+
+
+_APP = Stub('app')
+_APP.version = '0.0.0 fakeadsk'
+_APP.userInterface = UserInterface()
+_APP.activeProduct.rootComponent = Component('root')
+_APP.activeProduct.rootComponent.occurrences = Occurrences()
+_APP.activeProduct.timeline.markerPosition = 0
+_APP.activeProduct.findAttributes = find_attributes
+_TEMP_BREP = TemporaryBRepManager()